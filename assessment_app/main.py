@@ -1,12 +1,72 @@
+import logging
+import os
+import time
+from contextlib import asynccontextmanager
+
+from anyio import to_thread
 from fastapi import FastAPI
 from assessment_app.routers.user_mgmt import router as user_mgmt_router
 from assessment_app.routers.strategy import router as strategy_router
 from assessment_app.routers.market_integration import router as market_router
 from assessment_app.routers.analysis import router as analysis_router
 from assessment_app.routers.backtest import router as backtest_router
+from assessment_app.routers.monitoring import router as monitoring_router
+from assessment_app.routers.orders import router as orders_router
+from assessment_app.routers.replay import router as replay_router
 from fastapi.middleware.cors import CORSMiddleware
+from assessment_app.models.constants import DB_THREADPOOL_SIZE, DEFAULT_DB_THREADPOOL_SIZE
+from assessment_app.repository.database import SessionLocal, dispose_engine, init_db
+from assessment_app.repository.ingestion import ingest_data_dir
+from assessment_app.repository.price_store import load_price_store
+from assessment_app.repository.redis_client import reset_clients
+from assessment_app.service.auth_service import start_invalidation_listener
+from assessment_app.service.password_hasher import password_hasher
+from assessment_app.service.replay_service import replay_manager
+from assessment_app.service.sweep_service import sweep_pool
+from assessment_app.service.trade_ledger import SHUTDOWN_TIMEOUT_SECONDS, trade_ledger
+from assessment_app.utils.instrumentation import InstrumentationMiddleware
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """
+    Create the tables, ingest new or changed csv files into the database and load the market data into the
+    in-memory price store once, before serving requests, and follow the token cache invalidations while serving.
+    Importing the app connects to nothing: the engine and the Redis clients are created on first use, here.
+    `/ready` answers 200 once this startup finished.
+    """
+    started = time.perf_counter()
+    # Sync route handlers and dependencies, i.e. all database work, run on this bounded worker threadpool
+    to_thread.current_default_thread_limiter().total_tokens = int(os.environ.get(DB_THREADPOOL_SIZE, DEFAULT_DB_THREADPOOL_SIZE))
+    init_db()
+    db = SessionLocal()
+    try:
+        ingest_data_dir(db)
+        store = load_price_store(db)
+    finally:
+        db.close()
+    # The all-symbols price matrices, read by backtests, replays, valuations and snapshots, are built before the first request
+    store.aligned(store.symbols())
+    store.aligned_bars(store.symbols())
+    token_invalidation_listener = start_invalidation_listener()
+    app.state.startup_seconds = time.perf_counter() - started
+    app.state.ready = True
+    logger.info("Ready to serve in %.3fs", app.state.startup_seconds)
+    yield
+    app.state.ready = False
+    token_invalidation_listener.stop()
+    replay_manager.stop_all()
+    await to_thread.run_sync(sweep_pool.shutdown)
+    password_hasher.shutdown()
+    # Trades still queued for the ledger are written before the process exits
+    await to_thread.run_sync(trade_ledger.stop, SHUTDOWN_TIMEOUT_SECONDS)
+    dispose_engine()
+    reset_clients()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 origins = ["*"]
 app.include_router(user_mgmt_router, prefix="", tags=["user_mgmt"])
@@ -14,6 +74,9 @@ app.include_router(strategy_router, prefix="", tags=["strategy"])
 app.include_router(market_router, prefix="", tags=["market_data"])
 app.include_router(analysis_router, prefix="", tags=["analysis"])
 app.include_router(backtest_router, prefix="", tags=["backtest"])
+app.include_router(orders_router, prefix="", tags=["orders"])
+app.include_router(monitoring_router, prefix="", tags=["monitoring"])
+app.include_router(replay_router, prefix="", tags=["replay"])
 app.add_middleware(
     CORSMiddleware,
     allow_origins = origins,
@@ -21,6 +84,8 @@ app.add_middleware(
     allow_methods = ["*"],
     allow_headers = ["*"]
 )
+# Outermost, so the latency histograms cover every other middleware too
+app.add_middleware(InstrumentationMiddleware)
 
 @app.get("/")
 def read_root():
@@ -4,6 +4,52 @@ JWT_TOKEN = "jwt_token"
 DAYS_IN_YEAR = 365.25
 REDIS_HOST = 'REDIS_HOST'
 REDIS_PORT = 'REDIS_PORT'
+REDIS_MAX_CONNECTIONS = 'REDIS_MAX_CONNECTIONS'
+DEFAULT_REDIS_MAX_CONNECTIONS = 50
+DATABASE_URL = 'DATABASE_URL'
+DB_POOL_SIZE = 'DB_POOL_SIZE'
+DB_MAX_OVERFLOW = 'DB_MAX_OVERFLOW'
+DB_POOL_TIMEOUT = 'DB_POOL_TIMEOUT'
+DB_POOL_RECYCLE = 'DB_POOL_RECYCLE'
+DB_POOL_PRE_PING = 'DB_POOL_PRE_PING'
+DB_STATEMENT_TIMEOUT_MS = 'DB_STATEMENT_TIMEOUT_MS'
+DB_THREADPOOL_SIZE = 'DB_THREADPOOL_SIZE'
+DEFAULT_DB_THREADPOOL_SIZE = 40
+TOKEN_CACHE_SIZE = 'TOKEN_CACHE_SIZE'
+TOKEN_CACHE_TTL_SECONDS = 'TOKEN_CACHE_TTL_SECONDS'
+AUTH_LOG_SAMPLE_RATE = 'AUTH_LOG_SAMPLE_RATE'
+DEFAULT_TOKEN_CACHE_SIZE = 10000
+DEFAULT_TOKEN_CACHE_TTL_SECONDS = 60
+DEFAULT_AUTH_LOG_SAMPLE_RATE = 0.01
+BCRYPT_ROUNDS = 'BCRYPT_ROUNDS'
+BCRYPT_WORKERS = 'BCRYPT_WORKERS'
+BCRYPT_MAX_PENDING = 'BCRYPT_MAX_PENDING'
+DEFAULT_BCRYPT_ROUNDS = 12
+DEFAULT_BCRYPT_MAX_PENDING = 64
+TRADE_LEDGER_BATCH_SIZE = 'TRADE_LEDGER_BATCH_SIZE'
+TRADE_LEDGER_FLUSH_INTERVAL_MS = 'TRADE_LEDGER_FLUSH_INTERVAL_MS'
+TRADE_LEDGER_MAX_PENDING = 'TRADE_LEDGER_MAX_PENDING'
+DEFAULT_TRADE_LEDGER_BATCH_SIZE = 500
+DEFAULT_TRADE_LEDGER_FLUSH_INTERVAL_MS = 200
+DEFAULT_TRADE_LEDGER_MAX_PENDING = 100000
+DEFAULT_TRADE_HISTORY_LIMIT = 50
+SWEEP_WORKERS = 'SWEEP_WORKERS'
+SWEEP_MAX_TASKS = 'SWEEP_MAX_TASKS'
+DEFAULT_SWEEP_MAX_TASKS = 10000
+REPLAY_MAX_SESSIONS = 'REPLAY_MAX_SESSIONS'
+DEFAULT_REPLAY_MAX_SESSIONS = 32
+REPLAY_PENDING_TTL_SECONDS = 'REPLAY_PENDING_TTL_SECONDS'
+DEFAULT_REPLAY_PENDING_TTL_SECONDS = 300
+REPLAY_MAX_MS_PER_DAY = 'REPLAY_MAX_MS_PER_DAY'
+DEFAULT_REPLAY_MAX_MS_PER_DAY = 60000
+MAX_TRADE_HISTORY_LIMIT = 1000
+PROFILING_ENABLED = 'PROFILING_ENABLED'
+PROFILE_SAMPLE_INTERVAL_MS = 'PROFILE_SAMPLE_INTERVAL_MS'
+DEFAULT_PROFILE_SAMPLE_INTERVAL_MS = 1
+RESPONSE_CACHE_MAX_BYTES = 'RESPONSE_CACHE_MAX_BYTES'
+DEFAULT_RESPONSE_CACHE_MAX_BYTES = 64 * 1024 * 1024
+MARKET_DATA_MAX_AGE_SECONDS = 'MARKET_DATA_MAX_AGE_SECONDS'
+DEFAULT_MARKET_DATA_MAX_AGE_SECONDS = 300
 PASSWORD = 'hash_password'
 EMAIL = 'email'
 SECRET_KEY = "TESTING"
@@ -15,6 +61,48 @@ class TradeType(str, Enum):
     SELL = "SELL"
 
 
+class TradeStatus(str, Enum):
+    FILLED = "FILLED"
+    REJECTED = "REJECTED"
+
+
+class RangeFormat(str, Enum):
+    JSON = "json"
+    NDJSON = "ndjson"
+    COLUMNAR = "columnar"
+    ARROW = "arrow"
+    NPY = "npy"
+
+
+class OrderType(str, Enum):
+    LIMIT = "LIMIT"
+    STOP = "STOP"
+
+
+class OrderStatus(str, Enum):
+    OPEN = "OPEN"
+    FILLED = "FILLED"
+    CANCELLED = "CANCELLED"
+    REJECTED = "REJECTED"
+
+
+class ReplayPolicy(str, Enum):
+    DROP = "drop"
+    COALESCE = "coalesce"
+
+
+class ReplayStatus(str, Enum):
+    PENDING = "pending"
+    RUNNING = "running"
+    FINISHED = "finished"
+    STOPPED = "stopped"
+
+
+class SweepRankBy(str, Enum):
+    ANNUALIZED_RETURN = "annualized_return"
+    PROFIT_LOSS = "profit_loss"
+
+
 class Env(str, Enum):
     LOCAL = "local"
     DEV = "dev"
@@ -26,3 +114,12 @@ class StockSymbols(str, Enum):
     ICICIBANK: str = "ICICIBANK"
     RELIANCE: str = "RELIANCE"
     TATAMOTORS: str = "TATAMOTORS"
+
+
+class IndicatorType(str, Enum):
+    SMA = "sma"
+    EMA = "ema"
+    STD = "std"
+    VOLATILITY = "volatility"
+    MAX_DRAWDOWN = "max_drawdown"
+    RSI = "rsi"
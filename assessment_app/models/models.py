@@ -1,10 +1,11 @@
 import uuid
 from datetime import datetime
-from typing import List
+from typing import Dict, List, Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
-from assessment_app.models.constants import TradeType
+from assessment_app.models.constants import (IndicatorType, OrderStatus, OrderType, ReplayPolicy, ReplayStatus, StockSymbols, SweepRankBy,
+                                             TradeStatus, TradeType)
 
 
 # Pydantic models
@@ -36,6 +37,24 @@ class Trade(StockPrice):
     execution_ts: datetime
 
 
+class TradeBatchRequest(BaseModel):
+    portfolio_id: str
+    trades: List[Trade]
+
+
+class TradeResult(BaseModel):
+    trade: Trade
+    status: TradeStatus
+    detail: Optional[str] = None
+
+
+class TradeBatchResponse(BaseModel):
+    portfolio_id: str
+    cash_remaining: float
+    current_ts: datetime
+    results: List[TradeResult]
+
+
 class Holding(StockPrice):
     quantity: int
 
@@ -66,9 +85,53 @@ class TickDataResponse(BaseModel):
     data: List[TickData]
 
 
+class SnapshotBar(BaseModel):
+    stock_symbol: str
+    # Date of the bar shown, before the snapshot's when forward filled; None when the symbol has no bar to show
+    timestamp: Optional[datetime] = None
+    open: Optional[float] = None
+    high: Optional[float] = None
+    low: Optional[float] = None
+    close: Optional[float] = None
+    price: Optional[float] = None
+
+
+class MarketSnapshot(BaseModel):
+    current_ts: datetime
+    forward_fill: bool
+    bars: List[SnapshotBar]
+
+
+class MarketSnapshotRange(BaseModel):
+    """
+    Columns of bars on the symbols' union trading calendar: `open[i][j]` is the open of `symbols[j]` on
+    `timestamps[i]`, None where the symbol has no bar to show.
+    """
+    symbols: List[str]
+    timestamps: List[datetime]
+    forward_fill: bool
+    open: List[List[Optional[float]]]
+    high: List[List[Optional[float]]]
+    low: List[List[Optional[float]]]
+    close: List[List[Optional[float]]]
+    price: List[List[Optional[float]]]
+
+
+class NavData(BaseModel):
+    timestamp: datetime
+    net_worth: float
+
+
+class NavResponse(BaseModel):
+    portfolio_id: str
+    data: List[NavData]
+
+
 class TradeHistory(BaseModel):
     portfolio_id: str
     trades: List[Trade]
+    # Pass as `cursor` to get the next page, None on the last page
+    next_cursor: Optional[str] = None
 
 
 class BacktestRequest(BaseModel):
@@ -77,6 +140,7 @@ class BacktestRequest(BaseModel):
     start_date: datetime
     end_date: datetime
     initial_capital: float
+    parameters: Dict[str, float] = {}
 
 # class Trade(BaseModel):
 #     date: datetime
@@ -94,3 +158,117 @@ class BacktestResponse(BaseModel):
     trades: List[Trade]
     profit_loss: float
     annualized_return: float
+
+
+class BacktestWindow(BaseModel):
+    start_date: datetime
+    end_date: datetime
+
+
+class BacktestSweepRequest(BaseModel):
+    strategy_id: str
+    parameter_grid: Dict[str, List[float]] = {}
+    symbols: Optional[List[StockSymbols]] = None
+    windows: Optional[List[BacktestWindow]] = None
+    initial_capital: float = 1000000.0
+    rank_by: SweepRankBy = SweepRankBy.ANNUALIZED_RETURN
+    top_n: Optional[int] = None
+
+
+class BacktestSweepResult(BaseModel):
+    parameters: Dict[str, float]
+    start_date: datetime
+    end_date: datetime
+    final_capital: float
+    profit_loss: float
+    annualized_return: float
+    trade_count: int
+
+
+class BacktestSweepResponse(BaseModel):
+    strategy_id: str
+    symbols: List[str]
+    rank_by: SweepRankBy
+    results: List[BacktestSweepResult]
+
+
+class AnalysisWindow(BaseModel):
+    start_ts: datetime
+    end_ts: datetime
+
+
+class ReturnsMatrixRequest(BaseModel):
+    symbols: Optional[List[StockSymbols]] = None
+    windows: List[AnalysisWindow]
+
+
+class ReturnsMatrixResponse(BaseModel):
+    symbols: List[str]
+    windows: List[AnalysisWindow]
+    # cagr[i][j] is the CAGR in percent of symbols[i] over windows[j], None without market data
+    cagr: List[List[Optional[float]]]
+
+
+class IndicatorData(BaseModel):
+    timestamp: datetime
+    value: Optional[float]
+
+
+class IndicatorResponse(BaseModel):
+    stock_symbol: str
+    indicator: IndicatorType
+    window: Optional[int]
+    data: List[IndicatorData]
+
+
+class ReplayRequest(BaseModel):
+    symbols: Optional[List[StockSymbols]] = None
+    from_ts: datetime
+    to_ts: datetime
+    # Wall clock milliseconds per trading day, 0 replays as fast as possible
+    ms_per_day: float = Field(100.0, ge=0)
+    # Events buffered per subscriber before the policy kicks in
+    queue_size: int = Field(1000, ge=1, le=100000)
+    policy: ReplayPolicy = ReplayPolicy.DROP
+
+
+class ReplaySessionInfo(BaseModel):
+    id: str
+    symbols: List[str]
+    from_ts: datetime
+    to_ts: datetime
+    ms_per_day: float
+    policy: ReplayPolicy
+    status: ReplayStatus
+    trading_days: int
+    days_replayed: int
+    events_published: int
+    subscribers: int
+    dropped: int
+    coalesced: int
+
+
+class OrderRequest(BaseModel):
+    symbol: StockSymbols
+    type: TradeType = TradeType.BUY
+    order_type: OrderType = OrderType.LIMIT
+    # Limit price, or the stop price that triggers a stop order
+    price: float = Field(gt=0)
+    quantity: int = Field(gt=0)
+
+
+class Order(OrderRequest):
+    id: str
+    status: OrderStatus
+    placed_at: datetime
+    filled_price: Optional[float] = None
+    filled_at: Optional[datetime] = None
+    detail: Optional[str] = None
+
+
+class OrderMatchResponse(BaseModel):
+    portfolio_id: str
+    cash_remaining: float
+    current_ts: datetime
+    # Orders filled or rejected while the clock advanced, in execution order
+    orders: List[Order]
@@ -1,16 +1,162 @@
+import os
+import threading
+import time
 import uuid
-from sqlalchemy import Date, UniqueConstraint, Uuid, create_engine
+from typing import Optional
+from sqlalchemy import BigInteger, Date, Engine, Index, UniqueConstraint, Uuid, create_engine, event, exc
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from sqlalchemy import Column, Float, ForeignKey, Integer, String, DateTime
 from sqlalchemy.orm import relationship
 from datetime import datetime
+from assessment_app.models.constants import (DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_PRE_PING, DB_POOL_RECYCLE,
+                                             DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_STATEMENT_TIMEOUT_MS)
+from assessment_app.utils.instrumentation import instrument_engine
 Base = declarative_base()
 
-SQLALCHEMY_DATABASE_URL = "postgresql://user:password@db:5432/db"
+DEFAULT_DATABASE_URL = "postgresql+psycopg2://user:password@db:5432/db"
+
+
+def database_url() -> str:
+    return os.environ.get(DATABASE_URL, DEFAULT_DATABASE_URL)
+
+
+def engine_options(url: str) -> dict:
+    """
+    Pool settings from the environment, defaults are SQLAlchemy's 5 + 10 connections.
+    SQLite gets no pool sizing, it is only used as a local stand-in.
+    """
+    if url.startswith("sqlite"):
+        return {"connect_args": {"check_same_thread": False}}
+    options = {
+        "pool_size": int(os.environ.get(DB_POOL_SIZE, 5)),
+        "max_overflow": int(os.environ.get(DB_MAX_OVERFLOW, 10)),
+        "pool_timeout": float(os.environ.get(DB_POOL_TIMEOUT, 30)),
+        "pool_recycle": int(os.environ.get(DB_POOL_RECYCLE, 1800)),
+        "pool_pre_ping": os.environ.get(DB_POOL_PRE_PING, "true").lower() in ("1", "true", "yes"),
+    }
+    statement_timeout_ms = int(os.environ.get(DB_STATEMENT_TIMEOUT_MS, 0))
+    if statement_timeout_ms and url.startswith("postgresql"):
+        options["connect_args"] = {"options": f"-c statement_timeout={statement_timeout_ms}"}
+    return options
+
+
+class PoolMetrics:
+    """
+    Connection pool telemetry: connections created, checkouts, checkout wait time and timeouts.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_created = 0
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_seconds_total = 0.0
+        self.checkout_wait_seconds_max = 0.0
+
+    def on_connect(self, *args):
+        with self._lock:
+            self.connections_created += 1
+
+    def record_checkout(self, wait_seconds: float):
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_seconds_total += wait_seconds
+            self.checkout_wait_seconds_max = max(self.checkout_wait_seconds_max, wait_seconds)
+
+    def record_timeout(self):
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def instrument(self, pool):
+        """
+        Time every checkout from `pool`, whoever asks for the connection and whenever a Session first needs it.
+        """
+        connect = pool.connect
+
+        def timed_connect():
+            started = time.perf_counter()
+            try:
+                connection = connect()
+            except exc.TimeoutError:
+                self.record_timeout()
+                raise
+            self.record_checkout(time.perf_counter() - started)
+            return connection
+        pool.connect = timed_connect
+
+    def snapshot(self, pool) -> dict:
+        """
+        Counters plus the live pool state. Saturation is the share of the pool capacity (size + overflow) in use.
+        """
+        size = pool.size() if hasattr(pool, "size") else 0
+        checked_out = pool.checkedout() if hasattr(pool, "checkedout") else 0
+        capacity = size + max(getattr(pool, "_max_overflow", 0), 0)
+        with self._lock:
+            return {
+                "pool_size": size,
+                "max_overflow": getattr(pool, "_max_overflow", 0),
+                "checked_out": checked_out,
+                "saturation": checked_out / capacity if capacity else 0.0,
+                "connections_created": self.connections_created,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_seconds_total": self.checkout_wait_seconds_total,
+                "checkout_wait_seconds_max": self.checkout_wait_seconds_max,
+                "checkout_wait_seconds_avg": self.checkout_wait_seconds_total / self.checkouts if self.checkouts else 0.0,
+            }
+
+
+pool_metrics = PoolMetrics()
+_engine: Optional[Engine] = None
+_session_factory: Optional[sessionmaker] = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> Engine:
+    """
+    The process-wide engine, created on first use from DATABASE_URL. Creating it opens no connection, so
+    importing the app needs no database, and every forked worker process builds its own connection pool.
+    """
+    global _engine, _session_factory
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                url = database_url()
+                engine = create_engine(url, **engine_options(url))
+                event.listen(engine, "connect", pool_metrics.on_connect)
+                pool_metrics.instrument(engine.pool)
+                instrument_engine(engine)
+                _session_factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+                _engine = engine
+    return _engine
+
+
+def SessionLocal() -> Session:
+    """
+    A new Session on the process-wide engine.
+    """
+    get_engine()
+    return _session_factory()
+
+
+def init_db():
+    """
+    Create the missing tables. Runs in the app's lifespan, and before the command line tools use the database.
+    """
+    Base.metadata.create_all(bind=get_engine())
+
+
+def dispose_engine():
+    """
+    Close the pooled connections and forget the engine, the next `get_engine` creates a new one.
+    """
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+        _engine = _session_factory = None
 
-engine = create_engine(SQLALCHEMY_DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 class PortfolioDB(Base):
     __tablename__ = "portfolios"
@@ -19,6 +165,9 @@ class PortfolioDB(Base):
     strategy_id = Column(String, default="0")
     cash_remaining = Column(Float, default=1000000.0)
     current_ts = Column(DateTime, default=datetime.now)
+    # Holdings marked to market at `valued_at`, kept up to date by every trade
+    holdings_value = Column(Float, default=0.0)
+    valued_at = Column(DateTime, nullable=True)
 
 class HoldingDB(Base):
     __tablename__ = "holdings"
@@ -44,13 +193,45 @@ class StockDataDB(Base):
     volume = Column(Integer)
     
     __table_args__ = (UniqueConstraint('stock_symbol', 'date', name='_stock_date_uc'),)
-    
-Base.metadata.create_all(bind=engine)
+
+class IngestedFileDB(Base):
+    """
+    Checksum of every csv file loaded into StockDataDB, so unchanged files are skipped.
+    The file's size and modification time are kept too, a file whose stat did not change is not even hashed.
+    """
+    __tablename__ = 'ingested_files'
+    file_name = Column(String, primary_key=True)
+    stock_symbol = Column(String, index=True)
+    checksum = Column(String)
+    file_size = Column(BigInteger)
+    file_mtime_ns = Column(BigInteger)
+    row_count = Column(Integer)
+    ingested_at = Column(DateTime, default=datetime.now)
+
+class TradeDB(Base):
+    """
+    Append-only ledger of executed trades, written behind the trade requests by the trade ledger.
+    """
+    __tablename__ = 'trades'
+    id = Column(String, primary_key=True)
+    portfolio_id = Column(String, nullable=False)
+    symbol = Column(String, nullable=False)
+    type = Column(String, nullable=False)
+    price = Column(Float, nullable=False)
+    quantity = Column(Integer, nullable=False)
+    execution_ts = Column(DateTime, nullable=False)
+    recorded_at = Column(DateTime, default=datetime.utcnow)
+
+    # Keyset pagination of a portfolio's trades on (execution_ts, id)
+    __table_args__ = (Index('ix_trades_portfolio_execution', 'portfolio_id', 'execution_ts', 'id'),)
 
 
 def get_db():
     """
-    Make sure this is singleton
+    One Session per request on the process-wide engine, whose connection pool is the singleton.
+    The Session is synchronous: route handlers that depend on it are plain `def` functions, so FastAPI runs them
+    on the bounded worker threadpool (DB_THREADPOOL_SIZE) and their queries never block the event loop.
+    The Session checks a connection out on its first query, requests that never query hold none.
     :return:
     """
     db = SessionLocal()
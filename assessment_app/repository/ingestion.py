@@ -0,0 +1,180 @@
+"""
+Bulk, idempotent loading of the csv market data into StockDataDB.
+
+Run manually with `python -m assessment_app.repository.ingestion [--data-dir DIR] [--force]`,
+it also runs on application startup. Rows inserted while the price store is loaded are reloaded into it, which
+also retires the cached market data responses built from the symbol's previous prices.
+"""
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import List, NamedTuple, Optional
+
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.orm import Session
+
+from assessment_app.repository.database import IngestedFileDB, SessionLocal, StockDataDB, init_db
+from assessment_app.repository.price_store import DATA_DIR, price_store, read_symbol_csv
+
+logger = logging.getLogger(__name__)
+
+# 9 bind parameters per row keeps a chunk well below the 65535 parameter limit of Postgres
+CHUNK_SIZE = 5000
+CONFLICT_COLUMNS = ['stock_symbol', 'date']
+
+
+class IngestionResult(NamedTuple):
+    file_name: str
+    stock_symbol: str
+    rows_read: int
+    rows_inserted: int
+    seconds: float
+    skipped: bool
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows_read / self.seconds if self.seconds > 0 else 0.0
+
+
+def file_checksum(file_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(file_path, mode='rb') as file:
+        for block in iter(lambda: file.read(1 << 16), b''):
+            sha256.update(block)
+    return sha256.hexdigest()
+
+
+def read_stock_rows(file_path: str, stock_symbol: str) -> List[dict]:
+    """
+    Read a symbol csv file into StockDataDB row dicts, ready for a bulk insert.
+    """
+    prices = read_symbol_csv(file_path, stock_symbol)
+    columns = zip(prices.dates.astype(object), prices.open.tolist(), prices.high.tolist(), prices.low.tolist(),
+                  prices.close.tolist(), prices.adj_close.tolist(), prices.volume.tolist())
+    return [
+        {
+            'id': str(uuid.uuid4()),
+            'stock_symbol': stock_symbol,
+            'date': date,
+            'open': open,
+            'high': high,
+            'low': low,
+            'close': close,
+            'adj_close': adj_close,
+            'volume': volume,
+        }
+        for date, open, high, low, close, adj_close, volume in columns
+    ]
+
+
+def bulk_insert_stock_data(db: Session, rows: List[dict]) -> int:
+    """
+    Insert rows into StockDataDB, ignoring the (stock_symbol, date) pairs that already exist.
+    Postgres gets one multi-row INSERT ... ON CONFLICT DO NOTHING per chunk, SQLite an executemany of the
+    same statement. Returns the number of inserted rows.
+    """
+    if not rows:
+        return 0
+    table = StockDataDB.__table__
+    dialect = db.get_bind().dialect.name
+    inserted = 0
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        for start in range(0, len(rows), CHUNK_SIZE):
+            statement = pg_insert(table).values(rows[start:start + CHUNK_SIZE])
+            inserted += db.execute(statement.on_conflict_do_nothing(index_elements=CONFLICT_COLUMNS)).rowcount
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+        statement = sqlite_insert(table).on_conflict_do_nothing(index_elements=CONFLICT_COLUMNS)
+        inserted = db.execute(statement, rows).rowcount
+    else:
+        # Other databases: one lookup of the existing dates, then an executemany of the missing rows
+        existing = set(db.scalars(select(StockDataDB.date).where(StockDataDB.stock_symbol == rows[0]['stock_symbol'])))
+        missing = [row for row in rows if row['date'] not in existing]
+        if missing:
+            db.execute(insert(table), missing)
+        inserted = len(missing)
+    return inserted
+
+
+def ingest_csv(db: Session, file_path: str, stock_symbol: Optional[str] = None, force: bool = False) -> IngestionResult:
+    """
+    Load one symbol csv file into StockDataDB in bulk and record its checksum, size and modification time.
+    A file whose size and modification time are recorded is skipped without being read, one whose checksum is
+    recorded without being parsed, unless `force` is set. The rows and the record are committed together and rows
+    already in the table are left untouched, so a file whose rows were loaded without being recorded (by an
+    interrupted run or another loader) is completed on the next run.
+    """
+    started = time.perf_counter()
+    file_name = os.path.basename(file_path)
+    stock_symbol = stock_symbol or os.path.splitext(file_name)[0]
+    stat = os.stat(file_path)
+
+    # 1. Skip files that did not change since the last ingestion, hashing only the ones whose stat changed
+    recorded = db.execute(select(IngestedFileDB.checksum, IngestedFileDB.file_size, IngestedFileDB.file_mtime_ns)
+                          .where(IngestedFileDB.file_name == file_name)).first()
+    known = recorded is not None and not force
+    if known and (recorded.file_size, recorded.file_mtime_ns) == (stat.st_size, stat.st_mtime_ns):
+        return IngestionResult(file_name, stock_symbol, 0, 0, time.perf_counter() - started, True)
+    checksum = file_checksum(file_path)
+    if known and recorded.checksum == checksum:
+        # Same contents, touched or copied: remember the new stat so the next run skips the hash
+        db.execute(update(IngestedFileDB).where(IngestedFileDB.file_name == file_name)
+                   .values(file_size=stat.st_size, file_mtime_ns=stat.st_mtime_ns))
+        db.commit()
+        return IngestionResult(file_name, stock_symbol, 0, 0, time.perf_counter() - started, True)
+
+    # 2. Bulk insert every row and record the file in the same transaction
+    rows = read_stock_rows(file_path, stock_symbol)
+    inserted = bulk_insert_stock_data(db, rows)
+    db.execute(delete(IngestedFileDB).where(IngestedFileDB.file_name == file_name))
+    db.execute(insert(IngestedFileDB).values(file_name=file_name, stock_symbol=stock_symbol, checksum=checksum,
+                                             file_size=stat.st_size, file_mtime_ns=stat.st_mtime_ns,
+                                             row_count=len(rows), ingested_at=datetime.now()))
+    db.commit()
+
+    # 3. Serve the new rows from the price store, unless it is loaded later anyway
+    if inserted and price_store.is_loaded:
+        price_store.load_from_db(db, [stock_symbol])
+
+    result = IngestionResult(file_name, stock_symbol, len(rows), inserted, time.perf_counter() - started, False)
+    logger.info("Ingested %s: %d rows read, %d inserted in %.3fs (%.0f rows/sec)", file_name, result.rows_read,
+                result.rows_inserted, result.seconds, result.rows_per_sec)
+    return result
+
+
+def ingest_data_dir(db: Session, data_dir: str = DATA_DIR, force: bool = False) -> List[IngestionResult]:
+    """
+    Ingest every `<SYMBOL>.csv` file of the data folder.
+    """
+    return [ingest_csv(db, file_path, force=force) for file_path in sorted(glob.glob(os.path.join(data_dir, '*.csv')))]
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Load market data csv files into the stock_data table.")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Folder containing <SYMBOL>.csv files")
+    parser.add_argument('--force', action='store_true', help="Re-ingest files even if their checksum is unchanged")
+    args = parser.parse_args(argv)
+
+    init_db()
+    db = SessionLocal()
+    try:
+        results = ingest_data_dir(db, args.data_dir, args.force)
+    finally:
+        db.close()
+
+    for result in results:
+        status = 'skipped (unchanged)' if result.skipped else f'{result.rows_inserted}/{result.rows_read} rows inserted'
+        print(f"{result.file_name}: {status} in {result.seconds:.3f}s ({result.rows_per_sec:.0f} rows/sec)")
+    total_rows = sum(result.rows_read for result in results)
+    total_seconds = sum(result.seconds for result in results)
+    print(f"Total: {total_rows} rows in {total_seconds:.3f}s ({total_rows / total_seconds if total_seconds else 0:.0f} rows/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,261 @@
+import csv
+import glob
+import os
+import threading
+from datetime import date, datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from assessment_app.repository.database import StockDataDB
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+PRICE_COLUMNS = ('open', 'high', 'low', 'close', 'adj_close', 'volume')
+BAR_COLUMNS = ('open', 'high', 'low', 'close', 'avg_price')
+
+
+def date_range_slice(dates: np.ndarray, from_day: date, to_day: date) -> slice:
+    """
+    Return the slice of a sorted datetime64[D] array whose dates fall within [from_day, to_day], both inclusive.
+    """
+    lo = int(np.searchsorted(dates, np.datetime64(from_day, 'D'), side='left'))
+    hi = int(np.searchsorted(dates, np.datetime64(to_day, 'D'), side='right'))
+    return slice(lo, max(lo, hi))
+
+
+class SymbolPrices:
+    """
+    Daily bars of a single stock symbol held as sorted NumPy columns.
+    `dates` is a datetime64[D] array sorted ascending, every other column is aligned with it.
+    """
+
+    def __init__(self, symbol: str, dates: np.ndarray, open: np.ndarray, high: np.ndarray, low: np.ndarray,
+                 close: np.ndarray, adj_close: np.ndarray, volume: np.ndarray):
+        order = np.argsort(dates, kind='stable')
+        self.symbol = symbol
+        self.dates = np.asarray(dates, dtype='datetime64[D]')[order]
+        self.open = np.asarray(open, dtype=np.float64)[order]
+        self.high = np.asarray(high, dtype=np.float64)[order]
+        self.low = np.asarray(low, dtype=np.float64)[order]
+        self.close = np.asarray(close, dtype=np.float64)[order]
+        self.adj_close = np.asarray(adj_close, dtype=np.float64)[order]
+        self.volume = np.asarray(volume, dtype=np.int64)[order]
+        # Tick price is the average of open and close, see `get_market_data_tick`
+        self.avg_price = (self.open + self.close) / 2
+
+    def __len__(self) -> int:
+        return len(self.dates)
+
+    def asof_index(self, day: date, strict: bool = False) -> Optional[int]:
+        """
+        Return the row index of the most recent bar at or before `day`, so weekends and holidays resolve to the
+        previous trading day. With `strict`, only a bar on `day` itself is accepted.
+        Returns None when there is no such bar.
+        """
+        key = np.datetime64(day, 'D')
+        i = int(np.searchsorted(self.dates, key, side='right')) - 1
+        if i < 0 or (strict and self.dates[i] != key):
+            return None
+        return i
+
+    def index_of(self, day: date) -> Optional[int]:
+        """
+        Return the row index of the bar for `day`, or None if the symbol did not trade on that day.
+        """
+        return self.asof_index(day, strict=True)
+
+    def range_slice(self, from_day: date, to_day: date) -> slice:
+        return date_range_slice(self.dates, from_day, to_day)
+
+    def to_datetimes(self, rows: slice) -> List[datetime]:
+        """
+        Convert the dates of the given rows to datetimes at midnight.
+        """
+        return [datetime.combine(day, datetime.min.time()) for day in self.dates[rows].astype(object)]
+
+
+class AlignedPrices(NamedTuple):
+    """
+    One price column of several symbols on their union trading calendar.
+    `values` has shape (len(dates), len(symbols)) and is NaN where a symbol has no bar, see `has_bar`.
+    """
+    symbols: List[str]
+    dates: np.ndarray
+    values: np.ndarray
+    has_bar: np.ndarray
+
+    def window(self, from_day: date, to_day: date) -> slice:
+        return date_range_slice(self.dates, from_day, to_day)
+
+
+class AlignedBars(NamedTuple):
+    """
+    OHLC and average price columns of several symbols on their union trading calendar, each of shape
+    (len(dates), len(symbols)) and NaN where a symbol has no bar. `last_bar[d, s]` is the row of symbol s's most
+    recent bar at or before date d, -1 before its first bar.
+    """
+    symbols: List[str]
+    dates: np.ndarray
+    open: np.ndarray
+    high: np.ndarray
+    low: np.ndarray
+    close: np.ndarray
+    avg_price: np.ndarray
+    has_bar: np.ndarray
+    last_bar: np.ndarray
+
+    def window(self, from_day: date, to_day: date) -> slice:
+        return date_range_slice(self.dates, from_day, to_day)
+
+    def bar_rows(self, rows: slice, forward_fill: bool) -> np.ndarray:
+        """
+        Row of the bar shown for every date of `rows` and every symbol, -1 where there is none. Without
+        `forward_fill` only a symbol's bar of that very date is shown.
+        """
+        if forward_fill:
+            return self.last_bar[rows]
+        return np.where(self.has_bar[rows], np.arange(rows.start, rows.stop)[:, None], -1)
+
+    def take(self, column: str, bar_rows: np.ndarray) -> np.ndarray:
+        """
+        Values of `column` at `bar_rows` (as returned by `bar_rows`, any shape ending in the symbols), NaN at -1.
+        """
+        values = getattr(self, column)[np.maximum(bar_rows, 0), np.arange(len(self.symbols))]
+        return np.where(bar_rows >= 0, values, np.nan)
+
+
+def forward_fill(values: np.ndarray) -> np.ndarray:
+    """
+    Replace NaNs of a 2-d array with the last non-NaN value above them, leading NaNs are kept.
+    """
+    rows = np.where(np.isnan(values), 0, np.arange(values.shape[0])[:, None])
+    np.maximum.accumulate(rows, axis=0, out=rows)
+    return values[rows, np.arange(values.shape[1])]
+
+
+class PriceStore:
+    """
+    Process-wide registry of `SymbolPrices`, built once at startup and read by the market endpoints.
+    """
+
+    def __init__(self):
+        self._symbols: Dict[str, SymbolPrices] = {}
+        self._aligned: Dict[Tuple[Tuple[str, ...], str], AlignedPrices] = {}
+        self._aligned_bars: Dict[Tuple[str, ...], AlignedBars] = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, symbol: str) -> bool:
+        return symbol in self._symbols
+
+    @property
+    def is_loaded(self) -> bool:
+        return bool(self._symbols)
+
+    def symbols(self) -> List[str]:
+        return sorted(self._symbols)
+
+    def get(self, symbol: str) -> Optional[SymbolPrices]:
+        return self._symbols.get(symbol)
+
+    def put(self, prices: SymbolPrices):
+        with self._lock:
+            self._symbols[prices.symbol] = prices
+            self._aligned.clear()
+            self._aligned_bars.clear()
+
+    def aligned(self, symbols: Sequence[str], column: str = 'avg_price') -> AlignedPrices:
+        """
+        Return `column` of the given symbols on their union trading calendar. Cached until the store changes.
+        """
+        key = (tuple(symbols), column)
+        aligned = self._aligned.get(key)
+        if aligned is None:
+            series = [self._symbols[symbol] for symbol in symbols]
+            dates = np.unique(np.concatenate([prices.dates for prices in series])) if series else np.array([], dtype='datetime64[D]')
+            values = np.full((len(dates), len(series)), np.nan)
+            for j, prices in enumerate(series):
+                values[np.searchsorted(dates, prices.dates), j] = getattr(prices, column)
+            aligned = AlignedPrices(list(symbols), dates, values, ~np.isnan(values))
+            self._aligned[key] = aligned
+        return aligned
+
+    def aligned_bars(self, symbols: Sequence[str]) -> AlignedBars:
+        """
+        Every bar column of the given symbols on their union trading calendar. Cached until the store changes.
+        """
+        key = tuple(symbols)
+        bars = self._aligned_bars.get(key)
+        if bars is None:
+            columns = [self.aligned(symbols, column) for column in BAR_COLUMNS]
+            dates, has_bar = columns[0].dates, columns[0].has_bar
+            last_bar = np.maximum.accumulate(np.where(has_bar, np.arange(len(dates))[:, None], -1), axis=0)
+            bars = AlignedBars(list(symbols), dates, *(column.values for column in columns), has_bar, last_bar)
+            self._aligned_bars[key] = bars
+        return bars
+
+    def load_from_csv(self, data_dir: str = DATA_DIR):
+        """
+        Load every `<SYMBOL>.csv` file of the data folder.
+        """
+        for file_path in sorted(glob.glob(os.path.join(data_dir, '*.csv'))):
+            stock_symbol = os.path.splitext(os.path.basename(file_path))[0]
+            self.put(read_symbol_csv(file_path, stock_symbol))
+
+    def load_from_db(self, db: Session, symbols: Optional[Sequence[str]] = None):
+        """
+        Load all rows of StockDataDB, or only those of `symbols`, one column query for all symbols.
+        """
+        query = db.query(StockDataDB.stock_symbol, StockDataDB.date, StockDataDB.open, StockDataDB.high,
+                         StockDataDB.low, StockDataDB.close, StockDataDB.adj_close, StockDataDB.volume)
+        if symbols is not None:
+            query = query.filter(StockDataDB.stock_symbol.in_(symbols))
+        rows = query.all()
+        by_symbol: Dict[str, list] = {}
+        for row in rows:
+            by_symbol.setdefault(row[0], []).append(row[1:])
+        for stock_symbol, symbol_rows in by_symbol.items():
+            columns = list(zip(*symbol_rows))
+            self.put(SymbolPrices(stock_symbol, np.array(columns[0], dtype='datetime64[D]'), *columns[1:]))
+
+
+def read_symbol_csv(file_path: str, stock_symbol: str) -> SymbolPrices:
+    """
+    Parse a Yahoo-style OHLCV csv file (Date,Open,High,Low,Close,Adj Close,Volume) into `SymbolPrices`.
+    """
+    with open(file_path, mode='r') as file:
+        rows = list(csv.DictReader(file))
+    return SymbolPrices(
+        stock_symbol,
+        np.array([row['Date'] for row in rows], dtype='datetime64[D]'),
+        np.array([row['Open'] for row in rows], dtype=np.float64),
+        np.array([row['High'] for row in rows], dtype=np.float64),
+        np.array([row['Low'] for row in rows], dtype=np.float64),
+        np.array([row['Close'] for row in rows], dtype=np.float64),
+        np.array([row['Adj Close'] for row in rows], dtype=np.float64),
+        np.array([row['Volume'] for row in rows], dtype=np.int64),
+    )
+
+
+price_store = PriceStore()
+
+
+def load_price_store(db: Optional[Session] = None, data_dir: str = DATA_DIR) -> PriceStore:
+    """
+    Build the process-wide price store from the csv data folder, falling back to StockDataDB when
+    the folder has no csv files.
+    """
+    if glob.glob(os.path.join(data_dir, '*.csv')):
+        price_store.load_from_csv(data_dir)
+    elif db is not None:
+        price_store.load_from_db(db)
+    return price_store
+
+
+def get_price_store() -> PriceStore:
+    """
+    Return the process-wide price store, loading it on first use if startup did not.
+    """
+    if not price_store.is_loaded:
+        load_price_store()
+    return price_store
@@ -0,0 +1,75 @@
+"""
+Process-wide Redis clients.
+
+Every module goes through `get_redis` (sync code: dependencies and handlers on the worker threadpool,
+background threads) or `get_async_redis` (async handlers), instead of creating its own client. The sync
+client shares one `ConnectionPool` bounded by REDIS_MAX_CONNECTIONS. asyncio connections belong to the
+event loop they were opened on, so there is one async client, with its own pool, per running loop. Both count their round trips into the request metrics.
+"""
+import asyncio
+import os
+import threading
+import weakref
+from typing import Optional
+
+import redis
+import redis.asyncio
+
+from assessment_app.models.constants import DEFAULT_REDIS_MAX_CONNECTIONS, REDIS_HOST, REDIS_MAX_CONNECTIONS, REDIS_PORT
+from assessment_app.utils.instrumentation import instrument_redis
+
+_client: Optional[redis.Redis] = None
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, redis.asyncio.Redis]" = weakref.WeakKeyDictionary()
+_lock = threading.Lock()
+
+
+def connection_kwargs() -> dict:
+    return {
+        'host': os.environ.get(REDIS_HOST) or 'localhost',
+        'port': int(os.environ.get(REDIS_PORT) or 6379),
+        'db': 0,
+        'max_connections': int(os.environ.get(REDIS_MAX_CONNECTIONS, DEFAULT_REDIS_MAX_CONNECTIONS)),
+    }
+
+
+def _create_client() -> redis.Redis:
+    return redis.Redis(connection_pool=redis.ConnectionPool(**connection_kwargs()))
+
+
+def _create_async_client() -> redis.asyncio.Redis:
+    return redis.asyncio.Redis(connection_pool=redis.asyncio.ConnectionPool(**connection_kwargs()))
+
+
+def get_redis() -> redis.Redis:
+    """
+    The shared sync client, created on first use.
+    """
+    global _client
+    if _client is None:
+        with _lock:
+            if _client is None:
+                _client = instrument_redis(_create_client())
+    return _client
+
+
+def get_async_redis() -> redis.asyncio.Redis:
+    """
+    The async client of the running event loop, created on first use.
+    """
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = instrument_redis(_create_async_client())
+    return client
+
+
+def reset_clients():
+    """
+    Forget the clients so the next call creates new ones, e.g. after the connection settings changed.
+    """
+    global _client
+    with _lock:
+        if _client is not None:
+            _client.connection_pool.disconnect()
+        _client = None
+        _async_clients.clear()
@@ -1,10 +1,18 @@
+import math
 from datetime import datetime
+from typing import Optional
 
-from fastapi import Depends, APIRouter
+from fastapi import Depends, APIRouter, HTTPException
+from sqlalchemy.orm import Session
 
-from assessment_app.models.constants import StockSymbols
+from assessment_app.models.constants import IndicatorType, StockSymbols
+from assessment_app.models.models import IndicatorData, IndicatorResponse, ReturnsMatrixRequest, ReturnsMatrixResponse
+from assessment_app.repository.database import HoldingDB, PortfolioDB, get_db
+from assessment_app.service import portfolio_service
 from assessment_app.service.auth_service import get_current_user
-from assessment_app.utils.utils import compute_cagr, datetime_to_str
+from assessment_app.service.indicators import indicator_cache
+from assessment_app.service.returns_index import cagr_matrix, cagr_rows, get_returns_index
+from assessment_app.utils.utils import compute_cagr
 
 router = APIRouter()
 
@@ -18,17 +26,97 @@ async def get_stock_analysis(stock_symbol: str, start_ts: datetime, end_ts: date
         200% CAGR would mean your returned value would be 200 for the duration
         5% CAGR would mean your returned value would be 5 for the duration
     """
-    pass
+    # 1. Look up the precomputed returns index of the symbol
+    index = get_returns_index(stock_symbol)
+    if index is None:
+        raise HTTPException(status_code=404, detail=f"No market data for {stock_symbol}")
+
+    # 2. CAGR between the as-of prices at the two timestamps, in constant time
+    try:
+        cagr = index.cagr(start_ts, end_ts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if cagr is None:
+        raise HTTPException(status_code=404, detail=f"No market data for {stock_symbol} at {start_ts}")
+    return cagr
 
 
 @router.get("/analysis/estimate_returns/portfolio")
-async def estimate_portfolio_returns(start_ts: datetime, end_ts: datetime, current_user_id: str = Depends(get_current_user)):
+def estimate_portfolio_returns(start_ts: datetime, end_ts: datetime, current_user_id: str = Depends(get_current_user),
+                               db: Session = Depends(get_db)):
     """
     Estimate returns for the current portfolio based on stock prices between the given timestamps.
     Use compute_cagr method.
     Example:
         100% CAGR would mean your returned value would be 2.0 for the duration
         5% CAGR would mean your returned value would be 1.05 for the duration
+    A portfolio without holdings has no returns: 1.0.
+    """
+    if end_ts <= start_ts:
+        raise HTTPException(status_code=400, detail="end_ts must be after start_ts")
+
+    # 1. Fetch the current user's portfolio and its holdings
+    portfolio = db.query(PortfolioDB).filter(PortfolioDB.user_id == current_user_id).first()
+    if portfolio is None:
+        raise HTTPException(status_code=404, detail="Portfolio not found")
+    holdings = db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio.id).all()
+    if not any(holding.quantity for holding in holdings):
+        return 1.0
+
+    # 2. Value the holdings at both timestamps, holdings without a price are kept at their purchase price
+    beginning_value = portfolio_service.holdings_value(holdings, start_ts)
+    ending_value = portfolio_service.holdings_value(holdings, end_ts)
+
+    # 3. Growth factor per year
+    try:
+        cagr = compute_cagr(beginning_value, ending_value, start_ts, end_ts)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return 1 + cagr / 100
+
+
+@router.post("/analysis/estimate_returns/matrix", response_model=ReturnsMatrixResponse)
+async def estimate_returns_matrix(request: ReturnsMatrixRequest,
+                                  current_user_id: str = Depends(get_current_user)) -> ReturnsMatrixResponse:
+    """
+    CAGR of many symbols over many windows in one call, for screening. Defaults to every stock symbol.
+    """
+    symbols = [symbol.value for symbol in (request.symbols or StockSymbols)]
+    try:
+        matrix = cagr_matrix(symbols, [(window.start_ts, window.end_ts) for window in request.windows])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ReturnsMatrixResponse(symbols=symbols, windows=request.windows, cagr=cagr_rows(matrix))
+
+
+@router.get("/analysis/indicators/{indicator}", response_model=IndicatorResponse)
+async def get_indicator(indicator: IndicatorType, stock_symbol: str, window: Optional[int] = None,
+                        from_ts: Optional[datetime] = None, to_ts: Optional[datetime] = None,
+                        current_user_id: str = Depends(get_current_user)) -> IndicatorResponse:
+    """
+    Rolling indicator of the stock's average price for every trading day between the optional timestamps.
+    Values are null while the window is warming up. max_drawdown covers the whole history and takes no window.
     """
+    # 1. Fetch the cached indicator series, computed over the full history once
+    try:
+        series = indicator_cache.snapshot(stock_symbol, indicator, window)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"No market data for {stock_symbol}")
 
-    pass
+    # 2. Slice the requested range
+    prices = series.prices
+    rows = slice(0, len(prices))
+    if len(prices) and (from_ts or to_ts):
+        rows = prices.range_slice(from_ts.date() if from_ts else prices.dates[0], to_ts.date() if to_ts else prices.dates[-1])
+    values = series.values[rows].tolist()
+    return IndicatorResponse(
+        stock_symbol=stock_symbol,
+        indicator=indicator,
+        window=series.window,
+        data=[
+            IndicatorData(timestamp=ts, value=None if math.isnan(value) else value)
+            for ts, value in zip(prices.to_datetimes(rows), values)
+        ]
+    )
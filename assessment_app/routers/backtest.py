@@ -1,41 +1,115 @@
-from fastapi import Depends, APIRouter
+from datetime import datetime
+
+from fastapi import Depends, APIRouter, HTTPException
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from assessment_app.models.constants import StockSymbols
+from assessment_app.models.models import BacktestRequest, BacktestResponse, BacktestSweepRequest, BacktestSweepResponse, BacktestSweepResult
+from assessment_app.repository.database import HoldingDB, PortfolioDB, get_db
+from assessment_app.repository.price_store import get_price_store
+from assessment_app.routers.strategy import validationCheck
 from assessment_app.service.auth_service import get_current_user
+from assessment_app.service.backtest_service import run_backtest
+from assessment_app.service.sweep_service import run_sweep
 
 router = APIRouter()
 
-# @router.post("/backtest", response_model=BacktestResponse)
-# async def backtest_strategy(request: BacktestRequest):
-#     """
-#     Backtest a trading strategy over a specified period.
-#
-#     Parameters:
-#     - request: BacktestRequest
-#         - strategy_id: str
-#             The ID of the strategy to backtest.
-#         - portfolio_id: str
-#             The ID of the portfolio to apply the strategy to.
-#         - start_date: datetime
-#             The start date for the backtest.
-#         - end_date: datetime
-#             The end date for the backtest.
-#         - initial_capital: float
-#             The initial capital to start the backtest with.
-#
-#     Returns:
-#     - BacktestResponse
-#         - start_date: datetime
-#             The start date of the backtest.
-#         - end_date: datetime
-#             The end date of the backtest.
-#         - initial_capital: float
-#             The initial capital used for the backtest.
-#         - final_capital: float
-#             The final capital after the backtest.
-#         - trades: List[Trade]
-#             A list of trades executed during the backtest.
-#         - profit_loss: float
-#             The total profit or loss over the backtest period.
-#         - annualized_return: float
-#             The annualized return of the strategy over the backtest period.
-#     """
-#     pass
\ No newline at end of file
+@router.post("/backtest", response_model=BacktestResponse)
+def backtest_strategy(request: BacktestRequest,
+                      current_user_id: str = Depends(get_current_user),
+                      db: Session = Depends(get_db)) -> BacktestResponse:
+    """
+    Backtest a trading strategy over a specified period.
+
+    Parameters:
+    - request: BacktestRequest
+        - strategy_id: str
+            The ID of the strategy to backtest.
+        - portfolio_id: str
+            The ID of the portfolio to apply the strategy to.
+        - start_date: datetime
+            The start date for the backtest.
+        - end_date: datetime
+            The end date for the backtest.
+        - initial_capital: float
+            The initial capital to start the backtest with.
+        - parameters: Dict[str, float]
+            Strategy parameters overriding the defaults of the strategy, e.g. {"fast": 5, "slow": 20}.
+
+    Returns:
+    - BacktestResponse
+        - start_date: datetime
+            The start date of the backtest.
+        - end_date: datetime
+            The end date of the backtest.
+        - initial_capital: float
+            The initial capital used for the backtest.
+        - final_capital: float
+            The final capital after the backtest.
+        - trades: List[Trade]
+            A list of trades executed during the backtest.
+        - profit_loss: float
+            The total profit or loss over the backtest period.
+        - annualized_return: float
+            The annualized return of the strategy over the backtest period.
+    """
+    # 1. Backtest on the symbols held by the portfolio, or on every symbol for an empty portfolio
+    portfolio = db.query(PortfolioDB).filter(PortfolioDB.id == request.portfolio_id).first()
+    validationCheck(portfolio, current_user_id)
+    held = {holding.symbol for holding in db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio.id).all()}
+    symbols = [symbol.value for symbol in StockSymbols if symbol.value in held] or [symbol.value for symbol in StockSymbols]
+
+    # 2. Run the vectorized engine over the whole date range
+    try:
+        result = run_backtest(get_price_store(), request.strategy_id, symbols, request.start_date, request.end_date,
+                              request.initial_capital, request.parameters)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return BacktestResponse(
+        start_date=request.start_date,
+        end_date=request.end_date,
+        initial_capital=request.initial_capital,
+        final_capital=result.final_capital,
+        trades=result.trades(),
+        profit_loss=result.profit_loss,
+        annualized_return=result.annualized_return
+    )
+
+
+@router.post("/backtest/sweep", response_model=BacktestSweepResponse)
+async def backtest_parameter_sweep(request: BacktestSweepRequest,
+                                   current_user_id: str = Depends(get_current_user)) -> BacktestSweepResponse:
+    """
+    Backtest a strategy for every combination of `parameter_grid` on every date window, in parallel on the sweep
+    process pool. Every combination is validated before any backtest runs; a sweep is limited to SWEEP_MAX_TASKS backtests.
+    Symbols default to all StockSymbols and windows to the full price history.
+    Results are ranked best first by `rank_by` (annualized_return or profit_loss), truncated to `top_n` if given.
+    """
+    # 1. Resolve the universe and the windows
+    store = get_price_store()
+    symbols = [symbol.value for symbol in (request.symbols or list(StockSymbols))]
+    if request.windows:
+        windows = [(window.start_date, window.end_date) for window in request.windows]
+    else:
+        dates = store.aligned(symbols).dates.astype(object)
+        windows = [(datetime.combine(dates[0], datetime.min.time()), datetime.combine(dates[-1], datetime.min.time()))]
+
+    # 2. Fan the grid out over the process pool, off the event loop
+    try:
+        results = await run_in_threadpool(run_sweep, store, request.strategy_id, request.parameter_grid, symbols, windows,
+                                          request.initial_capital, request.rank_by)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=e.args[0])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return BacktestSweepResponse(
+        strategy_id=request.strategy_id,
+        symbols=symbols,
+        rank_by=request.rank_by,
+        results=[BacktestSweepResult(**result._asdict()) for result in results[:request.top_n]]
+    )
@@ -1,106 +1,249 @@
-import csv
-from datetime import datetime
-from tarfile import NUL
-from typing import List, Optional
 import os
+from datetime import datetime
+from typing import Dict, List, Optional
 import uuid
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import Uuid, and_
-from assessment_app.models.constants import TradeType
-from assessment_app.models.models import TickData, TickDataResponse, Trade
-from assessment_app.repository.database import HoldingDB, PortfolioDB, StockDataDB, get_db
+import numpy as np
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from assessment_app.models.constants import (DEFAULT_MARKET_DATA_MAX_AGE_SECONDS, MARKET_DATA_MAX_AGE_SECONDS, RangeFormat,
+                                             StockSymbols, TradeStatus, TradeType)
+from assessment_app.models.models import (MarketSnapshot, MarketSnapshotRange, SnapshotBar, TickData, TickDataResponse, Trade,
+                                          TradeBatchRequest, TradeBatchResponse, TradeResult)
+from assessment_app.repository.database import HoldingDB, PortfolioDB, get_db
+from assessment_app.repository.price_store import AlignedBars, SymbolPrices, get_price_store
+from assessment_app.routers.strategy import validationCheck
+from assessment_app.service import portfolio_service
 from assessment_app.service.auth_service import get_current_user
+from assessment_app.service.order_book import order_books
+from assessment_app.service.market_data_formats import (MEDIA_TYPES, NDJSON_CHUNK_ROWS, arrow_ipc, columnar_json, ndjson_lines,
+                                                        negotiate_format, npy_bytes)
+from assessment_app.service.response_cache import CachedResponse, etag_matches, etag_of, response_cache
+from assessment_app.service.trade_ledger import trade_ledger
+from assessment_app.utils.utils import to_naive_utc
 from sqlalchemy.orm import Session
 
 router = APIRouter()
+MARKET_DATA_CACHE_CONTROL = f"private, max-age={int(os.environ.get(MARKET_DATA_MAX_AGE_SECONDS, DEFAULT_MARKET_DATA_MAX_AGE_SECONDS))}"
 
 
-@router.post("/market/data/tick", response_model=TickData)
+# GET lets HTTP caches and browsers revalidate; POST is kept for existing clients
+@router.api_route("/market/data/tick", methods=["GET", "POST"], response_model=TickData)
 async def get_market_data_tick(stock_symbol: str, 
                                current_ts: datetime, 
-                               current_user_id: str = Depends(get_current_user), 
-                               db: Session = Depends(get_db)) -> TickData:
+                               strict: bool = False, 
+                               if_none_match: Optional[str] = Header(None),
+                               current_user_id: str = Depends(get_current_user)) -> TickData:
     """
     Get data for stocks for a given datetime from `data` folder.
     Please note consider price value in TickData to be average of open and close price column value for the timestamp from the data file.
+    On days without a bar (weekends, holidays) the most recent previous bar is used, unless `strict` is set.
+    The answer carries a strong ETag and is 304 Not Modified for a matching If-None-Match.
     """
-    file_path = os.path.join(os.getcwd(), 'assessment_app', 'data', f'{stock_symbol}.csv')
-    insert_stock_data_from_csv(db, file_path, stock_symbol)
-    tick_data = get_stock_data_from_db(db, stock_symbol, current_ts)
+    prices = get_symbol_prices(stock_symbol)
+    i = prices.asof_index(current_ts.date(), strict)
     
-    if tick_data is None:
-        raise HTTPException(status_code=404, detail="Datrountersa for the given timestamp not found")
+    if i is None:
+        raise HTTPException(status_code=404, detail="Data for the given timestamp not found")
 
-    return tick_data
+    # The body echoes current_ts, so it is not cached server side: a key per timestamp would never repeat
+    body = TickData(stock_symbol=stock_symbol, timestamp=current_ts, price=float(prices.avg_price[i])).model_dump_json().encode()
+    return cached_response(CachedResponse(body, "application/json", etag_of(body)), if_none_match)
 
 
 
-@router.post("/market/data/range", response_model=TickDataResponse)
+@router.api_route("/market/data/range", methods=["GET", "POST"], response_model=TickDataResponse)
 async def get_market_data_range(stock_symbol: str, 
                                 from_ts: datetime, 
                                 to_ts: datetime, 
-                                current_user_id: str = Depends(get_current_user), 
-                                db: Session = Depends(get_db)) -> TickDataResponse:
+                                response_format: Optional[RangeFormat] = Query(None, alias="format"), 
+                                accept: Optional[str] = Header(None), 
+                                if_none_match: Optional[str] = Header(None),
+                                current_user_id: str = Depends(get_current_user)):
     """
     Get data for stocks for a given datetime from `data` folder.
     Please note consider price value in TickData to be average of open and close price column value for the timestamp from the data file.
     [UPDATE] - Updating response as List of TickData
+    The response format is chosen by the `format` query parameter, or else by the Accept header:
+    - json (default): TickDataResponse
+    - ndjson (application/x-ndjson): one TickData per line, streamed
+    - columnar: {"stock_symbol": ..., "timestamps": [...], "prices": [...]}
+    - arrow (application/vnd.apache.arrow.stream): Arrow IPC stream, needs pyarrow installed
+    - npy (application/x-npy): NumPy structured array with timestamp and price fields
+    Answers are cached server side by (symbol, rows of the range, format) and carry a strong ETag, they are
+    304 Not Modified for a matching If-None-Match. NDJSON over more than one chunk of rows is streamed uncached.
     """
-    # 1. Insert csv data into postgres DB for once
-    file_path = os.path.join(os.getcwd(), 'assessment_app', 'data', f'{stock_symbol}.csv')
-    insert_stock_data_from_csv(db, file_path, stock_symbol)
-
-    # 2. Query for all the stock data
-    stock_data = db.query(StockDataDB).filter(
-        StockDataDB.stock_symbol == stock_symbol,
-        and_(StockDataDB.date >= from_ts.date(), StockDataDB.date <= to_ts.date())
-    ).all()
+    # 1. Slice the in-memory price columns for the range
+    prices = get_symbol_prices(stock_symbol)
+    rows = prices.range_slice(from_ts.date(), to_ts.date())
     
-    if not stock_data:
+    if rows.start == rows.stop:
         raise HTTPException(status_code=404, detail="No data found for the specified range.")
 
-    # 3. Prepare the list of TickData
-    tick_data_list = [
-        TickData(
-            stock_symbol=stock_symbol,
-            timestamp=datetime.combine(data.date, datetime.min.time()),  # Set time to midnight
-            price=(data.open + data.close) / 2
-        )
-        for data in stock_data
-    ]
-    
-    return TickDataResponse(data=tick_data_list)
+    # 2. Serve the cached answer of these rows in this format
+    response_format = negotiate_format(response_format, accept)
+    key = (stock_symbol, rows.start, rows.stop, response_format)
+    cached = response_cache.get(key, prices)
+    if cached is not None:
+        return cached_response(cached, if_none_match)
+
+    # 3. Serialize the columns directly for the non-default formats
+    dates, avg_prices = prices.dates[rows], prices.avg_price[rows]
+    media_type = MEDIA_TYPES[response_format]
+    if response_format == RangeFormat.NDJSON:
+        if len(dates) > NDJSON_CHUNK_ROWS:
+            return StreamingResponse(ndjson_lines(stock_symbol, dates, avg_prices), media_type=media_type)
+        body = b"".join(ndjson_lines(stock_symbol, dates, avg_prices))
+    elif response_format == RangeFormat.COLUMNAR:
+        body = columnar_json(stock_symbol, dates, avg_prices)
+    elif response_format == RangeFormat.NPY:
+        body = npy_bytes(stock_symbol, dates, avg_prices)
+    elif response_format == RangeFormat.ARROW:
+        try:
+            body = arrow_ipc(stock_symbol, dates, avg_prices)
+        except RuntimeError as e:
+            raise HTTPException(status_code=406, detail=str(e))
+    else:
+        # 4. Prepare the list of TickData
+        tick_data_list = [
+            TickData(
+                stock_symbol=stock_symbol,
+                timestamp=timestamp,
+                price=price
+            )
+            for timestamp, price in zip(prices.to_datetimes(rows), avg_prices.tolist())
+        ]
+        body = TickDataResponse(data=tick_data_list).model_dump_json().encode()
+
+    return cached_response(response_cache.put(key, prices, body, media_type), if_none_match)
+
+
+@router.get("/market/data/snapshot", response_model=MarketSnapshot)
+async def get_market_snapshot(current_ts: datetime,
+                              symbols: Optional[List[StockSymbols]] = Query(None),
+                              forward_fill: bool = True,
+                              current_user_id: str = Depends(get_current_user)) -> MarketSnapshot:
+    """
+    OHLC and average price of every symbol (or of `symbols`) at `current_ts`, read in one slice of the
+    symbols' date-aligned bars. With `forward_fill` (default) a symbol without a bar on that day, e.g. a
+    holiday of its own calendar, shows its most recent previous bar, as /market/data/tick does; without it,
+    it shows no bar. Before the first bar of every symbol there is no snapshot.
+    """
+    # 1. Row of the snapshot's day on the union calendar of the symbols
+    bars = get_aligned_bars(symbols)
+    day = np.datetime64(current_ts.date(), 'D')
+    i = int(np.searchsorted(bars.dates, day, side='right')) - 1
+    if i < 0:
+        raise HTTPException(status_code=404, detail="Data for the given timestamp not found")
+
+    # 2. Bar shown for every symbol on that row
+    if not forward_fill and bars.dates[i] != day:
+        rows = np.full(len(bars.symbols), -1)
+    else:
+        rows = bars.bar_rows(slice(i, i + 1), forward_fill)[0]
+    columns = {column: to_optional(bars.take(column, rows)) for column in ('open', 'high', 'low', 'close', 'avg_price')}
+    timestamps = bars.dates[np.maximum(rows, 0)].astype('datetime64[s]').astype(object).tolist()
+
+    return MarketSnapshot(
+        current_ts=current_ts,
+        forward_fill=forward_fill,
+        bars=[
+            SnapshotBar(
+                stock_symbol=symbol,
+                timestamp=timestamps[j] if rows[j] >= 0 else None,
+                open=columns['open'][j],
+                high=columns['high'][j],
+                low=columns['low'][j],
+                close=columns['close'][j],
+                price=columns['avg_price'][j]
+            )
+            for j, symbol in enumerate(bars.symbols)
+        ]
+    )
+
+
+@router.get("/market/data/snapshot/range", response_model=MarketSnapshotRange)
+async def get_market_snapshot_range(from_ts: datetime,
+                                    to_ts: datetime,
+                                    symbols: Optional[List[StockSymbols]] = Query(None),
+                                    forward_fill: bool = True,
+                                    current_user_id: str = Depends(get_current_user)) -> MarketSnapshotRange:
+    """
+    The snapshots of every trading day of any of the symbols within [from_ts, to_ts], as date x symbol columns.
+    """
+    # 1. Window of the union calendar
+    bars = get_aligned_bars(symbols)
+    window = bars.window(from_ts.date(), to_ts.date())
+    if window.start == window.stop:
+        raise HTTPException(status_code=404, detail="No data found for the specified range.")
+
+    # 2. Bars shown for every date and symbol of the window
+    rows = bars.bar_rows(window, forward_fill)
+    return MarketSnapshotRange(
+        symbols=bars.symbols,
+        timestamps=bars.dates[window].astype('datetime64[s]').astype(object).tolist(),
+        forward_fill=forward_fill,
+        open=to_optional(bars.take('open', rows)),
+        high=to_optional(bars.take('high', rows)),
+        low=to_optional(bars.take('low', rows)),
+        close=to_optional(bars.take('close', rows)),
+        price=to_optional(bars.take('avg_price', rows))
+    )
+
+
+def get_aligned_bars(symbols: Optional[List[StockSymbols]]) -> AlignedBars:
+    """
+    Aligned bars of the requested symbols, by default of every StockSymbols member the store holds.
+    """
+    store = get_price_store()
+    if symbols:
+        names = list(dict.fromkeys(symbol.value for symbol in symbols))
+        for name in names:
+            get_symbol_prices(name)
+    else:
+        names = [symbol.value for symbol in StockSymbols if symbol.value in store]
+    return store.aligned_bars(names)
+
+
+def to_optional(values: np.ndarray) -> list:
+    """
+    Nested lists of the values with None for NaN.
+    """
+    return np.where(np.isnan(values), None, values).tolist()
+
+
+def cached_response(cached: CachedResponse, if_none_match: Optional[str]) -> Response:
+    """
+    The cached body, or 304 Not Modified when the client already holds it.
+    The body depends on the Accept header through format negotiation, hence the Vary.
+    """
+    headers = {"ETag": cached.etag, "Cache-Control": MARKET_DATA_CACHE_CONTROL, "Vary": "Accept"}
+    if etag_matches(if_none_match, cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(cached.body, media_type=cached.media_type, headers=headers)
 
 
 @router.post("/market/trade", response_model=Trade)
-async def trade_stock(trade: Trade, 
-                      current_user_id: str = Depends(get_current_user), 
-                      db: Session = Depends(get_db)) -> Trade:
+def trade_stock(trade: Trade, 
+                strict: bool = False, 
+                current_user_id: str = Depends(get_current_user), 
+                db: Session = Depends(get_db)) -> Trade:
     """
     Only if trade.price is within Open and Close price of that stock on the execution timestamp, then trade should be successful.
     Trade.price must be average of Open and Close price of that stock on the execution timestamp.
     Also, update the portfolio and trade history with the trade details and adjust cash and networth appropriately.
     On every trade, current_ts of portfolio also becomes today.
     One cannot place trade in date (Trade.execution_ts) older than portfolio.current_ts
+    On days without a bar the most recent previous bar is used, unless `strict` is set.
+    While the portfolio has open orders, trades after its current day are rejected: match the orders up to that
+    day first with /market/orders/match, so they see every bar.
     """
-    # 1. Insert csv data into postgres DB for once
-    file_path = os.path.join(os.getcwd(), 'assessment_app', 'data', f'{trade.symbol}.csv')
-    insert_stock_data_from_csv(db, file_path, trade.symbol)
-
-    # 2. Fetch stock data
-    stock_data = db.query(StockDataDB).filter(
-        StockDataDB.stock_symbol == trade.symbol,
-        StockDataDB.date == trade.execution_ts.date()
-    ).first()
-    if not stock_data:
-        raise HTTPException(status_code=404, detail="Stock data not found for the specified date.")
+    # 1. Validate the trade price against the in-memory price store
+    check_trade_price(trade, strict)
+    check_ledger_capacity()
     
-    # 3. Validate the trade price
-    if not (stock_data.open <= trade.price <= stock_data.close or stock_data.open >= trade.price >= stock_data.close) :
-        raise HTTPException(status_code=400, detail="Trade price must be within the open and close price range.")
-    
-    # 4. Fetch and update the portfolio
+    # 2. Fetch and update the portfolio
     portfolio = get_portfolio(db, current_user_id)
+    check_clock_can_advance(portfolio, trade)
     holding = get_holding(db, trade.symbol, portfolio.id)
 
     update_portfolio(db, portfolio, trade, holding)
@@ -113,93 +256,154 @@ async def trade_stock(trade: Trade,
         symbol=trade.symbol
     )
 
-def insert_stock_data_from_csv(db: Session, file_path: str, stock_symbol: str):
-    with open(file_path, mode='r') as file:
-        csv_reader = csv.DictReader(file)
-        for row in csv_reader:
-            date = datetime.strptime(row['Date'], '%Y-%m-%d').date()
-            if stock_data_exists(db, stock_symbol, date):
-                print(f"Data for stock symbol '{stock_symbol}' on date '{date}' already exists in the database. Skipping the persistence in DB.")
-                break
-            stock_data = StockDataDB(
-                id=str(uuid.uuid4()),
-                stock_symbol=stock_symbol,
-                date=date,
-                open=float(row['Open']),
-                high=float(row['High']),
-                low=float(row['Low']),
-                close=float(row['Close']),
-                adj_close=float(row['Adj Close']),
-                volume=int(row['Volume'])
+def check_ledger_capacity():
+    """
+    503 before trading while the trade ledger is `max_pending` rows behind, the trades could not be recorded.
+    """
+    if trade_ledger.is_full():
+        raise HTTPException(status_code=503, detail="Trade ledger is backed up, retry shortly", headers={"Retry-After": "1"})
+
+def get_symbol_prices(stock_symbol: str) -> SymbolPrices:
+    prices = get_price_store().get(stock_symbol)
+    if prices is None:
+        raise HTTPException(status_code=404, detail=f"Unknown stock symbol '{stock_symbol}'.")
+    return prices
+
+@router.post("/market/trade/batch", response_model=TradeBatchResponse)
+def trade_stock_batch(batch: TradeBatchRequest, 
+                      strict: bool = False, 
+                      current_user_id: str = Depends(get_current_user), 
+                      db: Session = Depends(get_db)) -> TradeBatchResponse:
+    """
+    Execute many trades for one portfolio in a single transaction.
+    Every trade is validated like in /market/trade, then applied in execution_ts order under one row lock
+    of the portfolio and committed once. Trades that fail validation are rejected without affecting the others.
+    Results are returned in request order.
+    """
+    # 1. Validate all trade prices against the price store in one pass
+    check_ledger_capacity()
+    errors: Dict[int, str] = {}
+    for index, trade in enumerate(batch.trades):
+        try:
+            check_trade_price(trade, strict)
+        except HTTPException as e:
+            errors[index] = e.detail
+
+    # 2. Lock the portfolio and load its holdings once
+    portfolio = db.query(PortfolioDB).filter(PortfolioDB.id == batch.portfolio_id).with_for_update().first()
+    validationCheck(portfolio, current_user_id)
+    holdings = {holding.symbol: holding for holding in db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio.id).all()}
+
+    # 3. Apply the valid trades in execution order and commit once
+    for index in sorted(range(len(batch.trades)), key=lambda i: to_naive_utc(batch.trades[i].execution_ts)):
+        if index in errors:
+            continue
+        trade = batch.trades[index]
+        try:
+            check_clock_can_advance(portfolio, trade)
+            holdings[trade.symbol] = apply_trade(db, portfolio, trade, holdings.get(trade.symbol))
+        except HTTPException as e:
+            errors[index] = e.detail
+    db.commit()
+
+    # 4. Record the filled trades in the ledger, written behind the response
+    trade_ledger.record(portfolio.id, [trade for index, trade in enumerate(batch.trades) if index not in errors])
+
+    return TradeBatchResponse(
+        portfolio_id=portfolio.id,
+        cash_remaining=portfolio.cash_remaining,
+        current_ts=portfolio.current_ts,
+        results=[
+            TradeResult(
+                trade=trade,
+                status=TradeStatus.REJECTED if index in errors else TradeStatus.FILLED,
+                detail=errors.get(index)
             )
-            db.merge(stock_data)
-        db.commit()
+            for index, trade in enumerate(batch.trades)
+        ]
+    )
 
-def get_stock_data_from_db(db: Session, stock_symbol: str, current_ts: datetime) -> Optional[TickData]:
-    stock_data = db.query(StockDataDB).filter(StockDataDB.stock_symbol == stock_symbol, StockDataDB.date == current_ts.date()).first()
-    
-    if stock_data:
-        avg_price = (stock_data.open + stock_data.close) / 2
-        return TickData(
-            stock_symbol=stock_symbol,
-            timestamp=current_ts,
-            price=avg_price
-        )
-    return None
-
-def stock_data_exists(db: Session, stock_symbol: str, date: datetime.date) -> bool:
-    return db.query(StockDataDB).filter(
-        StockDataDB.stock_symbol == stock_symbol,
-        StockDataDB.date == date
-    ).first() is not None
+def check_trade_price(trade: Trade, strict: bool = False):
+    """
+    Trade price must be within the open and close price of the bar at the execution timestamp.
+    """
+    prices = get_symbol_prices(trade.symbol)
+    i = prices.asof_index(trade.execution_ts.date(), strict)
+    if i is None:
+        raise HTTPException(status_code=404, detail="Stock data not found for the specified date.")
+    open_price, close_price = prices.open[i], prices.close[i]
+    if not (open_price <= trade.price <= close_price or open_price >= trade.price >= close_price) :
+        raise HTTPException(status_code=400, detail="Trade price must be within the open and close price range.")
 
+def check_clock_can_advance(portfolio: PortfolioDB, trade: Trade):
+    """
+    A trade after the portfolio's current day moves its clock past bars that its open orders, matched only by
+    /market/orders/match from current_ts on, would never see.
+    """
+    if trade.execution_ts.date() > portfolio.current_ts.date() and order_books.symbols(portfolio.id):
+        raise HTTPException(status_code=400, detail="Portfolio has open orders, match them up to the trade's execution date first.")
 
 def get_portfolio(db: Session, user_id: str):
-    portfolio = db.query(PortfolioDB).filter(PortfolioDB.user_id == user_id).first()
+    portfolio = db.query(PortfolioDB).filter(PortfolioDB.user_id == user_id).with_for_update().first()
     if not portfolio:
         raise HTTPException(status_code=404, detail="Portfolio not found.")
     return portfolio
 
 def get_holding(db: Session, symbol: str, portfolio_id: str):
-    return db.query(HoldingDB).filter(HoldingDB.symbol == symbol, PortfolioDB.id == portfolio_id).first()
+    return db.query(HoldingDB).filter(HoldingDB.symbol == symbol, HoldingDB.portfolio_id == portfolio_id).first()
 
-def update_portfolio(db: Session, portfolio: PortfolioDB, trade: Trade, holding: HoldingDB):
+def apply_trade(db: Session, portfolio: PortfolioDB, trade: Trade, holding: Optional[HoldingDB]) -> HoldingDB:
     """
-    Update the portfolio based on the trade details.
+    Apply the trade to the portfolio and its holding in the session, without committing.
+    Everything is validated before anything is changed, so a rejected trade leaves the session untouched.
+    Returns the updated (or new) holding.
     """
+    # 1. Validate the trade against the portfolio
     if trade.execution_ts.date() < portfolio.current_ts.date():
         raise HTTPException(status_code=400, detail="Trade execution date cannot be older than portfolio current timestamp.")
-
-    # 1. Update the portfolio's current timestamp
-    portfolio.current_ts = datetime.now()
+    if trade.quantity <= 0:
+        raise HTTPException(status_code=400, detail="Trade quantity must be positive.")
+    if trade.type not in (TradeType.BUY, TradeType.SELL):
+        raise HTTPException(status_code=400, detail="Invalid trade type.")
 
     # 2. Calculate the total trade value
     total_trade_value = trade.quantity * trade.price
+    if trade.type == TradeType.BUY and total_trade_value > portfolio.cash_remaining:
+        raise HTTPException(status_code=400, detail="Insufficient cash for purchase.")
+    if trade.type == TradeType.SELL:
+        if not holding:
+            raise HTTPException(status_code=400, detail="Stock not found in portfolio.")
+        if holding.quantity < trade.quantity:
+            raise HTTPException(status_code=400, detail="Insufficient stock quantity for sale.")
 
-    # 3. Adjust the cash remaining in the portfolio
-    if trade.type == TradeType.BUY:
-        portfolio.cash_remaining -= total_trade_value
-    elif trade.type == TradeType.SELL:
-        portfolio.cash_remaining += total_trade_value
-    else:
-        raise HTTPException(status_code=400, detail="Invalid trade type.")
+    # 3. The portfolio's current timestamp moves to the trade's execution timestamp
+    portfolio.current_ts = to_naive_utc(trade.execution_ts)
+    value_before = portfolio_service.holding_value(holding, portfolio.current_ts)
 
-    # 4. Update holdings
+    # 4. Adjust the cash remaining and the holding, which keeps its average purchase price
     if trade.type == TradeType.BUY:
-        if not holding :
-            holding.price = trade.quantity
-        else:
-            holding.price += trade.quantity
-    elif trade.type == TradeType.SELL:
+        portfolio.cash_remaining -= total_trade_value
         if not holding:
-            raise HTTPException(status_code=400, detail="Stock not found in portfolio.")
+            holding = HoldingDB(id=str(uuid.uuid4()), portfolio_id=portfolio.id, symbol=trade.symbol, price=trade.price,
+                                quantity=trade.quantity)
         else:
-            if holding.quantity < trade.quantity:
-                raise HTTPException(status_code=400, detail="Insufficient stock quantity for sale.")
-            holding.price -= trade.quantity
+            holding.price = (holding.price * holding.quantity + total_trade_value) / (holding.quantity + trade.quantity)
+            holding.quantity += trade.quantity
+    else:
+        portfolio.cash_remaining += total_trade_value
+        holding.quantity -= trade.quantity
 
     db.add(holding)
-    db.commit()
-
     db.add(portfolio)
-    db.commit()
\ No newline at end of file
+
+    # 5. Keep the mark-to-market valuation current
+    portfolio_service.update_valuation(db, portfolio, holding, value_before)
+    return holding
+
+def update_portfolio(db: Session, portfolio: PortfolioDB, trade: Trade, holding: HoldingDB):
+    """
+    Update the portfolio based on the trade details, in one commit.
+    """
+    apply_trade(db, portfolio, trade, holding)
+    db.commit()
+    trade_ledger.record(portfolio.id, [trade])
@@ -0,0 +1,86 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy import text
+
+from assessment_app.repository.database import get_engine, pool_metrics
+from assessment_app.repository.redis_client import get_redis
+from assessment_app.service.password_hasher import password_hasher
+from assessment_app.service.response_cache import response_cache
+from assessment_app.service.trade_ledger import trade_ledger
+from assessment_app.utils.instrumentation import metrics, render_gauges
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+router = APIRouter()
+
+
+@router.get("/metrics/db-pool", response_model=dict)
+def get_db_pool_metrics() -> dict:
+    """
+    Database connection pool state and telemetry: size, connections checked out, saturation,
+    connections created and checkout wait time.
+    """
+    return pool_metrics.snapshot(get_engine().pool)
+
+
+@router.get("/metrics/password-hashing", response_model=dict)
+def get_password_hashing_metrics() -> dict:
+    """
+    bcrypt pool state: cost factor, workers, hashes running and queued, rejections and wait / hashing time.
+    """
+    return password_hasher.snapshot()
+
+
+@router.get("/metrics/trade-ledger", response_model=dict)
+def get_trade_ledger_metrics() -> dict:
+    """
+    Trade ledger write-behind queue: trades recorded, committed and pending, batches written and errors.
+    """
+    return trade_ledger.snapshot()
+
+
+@router.get("/metrics/response-cache", response_model=dict)
+def get_response_cache_metrics() -> dict:
+    """
+    Market data response cache: entries, bytes used of the budget, hits, misses, invalidations and evictions.
+    """
+    return response_cache.snapshot()
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics() -> PlainTextResponse:
+    """
+    Every metric in the Prometheus text format: latency, database queries and Redis calls per route, plus the
+    database pool, password hashing, trade ledger and response cache snapshots above as gauges.
+    """
+    lines = metrics.render()
+    lines += render_gauges("db_pool", "Database connection pool, see /metrics/db-pool.", pool_metrics.snapshot(get_engine().pool))
+    lines += render_gauges("password_hashing", "bcrypt pool, see /metrics/password-hashing.", password_hasher.snapshot())
+    lines += render_gauges("trade_ledger", "Trade ledger queue, see /metrics/trade-ledger.", trade_ledger.snapshot())
+    lines += render_gauges("response_cache", "Market data response cache, see /metrics/response-cache.", response_cache.snapshot())
+    return PlainTextResponse("\n".join(lines) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/ready")
+def get_readiness(request: Request) -> JSONResponse:
+    """
+    Readiness probe: 200 once startup finished (tables created, market data ingested and loaded) and while the
+    database and Redis answer, 503 otherwise.
+    """
+    checks = {"startup": getattr(request.app.state, "ready", False)}
+    try:
+        with get_engine().connect() as connection:
+            connection.execute(text("SELECT 1"))
+        checks["database"] = True
+    except Exception:
+        checks["database"] = False
+    try:
+        checks["redis"] = bool(get_redis().ping())
+    except Exception:
+        checks["redis"] = False
+    ready = all(checks.values())
+    return JSONResponse(status_code=200 if ready else 503, content={
+        "ready": ready,
+        "checks": checks,
+        "startup_seconds": getattr(request.app.state, "startup_seconds", None),
+    })
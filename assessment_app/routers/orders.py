@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.orm import Session
+
+from assessment_app.models.models import Order, OrderMatchResponse, OrderRequest, Trade
+from assessment_app.repository.database import HoldingDB, get_db
+from assessment_app.repository.price_store import get_price_store
+from assessment_app.routers.market_integration import apply_trade, check_ledger_capacity, get_portfolio
+from assessment_app.service import portfolio_service
+from assessment_app.service.auth_service import get_current_user
+from assessment_app.service.order_book import RestingOrder, order_books
+from assessment_app.service.trade_ledger import trade_ledger
+from assessment_app.utils.utils import to_naive_utc
+
+router = APIRouter()
+
+
+@router.post("/market/orders", response_model=Order)
+def place_order(order: OrderRequest,
+                current_user_id: str = Depends(get_current_user),
+                db: Session = Depends(get_db)) -> Order:
+    """
+    Place a resting limit or stop order for the user's portfolio. It can fill on the bars after the portfolio's
+    current_ts, once `/market/orders/match` advances the portfolio's clock past them. While orders are open,
+    trades cannot move the portfolio's clock forward.
+    Orders are held in the memory of the process: the app must run as a single worker.
+    """
+    portfolio = get_portfolio(db, current_user_id)
+    resting = order_books.place(portfolio.id, order.symbol.value, order.type, order.order_type, order.price,
+                                order.quantity, portfolio.current_ts)
+    return to_order(resting)
+
+
+@router.get("/market/orders", response_model=List[Order])
+def list_orders(current_user_id: str = Depends(get_current_user),
+                db: Session = Depends(get_db)) -> List[Order]:
+    """
+    Open orders of the user's portfolio, oldest first.
+    """
+    portfolio = get_portfolio(db, current_user_id)
+    return [to_order(order) for order in order_books.open_orders(portfolio.id)]
+
+
+@router.delete("/market/orders/{order_id}", response_model=Order)
+def cancel_order(order_id: str,
+                 current_user_id: str = Depends(get_current_user),
+                 db: Session = Depends(get_db)) -> Order:
+    """
+    Cancel an open order of the user's portfolio.
+    """
+    portfolio = get_portfolio(db, current_user_id)
+    order = order_books.cancel(order_id, portfolio.id)
+    if order is None:
+        raise HTTPException(status_code=404, detail="Open order not found.")
+    return to_order(order)
+
+
+@router.post("/market/orders/match", response_model=OrderMatchResponse)
+def match_orders(to_ts: datetime,
+                 current_user_id: str = Depends(get_current_user),
+                 db: Session = Depends(get_db)) -> OrderMatchResponse:
+    """
+    Advance the portfolio's clock to `to_ts`, matching its open orders against every bar after its current_ts
+    up to `to_ts`, day by day. Filled orders are executed as trades at their fill price in one transaction;
+    an order the portfolio cannot afford (cash or holding) is rejected.
+    """
+    # 1. Lock the portfolio
+    check_ledger_capacity()
+    portfolio = get_portfolio(db, current_user_id)
+    to_ts = to_naive_utc(to_ts)
+    if to_ts < portfolio.current_ts:
+        raise HTTPException(status_code=400, detail="to_ts cannot be older than portfolio current timestamp.")
+
+    # 2. Bars of the symbols with open orders, in (day, symbol) order
+    store = get_price_store()
+    bars = []
+    for symbol in order_books.symbols(portfolio.id):
+        prices = store.get(symbol)
+        rows = prices.range_slice(portfolio.current_ts.date() + timedelta(days=1), to_ts.date())
+        bars.extend((day, symbol, i) for i, day in zip(range(rows.start, rows.stop), prices.dates[rows].astype(object)))
+    bars.sort(key=lambda bar: (bar[0], bar[1]))
+
+    # 3. Execute the orders each bar triggers
+    holdings: Dict[str, HoldingDB] = {holding.symbol: holding for holding in
+                                      db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio.id).all()}
+    settled: List[RestingOrder] = []
+    filled: List[Trade] = []
+    try:
+        for day, symbol, i in bars:
+            prices = store.get(symbol)
+            execution_ts = datetime.combine(day, datetime.min.time())
+            triggered = order_books.match(portfolio.id, symbol, day, prices.open[i], prices.high[i], prices.low[i])
+            settled.extend(order for order, _ in triggered)
+            for order, price in triggered:
+                trade = Trade(symbol=symbol, price=float(price), type=order.type.value, quantity=order.quantity,
+                              execution_ts=execution_ts)
+                try:
+                    holdings[symbol] = apply_trade(db, portfolio, trade, holdings.get(symbol))
+                    order.fill(trade.price, execution_ts)
+                    filled.append(trade)
+                except HTTPException as e:
+                    order.reject(execution_ts, e.detail)
+
+        # 4. Move the clock to to_ts, re-mark the holdings there and commit once
+        portfolio.current_ts = to_ts
+        db.flush()
+        portfolio_service.revalue(portfolio, list(holdings.values()))
+        db.commit()
+    except Exception:
+        # Nothing was committed: the triggered orders are open again
+        db.rollback()
+        order_books.restore(settled)
+        raise
+    trade_ledger.record(portfolio.id, filled)
+
+    return OrderMatchResponse(
+        portfolio_id=portfolio.id,
+        cash_remaining=portfolio.cash_remaining,
+        current_ts=portfolio.current_ts,
+        orders=[to_order(order) for order in settled]
+    )
+
+
+def to_order(order: RestingOrder) -> Order:
+    return Order(**order.to_dict())
@@ -0,0 +1,110 @@
+import os
+from typing import List
+
+from fastapi import APIRouter, Depends, HTTPException, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+
+from assessment_app.models.constants import DEFAULT_REPLAY_MAX_MS_PER_DAY, REPLAY_MAX_MS_PER_DAY, StockSymbols
+from assessment_app.models.models import ReplayRequest, ReplaySessionInfo
+from assessment_app.service.auth_service import get_current_user, get_current_ws_user
+from assessment_app.service.replay_service import ReplaySession, replay_manager
+
+router = APIRouter()
+MAX_MS_PER_DAY = float(os.environ.get(REPLAY_MAX_MS_PER_DAY, DEFAULT_REPLAY_MAX_MS_PER_DAY))
+
+
+@router.post("/market/replay", response_model=ReplaySessionInfo)
+async def create_replay(request: ReplayRequest, current_user_id: str = Depends(get_current_user)) -> ReplaySessionInfo:
+    """
+    Create a replay session of the given symbols (default all) between from_ts and to_ts, one trading day
+    every ms_per_day milliseconds. The replay starts when the first subscriber connects to
+    `/market/replay/{id}/events` (Server-Sent Events) or `/market/replay/{id}/ws` (WebSocket).
+    Sessions are private to their creator, and are dropped if nobody subscribes within REPLAY_PENDING_TTL_SECONDS.
+    A replay stops when its last subscriber disconnects; ms_per_day is at most REPLAY_MAX_MS_PER_DAY.
+    """
+    symbols = [symbol.value for symbol in (request.symbols or StockSymbols)]
+    if request.to_ts < request.from_ts:
+        raise HTTPException(status_code=400, detail="to_ts must not be before from_ts")
+    if request.ms_per_day > MAX_MS_PER_DAY:
+        raise HTTPException(status_code=400, detail=f"ms_per_day must not be above {MAX_MS_PER_DAY:g}")
+    try:
+        session = replay_manager.create(current_user_id, symbols, request.from_ts.date(), request.to_ts.date(),
+                                        request.ms_per_day, request.queue_size, request.policy)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return ReplaySessionInfo(**session.info())
+
+
+@router.get("/market/replay", response_model=List[ReplaySessionInfo])
+async def list_replays(current_user_id: str = Depends(get_current_user)) -> List[ReplaySessionInfo]:
+    return [ReplaySessionInfo(**session.info()) for session in replay_manager.sessions(current_user_id)]
+
+
+@router.get("/market/replay/{replay_id}", response_model=ReplaySessionInfo)
+async def get_replay(replay_id: str, current_user_id: str = Depends(get_current_user)) -> ReplaySessionInfo:
+    return ReplaySessionInfo(**get_session(replay_id, current_user_id).info())
+
+
+@router.delete("/market/replay/{replay_id}", response_model=ReplaySessionInfo)
+async def delete_replay(replay_id: str, current_user_id: str = Depends(get_current_user)) -> ReplaySessionInfo:
+    """
+    Stop the replay and disconnect its subscribers.
+    """
+    session = get_session(replay_id, current_user_id)
+    replay_manager.remove(replay_id)
+    return ReplaySessionInfo(**session.info())
+
+
+@router.get("/market/replay/{replay_id}/events")
+async def stream_replay_events(replay_id: str, current_user_id: str = Depends(get_current_user)) -> StreamingResponse:
+    """
+    Server-Sent Events stream of the replay: one `tick` event per TickData, then an `end` event.
+    """
+    session = get_session(replay_id, current_user_id)
+    subscriber = session.subscribe()
+
+    async def events():
+        try:
+            while (event := await subscriber.get()) is not None:
+                yield f"event: tick\ndata: {event}\n\n"
+            yield "event: end\ndata: {}\n\n"
+        finally:
+            session.unsubscribe(subscriber)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@router.websocket("/market/replay/{replay_id}/ws")
+async def replay_websocket(websocket: WebSocket, replay_id: str, current_user_id: str = Depends(get_current_ws_user)):
+    """
+    WebSocket stream of the replay: one JSON TickData text message per tick, closed when the replay ends.
+    """
+    session = replay_manager.get(replay_id)
+    if session is None:
+        await websocket.close(code=4404, reason="Replay not found")
+        return
+    if session.owner != current_user_id:
+        await websocket.close(code=4403, reason="User does not own this replay")
+        return
+    await websocket.accept()
+    subscriber = session.subscribe()
+    try:
+        while (event := await subscriber.get()) is not None:
+            await websocket.send_text(event)
+        await websocket.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        session.unsubscribe(subscriber)
+
+
+def get_session(replay_id: str, current_user_id: str) -> ReplaySession:
+    """
+    The replay, which only the user who created it may access.
+    """
+    session = replay_manager.get(replay_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail="Replay not found")
+    if session.owner != current_user_id:
+        raise HTTPException(status_code=403, detail="User does not own this replay")
+    return session
@@ -1,14 +1,18 @@
 from datetime import datetime
 import random
-from typing import List
+from typing import List, Optional
 import uuid
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 
 from assessment_app.models import schema
-from assessment_app.models.models import Holding, Portfolio, PortfolioRequest, Strategy
+from assessment_app.models.constants import DEFAULT_TRADE_HISTORY_LIMIT, MAX_TRADE_HISTORY_LIMIT
+from assessment_app.models.models import Holding, NavData, NavResponse, Portfolio, PortfolioRequest, Strategy, Trade, TradeHistory
 from assessment_app.repository.database import HoldingDB, PortfolioDB, get_db
+from assessment_app.service import portfolio_service
 from assessment_app.service.auth_service import get_current_user
+from assessment_app.service.backtest_service import STRATEGIES
+from assessment_app.service.trade_ledger import READ_FLUSH_TIMEOUT_SECONDS, list_trades, trade_ledger
 from sqlalchemy.orm import Session
 
 router = APIRouter()
@@ -17,21 +21,22 @@ router = APIRouter()
 @router.get("/strategies", response_model=List[Strategy])
 async def get_strategies(current_user_id: str = Depends(get_current_user)) -> List[Strategy]:
     """
-    Get all strategies available. You do not need to implement this.
+    Get all strategies available for backtesting.
     """
     return [
         Strategy(
-            id="0",
-            name="default"
+            id=spec.id,
+            name=spec.name
         )
+        for spec in STRATEGIES.values()
     ]
 
 
 @router.post("/portfolio", response_model=Portfolio)
-async def create_portfolio(portfolio_request: PortfolioRequest, 
-                           override_existing_portfolio : bool = True, 
-                           current_user_id: str = Depends(get_current_user), 
-                           db: Session = Depends(get_db)) -> Portfolio:
+def create_portfolio(portfolio_request: PortfolioRequest, 
+                     override_existing_portfolio : bool = True, 
+                     current_user_id: str = Depends(get_current_user), 
+                     db: Session = Depends(get_db)) -> Portfolio:
     """
     Create a new portfolio and initialise with funds with empty holdings.
     """
@@ -52,7 +57,8 @@ async def create_portfolio(portfolio_request: PortfolioRequest,
     db.add(portfolio)
     db.commit()
 
-    # 3. Add holdings
+    # 3. Add holdings and mark them to market
+    db_holdings = []
     for holding in portfolio_request.holdings:
         db_holding = HoldingDB(
             id=str(uuid.uuid4()),
@@ -62,6 +68,8 @@ async def create_portfolio(portfolio_request: PortfolioRequest,
             quantity=holding.quantity
         )
         db.add(db_holding)
+        db_holdings.append(db_holding)
+    portfolio_service.revalue(portfolio, db_holdings)
     db.commit()
 
     return Portfolio(
@@ -75,10 +83,10 @@ async def create_portfolio(portfolio_request: PortfolioRequest,
 
 
 @router.get("/portfolio/{portfolio_id}", response_model=Portfolio)
-async def get_portfolio_by_id(portfolio_id: str, 
-                              current_ts: datetime, 
-                              current_user_id: str = Depends(get_current_user), 
-                              db: Session = Depends(get_db)) -> Portfolio:
+def get_portfolio_by_id(portfolio_id: str, 
+                        current_ts: datetime, 
+                        current_user_id: str = Depends(get_current_user), 
+                        db: Session = Depends(get_db)) -> Portfolio:
     """
     Get specified portfolio for the current user.
     """
@@ -106,9 +114,9 @@ async def get_portfolio_by_id(portfolio_id: str,
 
 
 @router.delete("/portfolio/{portfolio_id}", response_model=Portfolio)
-async def delete_portfolio(portfolio_id: str, 
-                           current_user_id: str = Depends(get_current_user), 
-                           db: Session = Depends(get_db)) -> Portfolio:
+def delete_portfolio(portfolio_id: str, 
+                     current_user_id: str = Depends(get_current_user), 
+                     db: Session = Depends(get_db)) -> Portfolio:
     """
     Delete the specified portfolio for the current user.
     """
@@ -145,11 +153,13 @@ async def delete_portfolio(portfolio_id: str,
 
 
 @router.get("/portfolio-net-worth", response_model=float)
-async def get_net_worth(portfolio_id: str, 
-                        current_user_id: str = Depends(get_current_user), 
-                        db: Session = Depends(get_db)) -> float:
+def get_net_worth(portfolio_id: str, 
+                  recompute: bool = False,
+                  current_user_id: str = Depends(get_current_user), 
+                  db: Session = Depends(get_db)) -> float:
     """
     Get net-worth from portfolio (holdings value and cash) at current_ts field in portfolio.
+    The holdings value is maintained by every trade, `recompute` re-marks every holding instead.
     """
     
     # 1. Fetch the portfolio from the database
@@ -158,11 +168,13 @@ async def get_net_worth(portfolio_id: str,
     # 2. Ensure the portfolio exists and belongs to the current user
     validationCheck(portfolio, current_user_id)
     
-    # 3. Fetch the holdings associated with the portfolio
-    holdings = db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio_id).all()
+    # 3. Use the materialized valuation unless it is missing, e.g. for portfolios created before it existed
+    if not recompute and portfolio.valued_at is not None:
+        return portfolio_service.net_worth(portfolio)
     
-    # 4. Calculate the total value of the holdings
-    holdings_value = sum(holding.price * holding.quantity for holding in holdings)
+    # 4. Calculate the market value of the holdings at the portfolio's current_ts
+    holdings = db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio_id).all()
+    holdings_value = portfolio_service.holdings_value(holdings, portfolio.current_ts)
     
     # 5. Calculate the net worth
     net_worth = portfolio.cash_remaining + holdings_value
@@ -170,6 +182,78 @@ async def get_net_worth(portfolio_id: str,
     return net_worth
 
 
+@router.get("/portfolio/{portfolio_id}/nav", response_model=NavResponse)
+def get_net_asset_values(portfolio_id: str,
+                         from_ts: datetime,
+                         to_ts: datetime,
+                         current_user_id: str = Depends(get_current_user),
+                         db: Session = Depends(get_db)) -> NavResponse:
+    """
+    Get the daily net asset value of the portfolio's cash and current holdings for every trading day between
+    from_ts and to_ts, in one call instead of one `/portfolio-net-worth` call per day.
+    """
+    if to_ts < from_ts:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="to_ts must not be before from_ts")
+
+    # 1. Fetch the portfolio from the database
+    portfolio = db.query(PortfolioDB).filter(PortfolioDB.id == portfolio_id).first()
+
+    # 2. Ensure the portfolio exists and belongs to the current user
+    validationCheck(portfolio, current_user_id)
+
+    # 3. Value the holdings on every day of the range
+    holdings = db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio_id).all()
+    dates, nav = portfolio_service.nav_series(holdings, portfolio.cash_remaining, from_ts, to_ts)
+
+    return NavResponse(
+        portfolio_id=portfolio_id,
+        data=[
+            NavData(timestamp=datetime.combine(day, datetime.min.time()), net_worth=value)
+            for day, value in zip(dates.astype(object), nav.tolist())
+        ]
+    )
+
+
+@router.get("/portfolio/{portfolio_id}/trades", response_model=TradeHistory)
+def get_trade_history(portfolio_id: str,
+                      limit: int = Query(DEFAULT_TRADE_HISTORY_LIMIT, ge=1, le=MAX_TRADE_HISTORY_LIMIT),
+                      cursor: Optional[str] = None,
+                      flush: bool = False,
+                      current_user_id: str = Depends(get_current_user),
+                      db: Session = Depends(get_db)) -> TradeHistory:
+    """
+    Get the executed trades of the portfolio, newest first, one page at a time.
+    Pass the returned next_cursor as `cursor` to get the following page.
+    Trades reach the ledger up to one flush interval after they executed; pass `flush=true` to wait (a few
+    seconds at most) for the ones already queued.
+    """
+    # 1. Fetch the portfolio from the database
+    portfolio = db.query(PortfolioDB).filter(PortfolioDB.id == portfolio_id).first()
+
+    # 2. Ensure the portfolio exists and belongs to the current user
+    validationCheck(portfolio, current_user_id)
+
+    # 3. Trades are written to the ledger behind the trade requests, on request let the ones queued so far land first
+    if flush:
+        trade_ledger.flush(READ_FLUSH_TIMEOUT_SECONDS)
+
+    # 4. Fetch the page after the cursor
+    try:
+        trades, next_cursor = list_trades(db, portfolio_id, limit, cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    return TradeHistory(
+        portfolio_id=portfolio_id,
+        trades=[
+            Trade(symbol=trade.symbol, price=trade.price, type=trade.type, quantity=trade.quantity,
+                  execution_ts=trade.execution_ts)
+            for trade in trades
+        ],
+        next_cursor=next_cursor
+    )
+
+
 def validationCheck(portfolio : PortfolioDB, current_user_id : str) :
     if portfolio is None:
         raise HTTPException(status_code=404, detail="Portfolio not found")
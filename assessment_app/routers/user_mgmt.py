@@ -1,18 +1,28 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, status
 from fastapi.responses import JSONResponse
 from fastapi.security import OAuth2PasswordRequestForm
-import redis
 from assessment_app.models.models import User, RegisterUserRequest
-import os
-from assessment_app.models.constants import JWT_TOKEN, REDIS_HOST, REDIS_PORT, PASSWORD, EMAIL, ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM
-from passlib.context import CryptContext  # for password hashing
+from assessment_app.models.constants import JWT_TOKEN, PASSWORD, EMAIL, ACCESS_TOKEN_EXPIRE_MINUTES, SECRET_KEY, ALGORITHM
+from assessment_app.repository.redis_client import get_async_redis
 import secrets
 from datetime import datetime, timedelta
+from typing import Optional
+from redis.commands.core import AsyncScript
 from jose import JWTError, jwt
+from assessment_app.service.auth_service import revoke_token
+from assessment_app.service.password_hasher import PasswordHasherBusy, password_hasher
 
 router = APIRouter()
-redis_client = redis.Redis(host=os.environ.get(REDIS_HOST), port=os.environ.get(REDIS_PORT), db=0)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Create the user hash only if the key does not exist yet, atomically and in one round trip
+REGISTER_USER_SCRIPT = """
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    return 0
+end
+redis.call('HSET', KEYS[1], unpack(ARGV))
+return 1
+"""
+_register_user_script: Optional[AsyncScript] = None
 
 
 @router.post("/register", response_model=User)
@@ -20,21 +30,29 @@ async def register_user(user: RegisterUserRequest) -> User:
     """
     Register a new user in database and save the login details (email_id and password) separately from User.
     Also, do necessary checks as per your knowledge.
+    The check-and-set is one atomic script call. It is deliberately preceded by an EXISTS round trip: a
+    duplicate email is turned away before paying for a bcrypt hash, at the cost of a second round trip on
+    every new registration. The script still guards against a concurrent registration of the same email.
     """
-    # 1. Has user already registered
-    email_exists = redis_client.exists(user.email)
-    if email_exists:
+    # 1. Reject a registered email before paying for a bcrypt hash
+    redis_client = get_async_redis()
+    if await redis_client.exists(user.email):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already exists",
         )
 
-    # 2. Hash password before storing
-    hashed_password = pwd_context.hash(user.password)
+    # 2. Hash password before storing, on the password hashing pool
+    hashed_password = await hash_password(user.password)
 
-    # 3. Save login details in Redis CACHE for faster response
-    user_data = {EMAIL: user.email, PASSWORD: hashed_password}
-    redis_client.hset(user.email, mapping=user_data)
+    # 3. Save login details in Redis CACHE for faster response, unless a concurrent request registered it meanwhile
+    created = await register_user_script()(keys=[user.email], args=[EMAIL, user.email, PASSWORD, hashed_password],
+                                           client=redis_client)
+    if not created:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email already exists",
+        )
 
     return user
     
@@ -48,7 +66,7 @@ async def login_user(form_data: OAuth2PasswordRequestForm = Depends()) -> JSONRe
 
     # 1. Fetch email from Redis using the username (assuming username and email are the same)
     email = form_data.username
-    user_data = redis_client.hgetall(email)
+    user_data = await get_async_redis().hgetall(email)
     if not user_data:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -57,7 +75,7 @@ async def login_user(form_data: OAuth2PasswordRequestForm = Depends()) -> JSONRe
 
     # 2. Verify password
     user_data_dict = {key.decode('utf-8'): value.decode('utf-8') for key, value in user_data.items()}
-    is_valid_password = pwd_context.verify(form_data.password, user_data_dict.get(PASSWORD))
+    is_valid_password = await verify_password(form_data.password, user_data_dict.get(PASSWORD))
     if not is_valid_password:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
@@ -75,6 +93,51 @@ async def login_user(form_data: OAuth2PasswordRequestForm = Depends()) -> JSONRe
     return response
 
 
+@router.post("/logout", response_model=str)
+async def logout_user(request: Request) -> JSONResponse:
+    """
+    Logout user by revoking the jwt_token of the request cookies, on every server, and clearing the cookie.
+    """
+    # 1. Revoke the token until it expires
+    jwt_token = request.cookies.get(JWT_TOKEN)
+    if jwt_token:
+        await revoke_token(jwt_token)
+
+    # 2. Clear the cookie
+    response = JSONResponse(content={"message": "Logout successful"})
+    response.delete_cookie(key=JWT_TOKEN, httponly=True)
+
+    return response
+
+
+async def hash_password(password: str) -> str:
+    try:
+        return await password_hasher.hash(password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
+
+async def verify_password(password: str, hashed_password: str) -> bool:
+    try:
+        return await password_hasher.verify(password, hashed_password)
+    except PasswordHasherBusy:
+        raise password_hasher_busy()
+
+def password_hasher_busy() -> HTTPException:
+    """
+    503 for a request turned away by the full password hashing queue, registrations and logins alike.
+    """
+    return HTTPException(status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Too many password checks in progress, retry shortly",
+                         headers={"Retry-After": "1"})
+
+def register_user_script() -> AsyncScript:
+    """
+    The registration script, created once; it is run on the caller's client since clients are per event loop.
+    """
+    global _register_user_script
+    if _register_user_script is None:
+        _register_user_script = get_async_redis().register_script(REGISTER_USER_SCRIPT)
+    return _register_user_script
+
 def generate_random_salt():
     return secrets.token_bytes(16).hex()
 
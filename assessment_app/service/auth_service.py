@@ -1,38 +1,98 @@
 from errno import EMLINK
-from fastapi import Request, HTTPException
+import logging
+import time
+from typing import Optional
+
+from fastapi import Request, HTTPException, WebSocket, WebSocketException, status
 from fastapi.security import OAuth2PasswordBearer
-from assessment_app.models.constants import EMAIL, JWT_TOKEN, SECRET_KEY, ALGORITHM, REDIS_HOST, REDIS_PORT
+from assessment_app.models.constants import (EMAIL, JWT_TOKEN, SECRET_KEY, ALGORITHM, AUTH_LOG_SAMPLE_RATE,
+                                             DEFAULT_AUTH_LOG_SAMPLE_RATE, DEFAULT_TOKEN_CACHE_SIZE, DEFAULT_TOKEN_CACHE_TTL_SECONDS,
+                                             TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL_SECONDS)
+from assessment_app.repository.redis_client import get_async_redis, get_redis
+from assessment_app.service.token_cache import (INVALIDATION_CHANNEL, InvalidationListener, SampledLogger, TokenCache, hash_token,
+                                                revoked_token_key, token_invalidation_message)
 from jose import JWTError, jwt
-import redis
 import os
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
-redis_client = redis.Redis(host=os.environ.get(REDIS_HOST), port=os.environ.get(REDIS_PORT), db=0)
+token_cache = TokenCache(int(os.environ.get(TOKEN_CACHE_SIZE, DEFAULT_TOKEN_CACHE_SIZE)),
+                         float(os.environ.get(TOKEN_CACHE_TTL_SECONDS, DEFAULT_TOKEN_CACHE_TTL_SECONDS)))
+auth_log = SampledLogger(logging.getLogger(__name__), float(os.environ.get(AUTH_LOG_SAMPLE_RATE, DEFAULT_AUTH_LOG_SAMPLE_RATE)))
 
 def get_current_user(request: Request) -> str:
     """
     Get jwt_token from request cookies from database and return corresponding user id which is `email_id` to keep it simple.
     Verify the jwt_token is authentic (from database) and is not expired.
+    Verified tokens are cached in-process until they expire, logouts and user deletions invalidate them.
+    """
+    return authenticate(request.cookies.get(JWT_TOKEN))
+
+def get_current_ws_user(websocket: WebSocket) -> str:
     """
-    token = request.cookies.get(JWT_TOKEN)
+    `get_current_user` for WebSocket routes, which close the connection with a policy violation instead.
+    """
+    try:
+        return authenticate(websocket.cookies.get(JWT_TOKEN))
+    except HTTPException as e:
+        raise WebSocketException(code=status.WS_1008_POLICY_VIOLATION, reason=e.detail)
+
+def authenticate(token: Optional[str]) -> str:
     if not token:
         raise HTTPException(status_code=403, detail="Not authenticated")
-    print(f'Test Token - {token}')
-    email = verify_jwt_token(token)
-    print(f'Test Email - {email}')
-    if email is None or not redis_client.exists(email):
+
+    # 1. Tokens verified before are served from the local cache
+    token_hash = hash_token(token)
+    email = token_cache.get(token_hash)
+    if email is not None:
+        auth_log.log("auth_verified", user=email, cache="hit")
+        return email
+
+    # 2. Otherwise decode the token, check the user exists and the token was not logged out, in one round trip
+    payload = decode_jwt_token(token)
+    email = payload.get(EMAIL) if payload else None
+    if email is None:
+        auth_log.log("auth_rejected", level=logging.WARNING, reason="invalid_token")
+        raise HTTPException(status_code=403, detail="Could not validate credentials")
+    user_exists, revoked = get_redis().pipeline(transaction=False).exists(email).exists(revoked_token_key(token_hash)).execute()
+    if not user_exists or revoked:
+        auth_log.log("auth_rejected", level=logging.WARNING, user=email, reason="revoked" if revoked else "unknown_user")
         raise HTTPException(status_code=403, detail="Could not validate credentials")
 
+    token_cache.put(token_hash, email, payload.get("exp"))
+    auth_log.log("auth_verified", user=email, cache="miss")
     return email
 
-def verify_jwt_token(token: str) -> str:
+def decode_jwt_token(token: str) -> Optional[dict]:
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-        print(f'Test Payload - {payload}')
-        email: str = payload.get(EMAIL)
-        if email is None:
+        if payload.get(EMAIL) is None:
             raise JWTError
-        return email
+        return payload
     except JWTError:
         return None
 
+def verify_jwt_token(token: str) -> str:
+    payload = decode_jwt_token(token)
+    return payload.get(EMAIL) if payload else None
+
+async def revoke_token(token: str):
+    """
+    Log a token out: mark it revoked in Redis until it expires and drop it from every process's cache.
+    The revocation is stored first, so a request cannot re-cache the token from Redis after the local drop.
+    """
+    token_hash = hash_token(token)
+    payload = decode_jwt_token(token)
+    ttl = int(float(payload.get("exp", 0)) - time.time()) + 1 if payload else 0
+    if ttl <= 0:
+        # Invalid or expired: no request authenticates with it anymore
+        token_cache.invalidate_token(token_hash)
+        return
+    redis_client = get_async_redis()
+    await redis_client.set(revoked_token_key(token_hash), 1, ex=ttl)
+    token_cache.invalidate_token(token_hash)
+    await redis_client.publish(INVALIDATION_CHANNEL, token_invalidation_message(token_hash))
+
+def start_invalidation_listener() -> InvalidationListener:
+    listener = InvalidationListener(get_redis(), token_cache)
+    listener.start()
+    return listener
@@ -0,0 +1,178 @@
+"""
+Vectorized backtesting of long/flat strategies over the in-memory price store.
+
+A strategy maps the (dates x symbols) price matrix to a boolean matrix of the same shape saying whether
+each symbol should be held on each day. The capital is split equally between the symbols and every
+symbol is traded all-in / all-out with whole shares, at the day's average price.
+"""
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from assessment_app.models.constants import TradeType
+from assessment_app.models.models import Trade
+from assessment_app.repository.price_store import PriceStore, forward_fill
+from assessment_app.utils.utils import compute_cagr, rolling_mean
+
+
+class StrategySpec(NamedTuple):
+    id: str
+    name: str
+    signal: Callable[..., np.ndarray]
+    parameters: Dict[str, float]
+    # Raises ValueError for invalid parameters, without computing the signal
+    check: Optional[Callable[..., None]] = None
+
+
+class BacktestResult(NamedTuple):
+    symbols: List[str]
+    dates: np.ndarray
+    positions: np.ndarray
+    cash: np.ndarray
+    equity: np.ndarray
+    trade_rows: np.ndarray
+    trade_cols: np.ndarray
+    trade_quantity: np.ndarray
+    trade_price: np.ndarray
+    initial_capital: float
+    final_capital: float
+    profit_loss: float
+    annualized_return: float
+
+    def trades(self) -> List[Trade]:
+        """
+        Build the executed trades as `Trade` models, in execution order.
+        """
+        execution_ts = [datetime.combine(day, datetime.min.time()) for day in self.dates[self.trade_rows].astype(object)]
+        return [
+            Trade(
+                symbol=self.symbols[col],
+                price=price,
+                type=TradeType.BUY.value if quantity > 0 else TradeType.SELL.value,
+                quantity=abs(quantity),
+                execution_ts=ts
+            )
+            for ts, col, quantity, price in zip(execution_ts, self.trade_cols.tolist(), self.trade_quantity.tolist(),
+                                                 self.trade_price.tolist())
+        ]
+
+
+def buy_and_hold(prices: np.ndarray) -> np.ndarray:
+    return np.ones(prices.shape, dtype=bool)
+
+
+def sma_crossover(prices: np.ndarray, fast: float = 10, slow: float = 50) -> np.ndarray:
+    """
+    Hold a symbol while its fast simple moving average is above the slow one.
+    """
+    check_sma_crossover(fast, slow)
+    fast, slow = int(fast), int(slow)
+    if slow > len(prices):
+        return np.zeros(prices.shape, dtype=bool)
+    above = rolling_mean(prices, fast) > rolling_mean(prices, slow)
+    # Decide on the previous day's averages, the trade itself happens at today's price
+    return np.vstack([np.zeros((1, prices.shape[1]), dtype=bool), above[:-1]])
+
+
+def check_sma_crossover(fast: float = 10, slow: float = 50):
+    if not 0 < int(fast) < int(slow):
+        raise ValueError("sma_crossover needs 0 < fast < slow")
+
+
+STRATEGIES: Dict[str, StrategySpec] = {
+    spec.id: spec for spec in (
+        StrategySpec("0", "default", buy_and_hold, {}),
+        StrategySpec("1", "sma_crossover", sma_crossover, {"fast": 10, "slow": 50}, check_sma_crossover),
+    )
+}
+
+
+def get_strategy(strategy_id: str) -> StrategySpec:
+    if strategy_id not in STRATEGIES:
+        raise KeyError(f"Unknown strategy '{strategy_id}'")
+    return STRATEGIES[strategy_id]
+
+
+def resolve_parameters(spec: StrategySpec, parameters: Optional[Dict[str, float]]) -> Dict[str, float]:
+    unknown = set(parameters or {}) - set(spec.parameters)
+    if unknown:
+        raise ValueError(f"Unknown parameters for strategy '{spec.name}': {', '.join(sorted(unknown))}")
+    return {**spec.parameters, **(parameters or {})}
+
+
+def simulate(symbols: Sequence[str], dates: np.ndarray, prices: np.ndarray, has_bar: np.ndarray, signal: np.ndarray,
+             initial_capital: float, start_date: datetime, end_date: datetime) -> BacktestResult:
+    """
+    Run a long/flat signal over forward-filled prices of a date window and return the full account history.
+    Trades only happen on days the symbol has a bar, on other days the previous state is kept.
+    """
+    n_days, n_symbols = prices.shape
+
+    # 1. Held / flat state per day, entries are +1 and exits -1 transitions
+    state = forward_fill(np.where(has_bar, signal, np.nan).astype(np.float64))
+    state = np.nan_to_num(state, nan=0.0)
+    transitions = np.diff(state, axis=0, prepend=np.zeros((1, n_symbols)))
+
+    # 2. Whole-share sizing chains from one trade to the next of the same symbol, so only trades are looped over
+    cols, rows = np.nonzero(transitions.T)
+    quantity = np.zeros(len(rows), dtype=np.int64)
+    sleeve_cash = np.full(n_symbols, initial_capital / n_symbols) if n_symbols else np.zeros(0)
+    held = np.zeros(n_symbols, dtype=np.int64)
+    trade_price = prices[rows, cols]
+    for k, (row, col) in enumerate(zip(rows.tolist(), cols.tolist())):
+        if transitions[row, col] > 0:
+            quantity[k] = int(sleeve_cash[col] // trade_price[k])
+        else:
+            quantity[k] = -held[col]
+        held[col] += quantity[k]
+        sleeve_cash[col] -= quantity[k] * trade_price[k]
+
+    # 3. Positions, cash and equity for every day of the window
+    filled = quantity != 0
+    rows, cols, quantity, trade_price = rows[filled], cols[filled], quantity[filled], trade_price[filled]
+    position_changes = np.zeros((n_days, n_symbols), dtype=np.int64)
+    position_changes[rows, cols] = quantity
+    positions = np.cumsum(position_changes, axis=0)
+    cash_flows = np.zeros(n_days)
+    np.add.at(cash_flows, rows, -quantity * trade_price)
+    cash = initial_capital + np.cumsum(cash_flows)
+    equity = cash + (positions * np.nan_to_num(prices)).sum(axis=1)
+
+    # 4. Summary
+    order = np.lexsort((cols, rows))
+    final_capital = float(equity[-1]) if n_days else float(initial_capital)
+    return BacktestResult(
+        symbols=list(symbols),
+        dates=dates,
+        positions=positions,
+        cash=cash,
+        equity=equity,
+        trade_rows=rows[order],
+        trade_cols=cols[order],
+        trade_quantity=quantity[order],
+        trade_price=trade_price[order],
+        initial_capital=initial_capital,
+        final_capital=final_capital,
+        profit_loss=final_capital - initial_capital,
+        annualized_return=compute_cagr(initial_capital, final_capital, start_date, end_date),
+    )
+
+
+def run_backtest(store: PriceStore, strategy_id: str, symbols: Sequence[str], start_date: datetime, end_date: datetime,
+                 initial_capital: float, parameters: Optional[Dict[str, float]] = None) -> BacktestResult:
+    """
+    Backtest a registered strategy on the given symbols between start_date and end_date.
+    Signals are computed on the full history so moving averages are warm at the start of the window.
+    """
+    spec = get_strategy(strategy_id)
+    if initial_capital <= 0:
+        raise ValueError("Initial capital must be positive")
+    if end_date <= start_date:
+        raise ValueError("End date must be after start date")
+    aligned = store.aligned(symbols)
+    prices = forward_fill(aligned.values)
+    signal = spec.signal(prices, **resolve_parameters(spec, parameters))
+    rows = aligned.window(start_date.date(), end_date.date())
+    return simulate(aligned.symbols, aligned.dates[rows], prices[rows], aligned.has_bar[rows], signal[rows],
+                    initial_capital, start_date, end_date)
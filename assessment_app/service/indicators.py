@@ -0,0 +1,359 @@
+"""
+Rolling indicators of a symbol's average price: SMA, EMA, rolling standard deviation, annualized volatility,
+max drawdown and RSI.
+
+Every indicator computes its full history with vectorized NumPy and keeps the small state needed to extend it
+by one bar in O(1) (ring buffers with running sums, exponential recurrences, running peaks). Series are cached
+per (symbol, indicator, window); when the price store gets a longer history of a symbol, cached series are
+extended with the new bars only instead of being recomputed.
+"""
+import math
+import threading
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Dict, NamedTuple, Optional, Tuple, Type
+
+import numpy as np
+
+from assessment_app.models.constants import IndicatorType
+from assessment_app.repository.price_store import PriceStore, SymbolPrices, get_price_store
+from assessment_app.utils.utils import rolling_mean
+
+TRADING_DAYS_IN_YEAR = 252
+# Largest exponent used when scaling an exponential recurrence into a cumulative sum, e**600 fits a float64
+_MAX_EXPONENT = 600.0
+
+
+def exponential_average(values: np.ndarray, alpha: float, seed: float) -> np.ndarray:
+    """
+    Vectorized out[i] = out[i - 1] + alpha * (values[i] - out[i - 1]) with out[-1] = seed, for 0 < alpha < 1.
+    The recurrence is rewritten as a cumulative sum scaled by powers of (1 - alpha), in blocks short enough
+    for the powers not to underflow.
+    """
+    out = np.empty(len(values))
+    decay = 1.0 - alpha
+    block = max(1, int(_MAX_EXPONENT / -math.log(decay)))
+    previous = seed
+    for start in range(0, len(values), block):
+        chunk = values[start:start + block]
+        powers = decay ** np.arange(1, len(chunk) + 1)
+        out[start:start + len(chunk)] = powers * (previous + alpha * np.cumsum(chunk / powers))
+        previous = out[start + len(chunk) - 1]
+    return out
+
+
+class Indicator(ABC):
+    """
+    `compute` returns the indicator for every bar of a price history and sets the online state from it,
+    `update` then extends the series by one bar.
+    """
+    default_window: Optional[int] = None
+
+    def __init__(self, window: Optional[int] = None):
+        self.window = window
+
+    @abstractmethod
+    def compute(self, prices: np.ndarray) -> np.ndarray:
+        ...
+
+    @abstractmethod
+    def update(self, price: float) -> float:
+        ...
+
+
+class SimpleMovingAverage(Indicator):
+    default_window = 20
+
+    def compute(self, prices: np.ndarray) -> np.ndarray:
+        self.buffer = deque(prices[-self.window:].tolist(), maxlen=self.window)
+        self.total = sum(self.buffer)
+        return rolling_mean(prices[:, None], self.window)[:, 0] if len(prices) else np.zeros(0)
+
+    def update(self, price: float) -> float:
+        if len(self.buffer) == self.window:
+            self.total -= self.buffer[0]
+        self.buffer.append(price)
+        self.total += price
+        return self.total / self.window if len(self.buffer) == self.window else math.nan
+
+
+class ExponentialMovingAverage(Indicator):
+    """
+    EMA with alpha = 2 / (window + 1), seeded with the first price.
+    """
+    default_window = 20
+
+    def compute(self, prices: np.ndarray) -> np.ndarray:
+        self.alpha = 2.0 / (self.window + 1)
+        if not len(prices):
+            self.last = None
+            return np.zeros(0)
+        values = exponential_average(prices, self.alpha, prices[0])
+        self.last = float(values[-1])
+        return values
+
+    def update(self, price: float) -> float:
+        self.last = price if self.last is None else self.last + self.alpha * (price - self.last)
+        return self.last
+
+
+class RollingStd(Indicator):
+    """
+    Sample standard deviation over the last `window` prices.
+    Sums are kept relative to a fixed shift so the running sum of squares does not lose precision.
+    """
+    default_window = 20
+
+    def compute(self, prices: np.ndarray) -> np.ndarray:
+        self.shift = float(prices[0]) if len(prices) else 0.0
+        shifted = prices - self.shift
+        self.buffer = deque(shifted[-self.window:].tolist(), maxlen=self.window)
+        self.sum = sum(self.buffer)
+        self.sum_squares = sum(value * value for value in self.buffer)
+
+        out = np.full(len(prices), np.nan)
+        if len(prices) >= self.window > 1:
+            sums = np.concatenate([[0.0], np.cumsum(shifted)])
+            squares = np.concatenate([[0.0], np.cumsum(shifted * shifted)])
+            window_sums = sums[self.window:] - sums[:-self.window]
+            window_squares = squares[self.window:] - squares[:-self.window]
+            variance = (window_squares - window_sums * window_sums / self.window) / (self.window - 1)
+            out[self.window - 1:] = np.sqrt(np.maximum(variance, 0.0))
+        return out
+
+    def update(self, price: float) -> float:
+        value = price - self.shift
+        if len(self.buffer) == self.window:
+            dropped = self.buffer[0]
+            self.sum -= dropped
+            self.sum_squares -= dropped * dropped
+        self.buffer.append(value)
+        self.sum += value
+        self.sum_squares += value * value
+        if len(self.buffer) < self.window or self.window < 2:
+            return math.nan
+        variance = (self.sum_squares - self.sum * self.sum / self.window) / (self.window - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class Volatility(Indicator):
+    """
+    Annualized sample standard deviation of the daily log returns over the last `window` returns.
+    """
+    default_window = 20
+
+    def compute(self, prices: np.ndarray) -> np.ndarray:
+        self.std = RollingStd(self.window)
+        self.last = float(prices[-1]) if len(prices) else None
+        returns = np.diff(np.log(prices))
+        out = np.full(len(prices), np.nan)
+        out[1:] = self.std.compute(returns) * math.sqrt(TRADING_DAYS_IN_YEAR)
+        return out
+
+    def update(self, price: float) -> float:
+        last, self.last = self.last, price
+        if last is None:
+            return math.nan
+        return self.std.update(math.log(price / last)) * math.sqrt(TRADING_DAYS_IN_YEAR)
+
+
+class MaxDrawdown(Indicator):
+    """
+    Worst peak-to-trough decline since the first bar, as a negative fraction, e.g. -0.25 for a 25% drawdown.
+    Drawdowns are measured over the whole history so the indicator takes no window.
+    """
+
+    def compute(self, prices: np.ndarray) -> np.ndarray:
+        if not len(prices):
+            self.peak, self.worst = None, 0.0
+            return np.zeros(0)
+        peaks = np.maximum.accumulate(prices)
+        drawdowns = np.minimum.accumulate(prices / peaks - 1)
+        self.peak, self.worst = float(peaks[-1]), float(drawdowns[-1])
+        return drawdowns
+
+    def update(self, price: float) -> float:
+        self.peak = price if self.peak is None else max(self.peak, price)
+        self.worst = min(self.worst, price / self.peak - 1)
+        return self.worst
+
+
+class RelativeStrengthIndex(Indicator):
+    """
+    Wilder's RSI: average gains and losses seeded with their mean over the first `window` changes, then
+    smoothed with alpha = 1 / window.
+    """
+    default_window = 14
+
+    def compute(self, prices: np.ndarray) -> np.ndarray:
+        changes = np.diff(prices)
+        gains, losses = np.maximum(changes, 0.0), np.maximum(-changes, 0.0)
+        self.last = float(prices[-1]) if len(prices) else None
+        self.count = len(changes)
+        out = np.full(len(prices), np.nan)
+        if len(changes) < self.window:
+            self.avg_gain, self.avg_loss = float(gains.sum()), float(losses.sum())
+            return out
+
+        alpha = 1.0 / self.window
+        seed_gain, seed_loss = gains[:self.window].mean(), losses[:self.window].mean()
+        avg_gains = np.concatenate([[seed_gain], exponential_average(gains[self.window:], alpha, seed_gain)])
+        avg_losses = np.concatenate([[seed_loss], exponential_average(losses[self.window:], alpha, seed_loss)])
+        self.avg_gain, self.avg_loss = float(avg_gains[-1]), float(avg_losses[-1])
+        with np.errstate(divide='ignore', invalid='ignore'):
+            out[self.window:] = np.where(avg_losses == 0, 100.0, 100 - 100 / (1 + avg_gains / avg_losses))
+        return out
+
+    def update(self, price: float) -> float:
+        last, self.last = self.last, price
+        if last is None:
+            return math.nan
+        gain, loss = max(price - last, 0.0), max(last - price, 0.0)
+        self.count += 1
+        if self.count < self.window:
+            # Still summing the changes of the seed window
+            self.avg_gain += gain
+            self.avg_loss += loss
+            return math.nan
+        if self.count == self.window:
+            self.avg_gain = (self.avg_gain + gain) / self.window
+            self.avg_loss = (self.avg_loss + loss) / self.window
+        else:
+            self.avg_gain += (gain - self.avg_gain) / self.window
+            self.avg_loss += (loss - self.avg_loss) / self.window
+        return 100.0 if self.avg_loss == 0 else 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+
+
+INDICATORS: Dict[IndicatorType, Type[Indicator]] = {
+    IndicatorType.SMA: SimpleMovingAverage,
+    IndicatorType.EMA: ExponentialMovingAverage,
+    IndicatorType.STD: RollingStd,
+    IndicatorType.VOLATILITY: Volatility,
+    IndicatorType.MAX_DRAWDOWN: MaxDrawdown,
+    IndicatorType.RSI: RelativeStrengthIndex,
+}
+
+
+def resolve_window(indicator: IndicatorType, window: Optional[int]) -> Optional[int]:
+    """
+    Default the window of `indicator`, raise ValueError for a window it does not accept.
+    """
+    default_window = INDICATORS[indicator].default_window
+    if default_window is None:
+        if window is not None:
+            raise ValueError(f"{indicator.value} does not take a window")
+        return None
+    window = default_window if window is None else window
+    if window < 2:
+        raise ValueError("Window must be at least 2")
+    return window
+
+
+class IndicatorSeries:
+    """
+    An indicator over the full history of one symbol, extendable by new bars in O(1) per bar.
+    """
+
+    def __init__(self, indicator: Indicator, prices: SymbolPrices):
+        self.indicator = indicator
+        self.prices = prices
+        self._values = indicator.compute(prices.avg_price)
+        self._length = len(self._values)
+
+    @property
+    def values(self) -> np.ndarray:
+        """
+        Indicator value for every row of `prices`, NaN while the window is warming up.
+        """
+        return self._values[:self._length]
+
+    def follows(self, prices: SymbolPrices) -> bool:
+        """
+        Whether `prices` is this series' history with bars appended, checked on the last known bar.
+        """
+        n = self._length
+        if len(prices) < n:
+            return False
+        return n == 0 or (prices.dates[n - 1] == self.prices.dates[n - 1] and prices.avg_price[n - 1] == self.prices.avg_price[n - 1])
+
+    def extend(self, prices: SymbolPrices):
+        """
+        Append the indicator of the bars `prices` has beyond this series.
+        """
+        new_prices = prices.avg_price[self._length:]
+        if self._length + len(new_prices) > len(self._values):
+            grown = np.full(max(2 * len(self._values), self._length + len(new_prices)), np.nan)
+            grown[:self._length] = self._values[:self._length]
+            self._values = grown
+        for price in new_prices.tolist():
+            self._values[self._length] = self.indicator.update(price)
+            self._length += 1
+        self.prices = prices
+
+
+class IndicatorSnapshot(NamedTuple):
+    """
+    Prices of a series and the indicator values of those prices, row for row.
+    """
+    prices: SymbolPrices
+    values: np.ndarray
+    window: Optional[int]
+
+
+class IndicatorCache:
+    """
+    LRU cache of indicator series per (symbol, indicator, window), kept in step with the price store.
+    """
+
+    def __init__(self, max_series: int = 256):
+        self.max_series = max_series
+        self._series: "OrderedDict[Tuple[str, IndicatorType, Optional[int]], IndicatorSeries]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, symbol: str, indicator: IndicatorType, window: Optional[int] = None,
+            store: Optional[PriceStore] = None) -> Optional[IndicatorSeries]:
+        """
+        Return the series of `indicator` for `symbol`, None for a symbol without market data.
+        Raises ValueError for an invalid window.
+        """
+        window = resolve_window(indicator, window)
+        prices = (store or get_price_store()).get(symbol)
+        if prices is None:
+            return None
+        with self._lock:
+            return self._current_series(symbol, indicator, window, prices)
+
+    def snapshot(self, symbol: str, indicator: IndicatorType, window: Optional[int] = None,
+                 store: Optional[PriceStore] = None) -> Optional[IndicatorSnapshot]:
+        """
+        `get`, with the series' prices and values read under the lock, so they stay consistent while
+        another request extends the series.
+        """
+        window = resolve_window(indicator, window)
+        prices = (store or get_price_store()).get(symbol)
+        if prices is None:
+            return None
+        with self._lock:
+            series = self._current_series(symbol, indicator, window, prices)
+            return IndicatorSnapshot(series.prices, series.values, series.indicator.window)
+
+    def _current_series(self, symbol: str, indicator: IndicatorType, window: Optional[int],
+                        prices: SymbolPrices) -> IndicatorSeries:
+        key = (symbol, indicator, window)
+        series = self._series.get(key)
+        if series is None or not series.follows(prices):
+            series = IndicatorSeries(INDICATORS[indicator](window), prices)
+            self._series[key] = series
+        elif series.prices is not prices:
+            series.extend(prices)
+        self._series.move_to_end(key)
+        while len(self._series) > self.max_series:
+            self._series.popitem(last=False)
+        return series
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+indicator_cache = IndicatorCache()
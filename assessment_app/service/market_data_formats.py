@@ -0,0 +1,103 @@
+"""
+Serializers of a symbol's (timestamps, prices) columns for the response formats of /market/data/range.
+"""
+import io
+import json
+from typing import Dict, Iterator, Optional
+
+import numpy as np
+
+from assessment_app.models.constants import RangeFormat
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+NDJSON_CHUNK_ROWS = 1000
+
+MEDIA_TYPES: Dict[RangeFormat, str] = {
+    RangeFormat.JSON: "application/json",
+    RangeFormat.NDJSON: "application/x-ndjson",
+    RangeFormat.COLUMNAR: "application/json",
+    RangeFormat.ARROW: "application/vnd.apache.arrow.stream",
+    RangeFormat.NPY: "application/x-npy",
+}
+
+ACCEPT_FORMATS: Dict[str, RangeFormat] = {
+    "application/x-ndjson": RangeFormat.NDJSON,
+    "application/ndjson": RangeFormat.NDJSON,
+    "application/vnd.apache.arrow.stream": RangeFormat.ARROW,
+    "application/x-npy": RangeFormat.NPY,
+}
+
+
+def negotiate_format(format: Optional[RangeFormat], accept: Optional[str]) -> RangeFormat:
+    """
+    An explicit `format` query parameter wins, otherwise the first known media type of the Accept header,
+    otherwise the default TickDataResponse JSON.
+    """
+    if format is not None:
+        return format
+    for media_range in (accept or "").split(","):
+        media_type = media_range.split(";")[0].strip().lower()
+        if media_type in ACCEPT_FORMATS:
+            return ACCEPT_FORMATS[media_type]
+    return RangeFormat.JSON
+
+
+def iso_timestamps(dates: np.ndarray) -> np.ndarray:
+    """
+    Format datetime64[D] dates like the JSON encoding of a midnight TickData.timestamp.
+    """
+    return np.datetime_as_string(dates.astype('datetime64[s]'), unit='s')
+
+
+def ndjson_lines(stock_symbol: str, dates: np.ndarray, prices: np.ndarray) -> Iterator[bytes]:
+    """
+    Yield one TickData JSON object per line, a chunk of lines at a time, without building the whole body.
+    """
+    symbol = json.dumps(stock_symbol)
+    for start in range(0, len(dates), NDJSON_CHUNK_ROWS):
+        timestamps = iso_timestamps(dates[start:start + NDJSON_CHUNK_ROWS])
+        chunk_prices = prices[start:start + NDJSON_CHUNK_ROWS].tolist()
+        yield "".join(
+            f'{{"stock_symbol":{symbol},"timestamp":"{timestamp}","price":{price!r}}}\n'
+            for timestamp, price in zip(timestamps.tolist(), chunk_prices)
+        ).encode()
+
+
+def columnar_json(stock_symbol: str, dates: np.ndarray, prices: np.ndarray) -> bytes:
+    return json.dumps({
+        "stock_symbol": stock_symbol,
+        "timestamps": iso_timestamps(dates).tolist(),
+        "prices": prices.tolist(),
+    }, separators=(",", ":")).encode()
+
+
+def arrow_ipc(stock_symbol: str, dates: np.ndarray, prices: np.ndarray) -> bytes:
+    """
+    Arrow IPC stream of a (timestamp: date32, price: float64) table, the symbol is kept in the schema metadata.
+    Raises RuntimeError when pyarrow is not installed.
+    """
+    if pyarrow is None:
+        raise RuntimeError("Arrow format needs the optional 'pyarrow' package")
+    table = pyarrow.table({"timestamp": pyarrow.array(dates), "price": pyarrow.array(prices)},
+                          metadata={"stock_symbol": stock_symbol})
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def npy_bytes(stock_symbol: str, dates: np.ndarray, prices: np.ndarray) -> bytes:
+    """
+    `.npy` file of a structured array with `timestamp` (datetime64[D]) and `price` (float64) fields.
+    """
+    records = np.empty(len(dates), dtype=[('timestamp', 'datetime64[D]'), ('price', np.float64)])
+    records['timestamp'] = dates
+    records['price'] = prices
+    buffer = io.BytesIO()
+    np.save(buffer, records, allow_pickle=False)
+    return buffer.getvalue()
@@ -0,0 +1,216 @@
+"""
+Resting limit and stop orders, matched against daily bars as a portfolio's clock advances.
+
+Every portfolio has one `OrderBook` per symbol, made of four heaps keyed by (price priority, arrival sequence),
+so the order that triggers first at the best price comes out first:
+
+- buy limits fill once the bar's low reaches the limit, highest limit first
+- sell limits fill once the bar's high reaches the limit, lowest limit first
+- buy stops trigger once the bar's high reaches the stop, lowest stop first
+- sell stops trigger once the bar's low reaches the stop, highest stop first
+
+A bar that opens beyond the order's price fills at the open instead. Placing an order and matching one cost
+O(log n). Cancelling is O(1): the order is only marked, and skipped when it reaches the top of its heap; a
+heap is rebuilt without its cancelled entries once they make up most of it.
+
+The books live in the memory of the process, so the app must run as a single worker process: another worker
+would neither see nor match the orders placed through this one, and a restart loses the open orders.
+"""
+import heapq
+import itertools
+import threading
+import uuid
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from assessment_app.models.constants import OrderStatus, OrderType, TradeType
+
+# Heaps compacted only past this many cancelled entries
+MIN_COMPACT_SIZE = 64
+
+
+class RestingOrder:
+    __slots__ = ('id', 'portfolio_id', 'symbol', 'type', 'order_type', 'price', 'quantity', 'placed_at', 'seq',
+                 'status', 'filled_price', 'filled_at', 'detail')
+
+    def __init__(self, portfolio_id: str, symbol: str, type: TradeType, order_type: OrderType, price: float,
+                 quantity: int, placed_at: datetime, seq: int):
+        self.id = str(uuid.uuid4())
+        self.portfolio_id = portfolio_id
+        self.symbol = symbol
+        self.type = type
+        self.order_type = order_type
+        self.price = price
+        self.quantity = quantity
+        self.placed_at = placed_at
+        self.seq = seq
+        self.status = OrderStatus.OPEN
+        self.filled_price: Optional[float] = None
+        self.filled_at: Optional[datetime] = None
+        self.detail: Optional[str] = None
+
+    def fill(self, price: float, ts: datetime):
+        self.status = OrderStatus.FILLED
+        self.filled_price = price
+        self.filled_at = ts
+
+    def reject(self, ts: datetime, detail: str):
+        self.status = OrderStatus.REJECTED
+        self.filled_at = ts
+        self.detail = detail
+
+    def reopen(self):
+        self.status = OrderStatus.OPEN
+        self.filled_price = None
+        self.filled_at = None
+        self.detail = None
+
+    def to_dict(self) -> dict:
+        return {name: getattr(self, name) for name in self.__slots__ if name not in ('portfolio_id', 'seq')}
+
+
+class OrderBook:
+    """
+    Open orders of one symbol of one portfolio. Not thread safe, see `OrderBooks`.
+    """
+
+    def __init__(self):
+        # (sort key, seq, order); sort key is the price, negated for the heaps that want the highest price first
+        self.buy_limits: List[Tuple[float, int, RestingOrder]] = []
+        self.sell_limits: List[Tuple[float, int, RestingOrder]] = []
+        self.buy_stops: List[Tuple[float, int, RestingOrder]] = []
+        self.sell_stops: List[Tuple[float, int, RestingOrder]] = []
+        self.open_orders = 0
+        self.cancelled = 0
+
+    def _heap(self, order: RestingOrder) -> Tuple[List[Tuple[float, int, RestingOrder]], float]:
+        if order.order_type == OrderType.LIMIT:
+            return (self.buy_limits, -order.price) if order.type == TradeType.BUY else (self.sell_limits, order.price)
+        return (self.buy_stops, order.price) if order.type == TradeType.BUY else (self.sell_stops, -order.price)
+
+    def add(self, order: RestingOrder):
+        heap, key = self._heap(order)
+        heapq.heappush(heap, (key, order.seq, order))
+        self.open_orders += 1
+
+    def cancel(self, order: RestingOrder):
+        order.status = OrderStatus.CANCELLED
+        self.open_orders -= 1
+        self.cancelled += 1
+        if self.cancelled >= MIN_COMPACT_SIZE and self.cancelled > self.open_orders:
+            self.compact()
+
+    def heaps(self) -> Tuple[List[Tuple[float, int, RestingOrder]], ...]:
+        return self.buy_limits, self.sell_limits, self.buy_stops, self.sell_stops
+
+    def compact(self):
+        for heap in self.heaps():
+            heap[:] = [entry for entry in heap if entry[2].status == OrderStatus.OPEN]
+            heapq.heapify(heap)
+        self.cancelled = 0
+
+    def match(self, open: float, high: float, low: float) -> List[Tuple[RestingOrder, float]]:
+        """
+        Pop the orders a bar triggers, with their fill price. Sells come first, so their proceeds are available
+        to the buys of the same bar.
+        """
+        fills = []
+        fills += self._pop(self.sell_stops, lambda key: -key >= low, lambda price: min(price, open))
+        fills += self._pop(self.sell_limits, lambda key: key <= high, lambda price: max(price, open))
+        fills += self._pop(self.buy_limits, lambda key: -key >= low, lambda price: min(price, open))
+        fills += self._pop(self.buy_stops, lambda key: key <= high, lambda price: max(price, open))
+        return fills
+
+    def _pop(self, heap, triggered, fill_price) -> Iterator[Tuple[RestingOrder, float]]:
+        while heap and (heap[0][2].status != OrderStatus.OPEN or triggered(heap[0][0])):
+            order = heapq.heappop(heap)[2]
+            if order.status != OrderStatus.OPEN:
+                self.cancelled -= 1
+                continue
+            self.open_orders -= 1
+            yield order, fill_price(order.price)
+
+
+class OrderBooks:
+    """
+    Order books of every portfolio, thread safe.
+    """
+
+    def __init__(self):
+        self._books: Dict[str, Dict[str, OrderBook]] = {}
+        self._orders: Dict[str, RestingOrder] = {}
+        self._seq = itertools.count()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._orders)
+
+    def place(self, portfolio_id: str, symbol: str, type: TradeType, order_type: OrderType, price: float, quantity: int,
+              placed_at: datetime) -> RestingOrder:
+        with self._lock:
+            order = RestingOrder(portfolio_id, symbol, type, order_type, price, quantity, placed_at, next(self._seq))
+            self._books.setdefault(portfolio_id, {}).setdefault(symbol, OrderBook()).add(order)
+            self._orders[order.id] = order
+            return order
+
+    def get(self, order_id: str) -> Optional[RestingOrder]:
+        return self._orders.get(order_id)
+
+    def cancel(self, order_id: str, portfolio_id: str) -> Optional[RestingOrder]:
+        """
+        Cancel an open order of the portfolio, None when it has no such open order.
+        """
+        with self._lock:
+            order = self._orders.get(order_id)
+            if order is None or order.portfolio_id != portfolio_id:
+                return None
+            del self._orders[order_id]
+            self._books[portfolio_id][order.symbol].cancel(order)
+            return order
+
+    def open_orders(self, portfolio_id: str) -> List[RestingOrder]:
+        with self._lock:
+            books = self._books.get(portfolio_id, {}).values()
+            return sorted((entry[2] for book in books for heap in book.heaps() for entry in heap
+                           if entry[2].status == OrderStatus.OPEN), key=lambda order: order.seq)
+
+    def symbols(self, portfolio_id: str) -> List[str]:
+        """
+        Symbols with open orders in the portfolio.
+        """
+        with self._lock:
+            return [symbol for symbol, book in self._books.get(portfolio_id, {}).items() if book.open_orders]
+
+    def match(self, portfolio_id: str, symbol: str, day: date, open: float, high: float, low: float) -> List[Tuple[RestingOrder, float]]:
+        """
+        Pop the orders of a portfolio and symbol that the bar of `day` triggers. Only orders placed before `day`
+        can fill. The caller settles every returned order with `fill` or `reject`, or hands them back to `restore`
+        when the settlement fails.
+        """
+        with self._lock:
+            book = self._books.get(portfolio_id, {}).get(symbol)
+            if book is None:
+                return []
+            fills, deferred = [], []
+            for order, price in book.match(open, high, low):
+                if order.placed_at.date() >= day:
+                    deferred.append(order)
+                    continue
+                del self._orders[order.id]
+                fills.append((order, price))
+            for order in deferred:
+                book.add(order)
+            return fills
+
+    def restore(self, orders: List[RestingOrder]):
+        """
+        Put orders returned by `match` back as open orders, with their original priority.
+        """
+        with self._lock:
+            for order in orders:
+                order.reopen()
+                self._books.setdefault(order.portfolio_id, {}).setdefault(order.symbol, OrderBook()).add(order)
+                self._orders[order.id] = order
+
+
+order_books = OrderBooks()
@@ -0,0 +1,123 @@
+"""
+bcrypt hashing and verification off the event loop.
+
+A bcrypt round costs tens to hundreds of milliseconds of CPU. Running it inline in an async handler stalls
+every other request of the worker, so the work goes to a dedicated thread pool instead (the bcrypt C
+extension releases the GIL while hashing). The pool size caps how many hashes run at once, and at most
+`max_pending` calls may be queued or running; beyond that callers get `PasswordHasherBusy` right away
+instead of an ever-growing queue.
+"""
+import asyncio
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+
+from passlib.context import CryptContext
+
+from assessment_app.models.constants import (BCRYPT_MAX_PENDING, BCRYPT_ROUNDS, BCRYPT_WORKERS, DEFAULT_BCRYPT_MAX_PENDING,
+                                             DEFAULT_BCRYPT_ROUNDS)
+
+T = TypeVar('T')
+
+
+class PasswordHasherBusy(Exception):
+    pass
+
+
+class PasswordHasher:
+
+    def __init__(self, rounds: int, workers: int, max_pending: int):
+        self.context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=rounds)
+        self.rounds = rounds
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._peak_pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._wait_seconds = 0.0
+        self._max_wait_seconds = 0.0
+        self._work_seconds = 0.0
+
+    async def hash(self, password: str) -> str:
+        return await self._submit(self.context.hash, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit(self.context.verify, password, hashed_password)
+
+    async def _submit(self, fn: Callable[..., T], *args) -> T:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusy(f"{self._pending} password hashes already pending")
+            self._pending += 1
+            self._peak_pending = max(self._peak_pending, self._pending)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="bcrypt")
+            executor = self._executor
+        submitted = time.perf_counter()
+
+        def run() -> T:
+            started = time.perf_counter()
+            with self._lock:
+                self._running += 1
+            try:
+                return fn(*args)
+            finally:
+                with self._lock:
+                    self._running -= 1
+                    self._completed += 1
+                    wait = started - submitted
+                    self._wait_seconds += wait
+                    self._max_wait_seconds = max(self._max_wait_seconds, wait)
+                    self._work_seconds += time.perf_counter() - started
+
+        future = executor.submit(run)
+        # Freed when the job ends, not when the caller stops waiting: a cancelled request leaves the hash running
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future):
+        with self._lock:
+            self._pending -= 1
+
+    def snapshot(self) -> dict:
+        """
+        Pool configuration, current queue depth and cumulative wait / hashing time.
+        """
+        with self._lock:
+            completed = self._completed
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "peak_pending": self._peak_pending,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": self._wait_seconds / completed * 1000 if completed else 0.0,
+                "max_wait_ms": self._max_wait_seconds * 1000,
+                "avg_hash_ms": self._work_seconds / completed * 1000 if completed else 0.0,
+            }
+
+    def shutdown(self):
+        """
+        Stop the hashing threads once the queued hashes are done, the next hash starts new ones.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+
+password_hasher = PasswordHasher(
+    rounds=int(os.environ.get(BCRYPT_ROUNDS, DEFAULT_BCRYPT_ROUNDS)),
+    workers=int(os.environ.get(BCRYPT_WORKERS, os.cpu_count() or 1)),
+    max_pending=int(os.environ.get(BCRYPT_MAX_PENDING, DEFAULT_BCRYPT_MAX_PENDING)),
+)
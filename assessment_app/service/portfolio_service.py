@@ -0,0 +1,97 @@
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+import numpy as np
+from sqlalchemy.orm import Session
+
+from assessment_app.models.constants import StockSymbols
+from assessment_app.repository.database import HoldingDB, PortfolioDB
+from assessment_app.repository.price_store import PriceStore, forward_fill, get_price_store
+
+
+def market_price(symbol: str, ts: datetime) -> Optional[float]:
+    """
+    Average price of the most recent bar of `symbol` at or before `ts`, None without market data.
+    """
+    prices = get_price_store().get(symbol)
+    if prices is None:
+        return None
+    i = prices.asof_index(ts.date())
+    return None if i is None else float(prices.avg_price[i])
+
+
+def holding_value(holding: Optional[HoldingDB], ts: datetime) -> float:
+    """
+    Mark a holding to its market price at `ts`, a holding without market data is valued at its purchase price.
+    """
+    if holding is None:
+        return 0.0
+    price = market_price(holding.symbol, ts)
+    return (holding.price if price is None else price) * holding.quantity
+
+
+def holdings_value(holdings: Iterable[HoldingDB], ts: datetime) -> float:
+    return sum(holding_value(holding, ts) for holding in holdings)
+
+
+def revalue(portfolio: PortfolioDB, holdings: Iterable[HoldingDB]):
+    """
+    Full recompute of the materialized valuation at the portfolio's current_ts.
+    """
+    portfolio.holdings_value = holdings_value(holdings, portfolio.current_ts)
+    portfolio.valued_at = portfolio.current_ts
+
+
+def update_valuation(db: Session, portfolio: PortfolioDB, holding: HoldingDB, value_before: float):
+    """
+    Keep the materialized valuation current after a trade changed `holding`, whose value at the new current_ts
+    before the trade was `value_before`.
+    While current_ts stays on the day of the last valuation only the traded holding's value changes, in O(1).
+    When the trade moves current_ts to another day every holding is re-marked to that day's prices.
+    """
+    if portfolio.valued_at is not None and portfolio.valued_at.date() == portfolio.current_ts.date():
+        portfolio.holdings_value = (portfolio.holdings_value or 0.0) + holding_value(holding, portfolio.current_ts) - value_before
+        portfolio.valued_at = portfolio.current_ts
+    else:
+        db.flush()
+        revalue(portfolio, db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio.id).all())
+
+
+def net_worth(portfolio: PortfolioDB) -> float:
+    """
+    Cash plus the materialized holdings valuation, no holdings scan.
+    """
+    return portfolio.cash_remaining + (portfolio.holdings_value or 0.0)
+
+
+def nav_series(holdings: Iterable[HoldingDB], cash: float, from_ts: datetime, to_ts: datetime,
+               store: Optional[PriceStore] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Daily net asset value of `cash` plus `holdings` over the trading days between from_ts and to_ts.
+    The holdings are reduced to a quantity vector over all `StockSymbols` and multiplied with the forward-filled
+    (dates x symbols) price matrix in one go. Like `holding_value`, a holding without a price yet is valued at its
+    purchase price. Returns the dates and the matching values.
+    """
+    store = store or get_price_store()
+    symbols = [symbol.value for symbol in StockSymbols if symbol.value in store]
+    column = {symbol: j for j, symbol in enumerate(symbols)}
+
+    # 1. Quantity and purchase value vectors, holdings without market data only add a constant
+    quantities = np.zeros(len(symbols))
+    purchase_values = np.zeros(len(symbols))
+    constant = cash
+    for holding in holdings:
+        j = column.get(holding.symbol)
+        if j is None:
+            constant += holding.price * holding.quantity
+        else:
+            quantities[j] += holding.quantity
+            purchase_values[j] += holding.price * holding.quantity
+
+    # 2. Prices are filled on the full history so the window starts from the last known prices
+    aligned = store.aligned(symbols)
+    rows = aligned.window(from_ts.date(), to_ts.date())
+    prices = forward_fill(aligned.values)[rows]
+    missing = np.isnan(prices)
+    nav = constant + np.where(missing, 0.0, prices) @ quantities + missing @ purchase_values
+    return aligned.dates[rows], nav
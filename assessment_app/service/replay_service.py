@@ -0,0 +1,233 @@
+"""
+Accelerated replays of the price store, pushed to many subscribers.
+
+A replay session walks the trading days of a date range for a set of symbols, one day every `ms_per_day`
+milliseconds, and emits one `TickData` event per symbol with a bar that day. A single producer task per
+session serializes every event once and fans it out to the bounded queue of each subscriber. A subscriber
+that does not keep up never slows the producer or the other subscribers: once its queue is full, the
+`drop` policy discards its oldest event and the `coalesce` policy replaces its pending event of the same
+symbol, so it skips straight to the latest price. A running replay stops when its last subscriber leaves.
+
+Sessions are private to the user who created them: only that user may list, watch or delete them.
+"""
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+from datetime import date, datetime
+from typing import Deque, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from assessment_app.models.constants import (DEFAULT_REPLAY_MAX_SESSIONS, DEFAULT_REPLAY_PENDING_TTL_SECONDS, REPLAY_MAX_SESSIONS,
+                                             REPLAY_PENDING_TTL_SECONDS, ReplayPolicy, ReplayStatus)
+from assessment_app.repository.price_store import PriceStore, get_price_store
+
+
+class ReplaySubscriber:
+    """
+    Bounded queue of serialized events of one client.
+    """
+
+    def __init__(self, max_queue: int, policy: ReplayPolicy):
+        self.max_queue = max_queue
+        self.policy = policy
+        # (symbol, serialized event)
+        self._events: Deque[tuple] = deque()
+        self._ready = asyncio.Event()
+        self._closed = False
+        self.delivered = 0
+        self.dropped = 0
+        self.coalesced = 0
+
+    def offer(self, symbol: str, event: str):
+        if len(self._events) >= self.max_queue:
+            if self.policy == ReplayPolicy.COALESCE and self._replace(symbol, event):
+                self.coalesced += 1
+                return
+            self._events.popleft()
+            self.dropped += 1
+        self._events.append((symbol, event))
+        self._ready.set()
+
+    def _replace(self, symbol: str, event: str) -> bool:
+        for i, (pending_symbol, _) in enumerate(self._events):
+            if pending_symbol == symbol:
+                del self._events[i]
+                self._events.append((symbol, event))
+                return True
+        return False
+
+    def close(self):
+        self._closed = True
+        self._ready.set()
+
+    async def get(self) -> Optional[str]:
+        """
+        Next serialized event, None once the replay is over and the queue is empty.
+        """
+        while not self._events:
+            if self._closed:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        self.delivered += 1
+        return self._events.popleft()[1]
+
+
+class ReplaySession:
+
+    def __init__(self, owner: str, symbols: Sequence[str], from_day: date, to_day: date, ms_per_day: float,
+                 max_queue: int, policy: ReplayPolicy, store: PriceStore):
+        self.id = str(uuid.uuid4())
+        self.owner = owner
+        self.symbols = list(symbols)
+        self.from_day, self.to_day = from_day, to_day
+        self.ms_per_day = ms_per_day
+        self.max_queue = max_queue
+        self.policy = policy
+        self.status = ReplayStatus.PENDING
+        self.created = time.monotonic()
+        self.subscribers: List[ReplaySubscriber] = []
+        self.days_replayed = 0
+        self.events_published = 0
+
+        aligned = store.aligned(self.symbols)
+        rows = aligned.window(from_day, to_day)
+        self.dates = aligned.dates[rows]
+        self.values = aligned.values[rows]
+        self.has_bar = aligned.has_bar[rows]
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def trading_days(self) -> int:
+        return len(self.dates)
+
+    def subscribe(self) -> ReplaySubscriber:
+        """
+        Add a subscriber, which receives the events from the current day on. The first one starts the replay.
+        """
+        subscriber = ReplaySubscriber(self.max_queue, self.policy)
+        if self.status in (ReplayStatus.FINISHED, ReplayStatus.STOPPED):
+            subscriber.close()
+            return subscriber
+        self.subscribers.append(subscriber)
+        if self._task is None:
+            self.status = ReplayStatus.RUNNING
+            self._task = asyncio.get_running_loop().create_task(self._produce())
+        return subscriber
+
+    def unsubscribe(self, subscriber: ReplaySubscriber):
+        """
+        Remove a subscriber. Without subscribers left a running replay is stopped, nobody would see its events.
+        """
+        if subscriber in self.subscribers:
+            self.subscribers.remove(subscriber)
+        if not self.subscribers and self.status == ReplayStatus.RUNNING:
+            self.stop()
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+        self._finish(ReplayStatus.STOPPED)
+
+    async def _produce(self):
+        interval = self.ms_per_day / 1000
+        started = time.perf_counter()
+        try:
+            for row, day in enumerate(self.dates.astype(object)):
+                timestamp = datetime.combine(day, datetime.min.time()).isoformat()
+                for col in np.flatnonzero(self.has_bar[row]).tolist():
+                    symbol = self.symbols[col]
+                    event = json.dumps({"stock_symbol": symbol, "timestamp": timestamp, "price": float(self.values[row, col])})
+                    for subscriber in self.subscribers:
+                        subscriber.offer(symbol, event)
+                    self.events_published += 1
+                self.days_replayed += 1
+                # Sleep to the schedule rather than for a fixed time, so fan-out work does not accumulate as drift
+                await asyncio.sleep(max(0.0, started + (row + 1) * interval - time.perf_counter()))
+        finally:
+            self._finish(ReplayStatus.FINISHED)
+
+    def _finish(self, status: ReplayStatus):
+        if self.status in (ReplayStatus.FINISHED, ReplayStatus.STOPPED):
+            return
+        self.status = status
+        for subscriber in self.subscribers:
+            subscriber.close()
+
+    def info(self) -> dict:
+        return {
+            "id": self.id,
+            "symbols": self.symbols,
+            "from_ts": datetime.combine(self.from_day, datetime.min.time()),
+            "to_ts": datetime.combine(self.to_day, datetime.min.time()),
+            "ms_per_day": self.ms_per_day,
+            "policy": self.policy,
+            "status": self.status,
+            "trading_days": self.trading_days,
+            "days_replayed": self.days_replayed,
+            "events_published": self.events_published,
+            "subscribers": len(self.subscribers),
+            "dropped": sum(subscriber.dropped for subscriber in self.subscribers),
+            "coalesced": sum(subscriber.coalesced for subscriber in self.subscribers),
+        }
+
+
+class ReplayManager:
+    """
+    Replay sessions of this process, at most `max_sessions` open per owner. Finished sessions are forgotten once
+    their last subscriber leaves, sessions nobody subscribed to within `pending_ttl_seconds` are dropped.
+    """
+
+    def __init__(self, max_sessions: int, pending_ttl_seconds: float):
+        self.max_sessions = max_sessions
+        self.pending_ttl_seconds = pending_ttl_seconds
+        self._sessions: Dict[str, ReplaySession] = {}
+
+    def create(self, owner: str, symbols: Sequence[str], from_day: date, to_day: date, ms_per_day: float,
+               max_queue: int, policy: ReplayPolicy, store: Optional[PriceStore] = None) -> ReplaySession:
+        """
+        Raises ValueError for an empty range or when the owner has too many sessions open.
+        """
+        self._forget_expired()
+        if sum(session.owner == owner for session in self._sessions.values()) >= self.max_sessions:
+            raise ValueError(f"At most {self.max_sessions} replay sessions can be open per user")
+        session = ReplaySession(owner, symbols, from_day, to_day, ms_per_day, max_queue, policy, store or get_price_store())
+        if not session.trading_days:
+            raise ValueError("No trading days in the requested range")
+        self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[ReplaySession]:
+        self._forget_expired()
+        return self._sessions.get(session_id)
+
+    def sessions(self, owner: str) -> List[ReplaySession]:
+        self._forget_expired()
+        return [session for session in self._sessions.values() if session.owner == owner]
+
+    def remove(self, session_id: str):
+        session = self._sessions.pop(session_id, None)
+        if session is not None:
+            session.stop()
+
+    def stop_all(self):
+        for session_id in list(self._sessions):
+            self.remove(session_id)
+
+    def _forget_expired(self):
+        expired_before = time.monotonic() - self.pending_ttl_seconds
+        for session_id, session in list(self._sessions.items()):
+            if session.status in (ReplayStatus.FINISHED, ReplayStatus.STOPPED) and not session.subscribers:
+                del self._sessions[session_id]
+            elif session.status == ReplayStatus.PENDING and session.created < expired_before:
+                self.remove(session_id)
+
+
+replay_manager = ReplayManager(
+    max_sessions=int(os.environ.get(REPLAY_MAX_SESSIONS, DEFAULT_REPLAY_MAX_SESSIONS)),
+    pending_ttl_seconds=float(os.environ.get(REPLAY_PENDING_TTL_SECONDS, DEFAULT_REPLAY_PENDING_TTL_SECONDS)),
+)
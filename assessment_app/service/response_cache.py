@@ -0,0 +1,151 @@
+"""
+Serialized market data responses, cached by the request they answer.
+
+Historical bars do not change while a symbol's prices stay loaded, so the bytes of a `/market/data/range`
+answer are computed once and served from here until the price store replaces that symbol's `SymbolPrices`,
+which is how newly ingested rows become visible. Every entry remembers, by weak reference, the `SymbolPrices` it
+was built from and is only served while the store still holds that same object, so a reload invalidates the
+symbol's entries without any bookkeeping on the store's side. Entries whose prices were released are purged on
+the next write; the others are dropped when next looked up, or evicted.
+
+The cache is an LRU bounded by the total size of the cached bodies plus a fixed overhead per entry. Bodies are
+identified by a strong ETag, a hash of their bytes, so every process serving the same data hands out the same
+ETag.
+"""
+import hashlib
+import os
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Hashable, NamedTuple, Optional, Tuple
+
+from assessment_app.models.constants import DEFAULT_RESPONSE_CACHE_MAX_BYTES, RESPONSE_CACHE_MAX_BYTES
+from assessment_app.repository.price_store import SymbolPrices
+
+# A single body may use at most this share of the cache, larger ones are served but not kept
+MAX_ENTRY_SHARE = 8
+# Charged per entry on top of its body: key, etag, tuples and the OrderedDict node
+ENTRY_OVERHEAD_BYTES = 256
+
+
+class CachedResponse(NamedTuple):
+    body: bytes
+    media_type: str
+    etag: str
+
+
+def etag_of(body: bytes) -> str:
+    return '"' + hashlib.blake2b(body, digest_size=16).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Whether an If-None-Match header lists `etag`, comparing weakly as RFC 9110 prescribes for this header.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+class ResponseCache:
+    """
+    Byte-bounded LRU of key -> CachedResponse, thread safe.
+    """
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[weakref.ref, CachedResponse]]" = OrderedDict()
+        self._bytes = 0
+        # Weak references whose SymbolPrices were released, appended by their callback
+        self._released: list = []
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable, prices: SymbolPrices) -> Optional[CachedResponse]:
+        """
+        The response cached for `key`, if it was built from `prices`.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0]() is not prices:
+                self._remove(key)
+                self.invalidations += 1
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: Hashable, prices: SymbolPrices, body: bytes, media_type: str) -> CachedResponse:
+        """
+        Cache the response built from `prices` for `key`, evicting the least recently used ones to make room.
+        """
+        response = CachedResponse(body, media_type, etag_of(body))
+        if entry_size(response) > self.max_bytes // MAX_ENTRY_SHARE:
+            return response
+        with self._lock:
+            self._purge_released()
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (weakref.ref(prices, self._on_released), response)
+            self._bytes += entry_size(response)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+        return response
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._released = []
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+                "invalidations": self.invalidations,
+                "evictions": self.evictions,
+            }
+
+    def _remove(self, key: Hashable):
+        _, response = self._entries.pop(key)
+        self._bytes -= entry_size(response)
+
+    def _on_released(self, ref: weakref.ref):
+        # Runs wherever the prices were garbage collected, possibly with the lock held: no locking here
+        self._released.append(ref)
+
+    def _purge_released(self):
+        """
+        Drop the entries built from prices that were garbage collected, they can never be served again.
+        """
+        if not self._released:
+            return
+        released, self._released = {id(ref) for ref in self._released}, []
+        for key in [key for key, (ref, _) in self._entries.items() if id(ref) in released]:
+            self._remove(key)
+            self.invalidations += 1
+
+
+def entry_size(response: CachedResponse) -> int:
+    return len(response.body) + ENTRY_OVERHEAD_BYTES
+
+
+response_cache = ResponseCache(int(os.environ.get(RESPONSE_CACHE_MAX_BYTES, DEFAULT_RESPONSE_CACHE_MAX_BYTES)))
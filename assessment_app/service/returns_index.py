@@ -0,0 +1,122 @@
+"""
+Constant time CAGR lookups for any window of any symbol.
+
+Per symbol the index keeps the cumulative log return of the average price since the first bar and a dense map
+from every calendar day of the symbol's history to the row of its as-of bar. The growth between two days is
+then two array reads and an exp, with no search over the price history.
+"""
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from assessment_app.models.constants import DAYS_IN_YEAR
+from assessment_app.repository.price_store import PriceStore, SymbolPrices, get_price_store
+from assessment_app.utils.utils import compute_cagr
+
+
+class ReturnsIndex:
+    """
+    Prefix arrays over the average price of one symbol, see the module docstring.
+    """
+
+    def __init__(self, prices: SymbolPrices):
+        self.symbol = prices.symbol
+        self.prices = prices
+        self.first_day = prices.dates[0] if len(prices) else None
+        # cum_log[i] = log(avg_price[i] / avg_price[0])
+        self.cum_log = np.log(prices.avg_price) - np.log(prices.avg_price[0]) if len(prices) else np.zeros(0)
+        # offsets[d] = row of the last bar at or before first_day + d days
+        n_days = int((prices.dates[-1] - self.first_day).astype(int)) + 1 if len(prices) else 0
+        day_numbers = (prices.dates - self.first_day).astype(np.int64) if len(prices) else np.zeros(0, dtype=np.int64)
+        self.offsets = (np.searchsorted(day_numbers, np.arange(n_days), side='right') - 1).astype(np.int32)
+
+    def asof_rows(self, days: np.ndarray) -> np.ndarray:
+        """
+        Rows of the as-of bars of a datetime64[D] array, -1 for days before the first bar.
+        """
+        if self.first_day is None:
+            return np.full(days.shape, -1, dtype=np.int32)
+        numbers = (days - self.first_day).astype(np.int64)
+        rows = self.offsets[np.clip(numbers, 0, len(self.offsets) - 1)]
+        return np.where(numbers < 0, -1, rows)
+
+    def asof_row(self, ts: datetime) -> Optional[int]:
+        if self.first_day is None:
+            return None
+        number = int((np.datetime64(ts.date(), 'D') - self.first_day).astype(int))
+        if number < 0:
+            return None
+        return int(self.offsets[min(number, len(self.offsets) - 1)])
+
+    def growth(self, start_ts: datetime, end_ts: datetime) -> Optional[float]:
+        """
+        Ratio of the as-of average prices at end_ts and start_ts, None if the symbol has no bar by start_ts.
+        """
+        start_row, end_row = self.asof_row(start_ts), self.asof_row(end_ts)
+        if start_row is None:
+            return None
+        return float(np.exp(self.cum_log[end_row] - self.cum_log[start_row]))
+
+    def cagr(self, start_ts: datetime, end_ts: datetime) -> Optional[float]:
+        """
+        CAGR in percent between the as-of prices at start_ts and end_ts, see `compute_cagr`.
+        """
+        growth = self.growth(start_ts, end_ts)
+        return None if growth is None else compute_cagr(1.0, growth, start_ts, end_ts)
+
+
+_indexes: Dict[str, ReturnsIndex] = {}
+_lock = threading.Lock()
+
+
+def get_returns_index(symbol: str, store: Optional[PriceStore] = None) -> Optional[ReturnsIndex]:
+    """
+    Return the index of `symbol`, built on first use and rebuilt when the store holds new prices for it.
+    None for a symbol without market data.
+    """
+    prices = (store or get_price_store()).get(symbol)
+    if prices is None:
+        return None
+    index = _indexes.get(symbol)
+    if index is None or index.prices is not prices:
+        with _lock:
+            index = _indexes.get(symbol)
+            if index is None or index.prices is not prices:
+                index = ReturnsIndex(prices)
+                _indexes[symbol] = index
+    return index
+
+
+def cagr_matrix(symbols: Sequence[str], windows: Sequence[Tuple[datetime, datetime]],
+                store: Optional[PriceStore] = None) -> np.ndarray:
+    """
+    CAGR in percent of every symbol over every window, shape (len(symbols), len(windows)).
+    Each symbol is looked up for all windows at once, NaN where the symbol has no bar by the window start.
+    Same convention as `compute_cagr`, in years of DAYS_IN_YEAR days between the window's timestamps.
+    """
+    if any(end_ts <= start_ts for start_ts, end_ts in windows):
+        raise ValueError("CAGR needs a positive beginning value and an end date after the start date")
+    starts = np.array([start_ts.date() for start_ts, _ in windows], dtype='datetime64[D]')
+    ends = np.array([end_ts.date() for _, end_ts in windows], dtype='datetime64[D]')
+    seconds = np.array([(end_ts - start_ts).total_seconds() for start_ts, end_ts in windows])
+    years = seconds / (DAYS_IN_YEAR * 24 * 60 * 60)
+
+    matrix = np.full((len(symbols), len(windows)), np.nan)
+    for i, symbol in enumerate(symbols):
+        index = get_returns_index(symbol, store)
+        if index is None or index.first_day is None:
+            continue
+        start_rows, end_rows = index.asof_rows(starts), index.asof_rows(ends)
+        valid = start_rows >= 0
+        growth = np.exp(index.cum_log[end_rows[valid]] - index.cum_log[start_rows[valid]])
+        matrix[i, valid] = (growth ** (1 / years[valid]) - 1) * 100
+    return matrix
+
+
+def cagr_rows(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    """
+    Matrix rows as lists with None in place of NaN, ready for JSON.
+    """
+    return [[None if np.isnan(value) else value for value in row] for row in matrix.tolist()]
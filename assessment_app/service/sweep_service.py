@@ -0,0 +1,181 @@
+"""
+Parameter sweeps of the backtest engine over a process pool.
+
+Every sweep runs on one long-lived process pool, sized by SWEEP_WORKERS (default: the machine's cores) and
+shut down with the app. The sweep's aligned price matrix is copied once into a shared memory block that the
+workers map on their first task of the sweep, tasks only carry the block's name, their parameters and window
+bounds. A sweep runs at most SWEEP_MAX_TASKS backtests (combinations x windows).
+
+Workers are spawned, not forked: the server process runs other threads (the request threadpool, the trade ledger
+writer, the Redis listener), and a forked child could inherit a lock one of them held and never see it released.
+"""
+import itertools
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+from multiprocessing import shared_memory
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+
+from assessment_app.models.constants import DEFAULT_SWEEP_MAX_TASKS, SWEEP_MAX_TASKS, SWEEP_WORKERS, SweepRankBy
+from assessment_app.repository.price_store import PriceStore, forward_fill
+from assessment_app.service.backtest_service import get_strategy, resolve_parameters, simulate
+
+# Mapped by `_shared_prices` in every worker process, the block of the sweep it last worked on
+_worker_prices: Optional["SharedPrices"] = None
+
+
+class SweepResult(NamedTuple):
+    parameters: Dict[str, float]
+    start_date: datetime
+    end_date: datetime
+    final_capital: float
+    profit_loss: float
+    annualized_return: float
+    trade_count: int
+
+
+class SharedPrices:
+    """
+    Dates, forward-filled prices and the has-bar mask of an aligned price matrix in one shared memory block.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, symbols: List[str], n_days: int):
+        self.shm = shm
+        self.symbols = symbols
+        n_symbols = len(symbols)
+        prices_offset = n_days * 8
+        mask_offset = prices_offset + n_days * n_symbols * 8
+        self.dates = np.ndarray((n_days,), dtype='datetime64[D]', buffer=shm.buf, offset=0)
+        self.prices = np.ndarray((n_days, n_symbols), dtype=np.float64, buffer=shm.buf, offset=prices_offset)
+        self.has_bar = np.ndarray((n_days, n_symbols), dtype=np.bool_, buffer=shm.buf, offset=mask_offset)
+
+    @classmethod
+    def create(cls, store: PriceStore, symbols: Sequence[str]) -> "SharedPrices":
+        aligned = store.aligned(symbols)
+        n_days, n_symbols = aligned.values.shape
+        shm = shared_memory.SharedMemory(create=True, size=max(1, n_days * (8 + n_symbols * 9)))
+        shared = cls(shm, aligned.symbols, n_days)
+        shared.dates[:] = aligned.dates
+        shared.prices[:] = forward_fill(aligned.values)
+        shared.has_bar[:] = aligned.has_bar
+        return shared
+
+    def spec(self) -> Tuple[str, List[str], int]:
+        return self.shm.name, self.symbols, len(self.dates)
+
+    def close(self):
+        # Views must go before the buffer can be released
+        del self.dates, self.prices, self.has_bar
+        self.shm.close()
+
+
+class SweepPool:
+    """
+    The process pool every sweep runs on, started on first use, and the most backtests one sweep may run.
+    """
+
+    def __init__(self, workers: int, max_tasks: int):
+        self.workers = workers
+        self.max_tasks = max_tasks
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.workers,
+                                                     mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def shutdown(self):
+        """
+        Stop the workers, the next sweep starts a new pool.
+        """
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _shared_prices(name: str, symbols: List[str], n_days: int) -> SharedPrices:
+    global _worker_prices
+    if _worker_prices is None or _worker_prices.shm.name != name:
+        if _worker_prices is not None:
+            _worker_prices.close()
+        # Pool workers share the parent's resource tracker, the parent alone unlinks the block
+        _worker_prices = SharedPrices(shared_memory.SharedMemory(name=name), symbols, n_days)
+    return _worker_prices
+
+
+def _run_sweep_task(shared: Tuple[str, List[str], int], strategy_id: str, parameters: Dict[str, float],
+                    rows: Tuple[int, int], start_date: datetime, end_date: datetime, initial_capital: float) -> SweepResult:
+    prices = _shared_prices(*shared)
+    spec = get_strategy(strategy_id)
+    signal = spec.signal(prices.prices, **parameters)
+    window = slice(*rows)
+    result = simulate(prices.symbols, prices.dates[window], prices.prices[window], prices.has_bar[window], signal[window],
+                      initial_capital, start_date, end_date)
+    return SweepResult(parameters, start_date, end_date, result.final_capital, result.profit_loss,
+                       result.annualized_return, len(result.trade_rows))
+
+
+def expand_grid(parameter_grid: Dict[str, List[float]]) -> List[Dict[str, float]]:
+    names = sorted(parameter_grid)
+    return [dict(zip(names, values)) for values in itertools.product(*(parameter_grid[name] for name in names))]
+
+
+def run_sweep(store: PriceStore, strategy_id: str, parameter_grid: Dict[str, List[float]], symbols: Sequence[str],
+              windows: Sequence[Tuple[datetime, datetime]], initial_capital: float,
+              rank_by: SweepRankBy = SweepRankBy.ANNUALIZED_RETURN) -> List[SweepResult]:
+    """
+    Backtest every combination of the parameter grid on every window, fanned out over the sweep process pool,
+    and return the results best first by `rank_by`.
+    Raises ValueError, before any backtest runs, for invalid inputs, an invalid combination or too many backtests.
+    """
+    # 1. Validate every combination and the size of the sweep up front
+    spec = get_strategy(strategy_id)
+    grid = [resolve_parameters(spec, parameters) for parameters in expand_grid(parameter_grid)]
+    if initial_capital <= 0:
+        raise ValueError("Initial capital must be positive")
+    if any(end_date <= start_date for start_date, end_date in windows):
+        raise ValueError("End date must be after start date")
+    if len(grid) * len(windows) > sweep_pool.max_tasks:
+        raise ValueError(f"The sweep has {len(grid) * len(windows)} backtests, at most {sweep_pool.max_tasks} are allowed")
+    if spec.check is not None:
+        for parameters in grid:
+            try:
+                spec.check(**parameters)
+            except ValueError as e:
+                raise ValueError(f"Invalid parameter combination {parameters}: {e}")
+
+    # 2. Share the prices and fan the tasks out
+    aligned = store.aligned(symbols)
+    shared = SharedPrices.create(store, symbols)
+    tasks = []
+    for start_date, end_date in windows:
+        rows = aligned.window(start_date.date(), end_date.date())
+        tasks.extend((shared.spec(), strategy_id, parameters, (rows.start, rows.stop), start_date, end_date, initial_capital)
+                     for parameters in grid)
+    try:
+        chunksize = max(1, len(tasks) // (sweep_pool.workers * 4))
+        results = list(sweep_pool.executor().map(_run_sweep_task, *zip(*tasks), chunksize=chunksize)) if tasks else []
+    except BrokenProcessPool:
+        # A worker died, the pool cannot take tasks anymore
+        sweep_pool.shutdown()
+        raise
+    finally:
+        shared.close()
+        shared.shm.unlink()
+
+    return sorted(results, key=lambda result: getattr(result, rank_by.value), reverse=True)
+
+
+sweep_pool = SweepPool(
+    workers=int(os.environ.get(SWEEP_WORKERS) or os.cpu_count() or 1),
+    max_tasks=int(os.environ.get(SWEEP_MAX_TASKS, DEFAULT_SWEEP_MAX_TASKS)),
+)
@@ -0,0 +1,152 @@
+"""
+In-process cache of verified JWTs, so an authenticated request costs neither a JWT decode nor a Redis round trip.
+
+Entries are keyed by the sha256 of the token and expire with the token's `exp` claim, or after `max_ttl`
+seconds so a lost invalidation message cannot keep a token alive for long. Logouts are published on a Redis
+channel that every process listens to, see `InvalidationListener`.
+"""
+import hashlib
+import logging
+import random
+import threading
+import time
+from collections import OrderedDict
+from typing import NamedTuple, Optional
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+INVALIDATION_CHANNEL = "auth:invalidate"
+TOKEN_PREFIX = "token:"
+REVOKED_TOKEN_PREFIX = "revoked:"
+
+
+def hash_token(token: str) -> str:
+    return hashlib.sha256(token.encode('utf-8')).hexdigest()
+
+
+def revoked_token_key(token_hash: str) -> str:
+    """
+    Redis key marking a logged out token until it expires.
+    """
+    return REVOKED_TOKEN_PREFIX + token_hash
+
+
+class CachedToken(NamedTuple):
+    email: str
+    expires_at: float
+
+
+class TokenCache:
+    """
+    Bounded LRU of token hash -> email, thread safe.
+    """
+
+    def __init__(self, max_entries: int, max_ttl: float):
+        self.max_entries = max_entries
+        self.max_ttl = max_ttl
+        self._tokens: "OrderedDict[str, CachedToken]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def get(self, token_hash: str) -> Optional[str]:
+        """
+        Return the email of a cached, unexpired token.
+        """
+        with self._lock:
+            cached = self._tokens.get(token_hash)
+            if cached is None:
+                return None
+            if cached.expires_at <= time.time():
+                self._remove(token_hash)
+                return None
+            self._tokens.move_to_end(token_hash)
+            return cached.email
+
+    def put(self, token_hash: str, email: str, exp: Optional[float]):
+        expires_at = time.time() + self.max_ttl
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        with self._lock:
+            self._remove(token_hash)
+            self._tokens[token_hash] = CachedToken(email, expires_at)
+            while len(self._tokens) > self.max_entries:
+                self._remove(next(iter(self._tokens)))
+
+    def invalidate_token(self, token_hash: str):
+        with self._lock:
+            self._remove(token_hash)
+
+    def clear(self):
+        with self._lock:
+            self._tokens.clear()
+
+    def _remove(self, token_hash: str):
+        self._tokens.pop(token_hash, None)
+
+    def handle_message(self, data):
+        """
+        Apply an invalidation message, `token:<token hash>`.
+        """
+        message = data.decode('utf-8') if isinstance(data, bytes) else str(data)
+        if message.startswith(TOKEN_PREFIX):
+            self.invalidate_token(message[len(TOKEN_PREFIX):])
+
+
+def token_invalidation_message(token_hash: str) -> str:
+    return TOKEN_PREFIX + token_hash
+
+
+class InvalidationListener(threading.Thread):
+    """
+    Daemon thread applying the invalidation messages of INVALIDATION_CHANNEL to a cache.
+    Messages published while it is not subscribed are lost, so the cache is cleared on every (re)subscribe.
+    """
+
+    def __init__(self, redis_client: redis.Redis, cache: TokenCache, retry_seconds: float = 1.0):
+        super().__init__(name="token-cache-invalidation", daemon=True)
+        self.redis_client = redis_client
+        self.cache = cache
+        self.retry_seconds = retry_seconds
+        self.subscribed = threading.Event()
+        self._stopped = threading.Event()
+
+    def run(self):
+        while not self._stopped.is_set():
+            pubsub = self.redis_client.pubsub(ignore_subscribe_messages=True)
+            try:
+                pubsub.subscribe(INVALIDATION_CHANNEL)
+                self.cache.clear()
+                self.subscribed.set()
+                while not self._stopped.is_set():
+                    message = pubsub.get_message(timeout=1.0)
+                    if message is not None:
+                        self.cache.handle_message(message['data'])
+            except redis.RedisError as e:
+                self.subscribed.clear()
+                logger.warning("Token cache invalidation listener disconnected: %s", e)
+                self._stopped.wait(self.retry_seconds)
+            finally:
+                pubsub.close()
+
+    def stop(self):
+        self._stopped.set()
+
+
+class SampledLogger:
+    """
+    Logs a fraction `rate` of the events of a hot path as `event key=value ...` lines.
+    """
+
+    def __init__(self, logger: logging.Logger, rate: float):
+        self.logger = logger
+        self.rate = rate
+
+    def log(self, event: str, level: int = logging.INFO, **fields):
+        if self.rate <= 0 or random.random() >= self.rate or not self.logger.isEnabledFor(level):
+            return
+        self.logger.log(level, "%s %s", event, " ".join(f"{key}={value}" for key, value in fields.items()),
+                        extra={'event': event, **fields})
@@ -0,0 +1,310 @@
+"""
+Write-behind recording of executed trades into the append-only `trades` ledger.
+
+Trade handlers only append the ledger row to an in-memory queue after their own commit. A writer thread
+inserts queued rows in batches, once `batch_size` rows are waiting or the oldest one has waited
+`flush_interval` seconds, so the audit trail adds no commit to the trade path.
+
+Durability: the queue is drained before the application shuts down (`stop`, called by the lifespan, and
+an atexit hook otherwise). A batch failing on the connection or the database being unavailable is retried until
+it succeeds. Rows the database rejects (constraint, data or schema errors) are retried alone and the ones that
+still fail go to the dead letter log, `assessment_app.trade_ledger.dead_letter`, one JSON line per row, so one
+bad row never stalls the writer. Only a hard crash of the process can lose the rows still queued, at most one
+flush interval of trades.
+
+Back-pressure: once `max_pending` rows are queued, trade handlers are turned away before they trade
+(`is_full`), and `record` waits at most `record_timeout` seconds for room before dead-lettering the rows.
+"""
+import atexit
+import base64
+import binascii
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime
+from typing import Deque, List, Optional, Tuple
+
+from sqlalchemy import and_, insert, or_, select
+from sqlalchemy.exc import DBAPIError, OperationalError, SQLAlchemyError
+from sqlalchemy.orm import Session
+
+from assessment_app.models.constants import (DEFAULT_TRADE_LEDGER_BATCH_SIZE, DEFAULT_TRADE_LEDGER_FLUSH_INTERVAL_MS,
+                                             DEFAULT_TRADE_LEDGER_MAX_PENDING, TRADE_LEDGER_BATCH_SIZE,
+                                             TRADE_LEDGER_FLUSH_INTERVAL_MS, TRADE_LEDGER_MAX_PENDING)
+from assessment_app.models.models import Trade
+from assessment_app.repository.database import SessionLocal, TradeDB
+from assessment_app.utils.utils import to_naive_utc
+
+logger = logging.getLogger(__name__)
+dead_letter_logger = logging.getLogger("assessment_app.trade_ledger.dead_letter")
+
+MAX_RETRY_SECONDS = 5.0
+SHUTDOWN_TIMEOUT_SECONDS = 30.0
+# Longest `record` waits for room in a full queue
+RECORD_TIMEOUT_SECONDS = 5.0
+# Longest a history read asking for a flush waits for the trades queued before it
+READ_FLUSH_TIMEOUT_SECONDS = 5.0
+
+
+def ledger_row(portfolio_id: str, trade: Trade) -> dict:
+    return {
+        'id': str(uuid.uuid4()),
+        'portfolio_id': portfolio_id,
+        'symbol': trade.symbol,
+        'type': trade.type,
+        'price': trade.price,
+        'quantity': trade.quantity,
+        'execution_ts': to_naive_utc(trade.execution_ts),
+        'recorded_at': datetime.utcnow(),
+    }
+
+
+def is_transient(error: SQLAlchemyError) -> bool:
+    """
+    Whether a failed write may succeed as is later: the connection or the database was unavailable.
+    """
+    return isinstance(error, OperationalError) or (isinstance(error, DBAPIError) and error.connection_invalidated)
+
+
+class TradeLedger:
+
+    def __init__(self, session_factory=SessionLocal, batch_size: int = DEFAULT_TRADE_LEDGER_BATCH_SIZE,
+                 flush_interval: float = DEFAULT_TRADE_LEDGER_FLUSH_INTERVAL_MS / 1000,
+                 max_pending: int = DEFAULT_TRADE_LEDGER_MAX_PENDING, record_timeout: float = RECORD_TIMEOUT_SECONDS):
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.record_timeout = record_timeout
+        # (monotonic time queued, row)
+        self._pending: Deque[Tuple[float, dict]] = deque()
+        self._condition = threading.Condition()
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = False
+        self._flush_requested = False
+        self._recorded = 0
+        self._committed = 0
+        self._dead_lettered = 0
+        self._batches = 0
+        self._errors = 0
+
+    def is_full(self) -> bool:
+        """
+        Whether `max_pending` rows are waiting, checked before trading so a backed up ledger turns trades away.
+        """
+        with self._condition:
+            return len(self._pending) >= self.max_pending
+
+    def record(self, portfolio_id: str, trades: List[Trade]):
+        """
+        Queue ledger rows for trades that were committed.
+        While `max_pending` rows are waiting, waits at most `record_timeout` seconds for the writer to make room;
+        the rows that still do not fit go to the dead letter log rather than blocking the trade handler.
+        """
+        now = time.monotonic()
+        deadline = now + self.record_timeout
+        rows = [ledger_row(portfolio_id, trade) for trade in trades]
+        with self._condition:
+            self._ensure_started()
+            for index, row in enumerate(rows):
+                if not self._condition.wait_for(lambda: len(self._pending) < self.max_pending,
+                                                deadline - time.monotonic()):
+                    self._recorded += len(rows) - index
+                    self._dead_letter(rows[index:], "queue full")
+                    break
+                self._pending.append((now, row))
+                self._recorded += 1
+            self._condition.notify_all()
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write every row recorded so far now and wait until it is committed. Returns False on timeout.
+        """
+        with self._condition:
+            target = self._recorded
+            if self._done() >= target:
+                return True
+            self._flush_requested = True
+            self._condition.notify_all()
+            return self._condition.wait_for(lambda: self._done() >= target, timeout)
+
+    def stop(self, timeout: Optional[float] = None):
+        """
+        Drain the queue and stop the writer thread. A writer still draining after `timeout` is left running, and
+        the ledger stopping, so no second writer is started next to it.
+        """
+        with self._condition:
+            thread = self._thread
+            self._stopping = True
+            self._condition.notify_all()
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.error("Trade ledger writer still running after %ss with %d rows not written", timeout,
+                             len(self._pending))
+                return
+        with self._condition:
+            self._thread = None
+            self._stopping = False
+
+    def snapshot(self) -> dict:
+        with self._condition:
+            return {
+                "recorded": self._recorded,
+                "committed": self._committed,
+                "pending": self._recorded - self._done(),
+                "dead_lettered": self._dead_lettered,
+                "batches": self._batches,
+                "errors": self._errors,
+                "batch_size": self.batch_size,
+                "flush_interval_ms": self.flush_interval * 1000,
+            }
+
+    def _ensure_started(self):
+        if self._thread is not None and not self._thread.is_alive():
+            # A writer left draining by `stop` has finished since
+            self._thread, self._stopping = None, False
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="trade-ledger-writer", daemon=True)
+            self._thread.start()
+
+    def _done(self) -> int:
+        return self._committed + self._dead_lettered
+
+    def _dead_letter(self, rows: List[dict], reason):
+        """
+        Log rows that will not be written, one JSON line each, to be replayed by hand. Call with the lock held.
+        """
+        for row in rows:
+            dead_letter_logger.error(json.dumps({**row, 'reason': str(reason)}, default=str))
+        self._dead_lettered += len(rows)
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if batch is None:
+                return
+            rejected = self._write(batch)
+            with self._condition:
+                self._committed += len(batch) - len(rejected)
+                for row, error in rejected:
+                    self._dead_letter([row], error)
+                self._batches += 1
+                self._condition.notify_all()
+
+    def _next_batch(self) -> Optional[List[dict]]:
+        """
+        Wait until a batch is due: full, old enough, flush requested or stopping. None once stopped and drained.
+        """
+        with self._condition:
+            while True:
+                if not self._pending:
+                    if self._stopping:
+                        return None
+                    self._condition.wait()
+                    continue
+                due_at = self._pending[0][0] + self.flush_interval
+                if len(self._pending) >= self.batch_size or self._stopping or self._flush_requested or time.monotonic() >= due_at:
+                    break
+                self._condition.wait(due_at - time.monotonic())
+            batch = [self._pending.popleft()[1] for _ in range(min(self.batch_size, len(self._pending)))]
+            if not self._pending:
+                self._flush_requested = False
+            # Wake up writers blocked on a full queue
+            self._condition.notify_all()
+            return batch
+
+    def _write(self, batch: List[dict]) -> List[Tuple[dict, SQLAlchemyError]]:
+        """
+        Insert a batch in one transaction. When the database rejects it, insert its rows one at a time so only the
+        bad ones are left out. Returns the rejected rows with their error.
+        """
+        try:
+            self._insert(batch)
+            return []
+        except SQLAlchemyError as e:
+            if len(batch) == 1:
+                return [(batch[0], e)]
+            logger.warning("Trade ledger batch of %d rows rejected, writing its rows one at a time: %s", len(batch), e)
+        rejected = []
+        for row in batch:
+            try:
+                self._insert([row])
+            except SQLAlchemyError as e:
+                rejected.append((row, e))
+        return rejected
+
+    def _insert(self, rows: List[dict]):
+        """
+        Insert rows in one transaction, retrying transient failures until it succeeds and raising the others.
+        Rows of an attempt whose commit did succeed despite the error are not inserted twice.
+        """
+        retry_seconds, attempt = 0.05, 0
+        while True:
+            db = self.session_factory()
+            try:
+                missing = rows
+                if attempt:
+                    existing = set(db.scalars(select(TradeDB.id).where(TradeDB.id.in_([row['id'] for row in rows]))))
+                    missing = [row for row in rows if row['id'] not in existing]
+                if missing:
+                    db.execute(insert(TradeDB), missing)
+                db.commit()
+                return
+            except SQLAlchemyError as e:
+                db.rollback()
+                attempt += 1
+                with self._condition:
+                    self._errors += 1
+                if not is_transient(e):
+                    raise
+                logger.warning("Trade ledger batch of %d rows failed (attempt %d): %s", len(rows), attempt, e)
+                time.sleep(retry_seconds)
+                retry_seconds = min(retry_seconds * 2, MAX_RETRY_SECONDS)
+            finally:
+                db.close()
+
+
+trade_ledger = TradeLedger(
+    batch_size=int(os.environ.get(TRADE_LEDGER_BATCH_SIZE, DEFAULT_TRADE_LEDGER_BATCH_SIZE)),
+    flush_interval=float(os.environ.get(TRADE_LEDGER_FLUSH_INTERVAL_MS, DEFAULT_TRADE_LEDGER_FLUSH_INTERVAL_MS)) / 1000,
+    max_pending=int(os.environ.get(TRADE_LEDGER_MAX_PENDING, DEFAULT_TRADE_LEDGER_MAX_PENDING)),
+)
+atexit.register(trade_ledger.stop, SHUTDOWN_TIMEOUT_SECONDS)
+
+
+def encode_cursor(execution_ts: datetime, trade_id: str) -> str:
+    return base64.urlsafe_b64encode(f"{execution_ts.isoformat()}|{trade_id}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Raises ValueError for a cursor not produced by `encode_cursor`.
+    """
+    try:
+        execution_ts, trade_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|", 1)
+        return datetime.fromisoformat(execution_ts), trade_id
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def list_trades(db: Session, portfolio_id: str, limit: int, cursor: Optional[str] = None) -> Tuple[List[TradeDB], Optional[str]]:
+    """
+    One page of a portfolio's trades, newest first, and the cursor of the next page.
+    Keyset pagination on (execution_ts, id): the page continues strictly after the cursor's row, so it costs the
+    same index range scan however deep the page is, and concurrent inserts do not shift pages.
+    """
+    query = select(TradeDB).where(TradeDB.portfolio_id == portfolio_id)
+    if cursor is not None:
+        execution_ts, trade_id = decode_cursor(cursor)
+        query = query.where(or_(TradeDB.execution_ts < execution_ts,
+                                and_(TradeDB.execution_ts == execution_ts, TradeDB.id < trade_id)))
+    rows = list(db.scalars(query.order_by(TradeDB.execution_ts.desc(), TradeDB.id.desc()).limit(limit + 1)))
+    if len(rows) <= limit:
+        return rows, None
+    last = rows[limit - 1]
+    return rows[:limit], encode_cursor(last.execution_ts, last.id)
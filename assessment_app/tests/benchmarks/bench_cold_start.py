@@ -0,0 +1,76 @@
+"""
+Cold start: time from launching a uvicorn worker to the first request it serves, `/ready` answering 200.
+
+    python -m assessment_app.tests.benchmarks.bench_cold_start [--restarts 5]
+
+The first start runs on an empty SQLite database (tables created, every csv file ingested); the restarts reuse
+it, so ingestion skips the unchanged files, like a worker restarted next to a running database. Redis is an
+in-process fakeredis. Reports the wall time seen by the client and the lifespan startup time the app reports.
+"""
+import argparse
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import numpy as np
+
+POLL_INTERVAL_SECONDS = 0.005
+SERVER = """
+from assessment_app.tests.benchmarks.harness import use_fakeredis
+use_fakeredis()
+import uvicorn
+uvicorn.run("assessment_app.main:app", host="127.0.0.1", port={port}, log_level="warning")
+"""
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_once(database_url: str, timeout: float) -> dict:
+    port = free_port()
+    env = {**os.environ, "DATABASE_URL": database_url}
+    started = time.perf_counter()
+    server = subprocess.Popen([sys.executable, "-c", SERVER.format(port=port)], env=env)
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}/ready") as response:
+                    seconds = time.perf_counter() - started
+                    return {"first_request_seconds": seconds, "startup_seconds": json.load(response)["startup_seconds"]}
+            except (urllib.error.URLError, ConnectionError):
+                if server.poll() is not None:
+                    raise RuntimeError(f"Server exited with status {server.returncode}")
+                time.sleep(POLL_INTERVAL_SECONDS)
+        raise RuntimeError(f"Server not ready after {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--restarts", type=int, default=5)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    args = parser.parse_args()
+
+    database_url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "cold_start.db")
+    cold = start_once(database_url, args.timeout)
+    restarts = [start_once(database_url, args.timeout) for _ in range(args.restarts)]
+    print(json.dumps({
+        "cold": cold,
+        "restart_median": {key: float(np.median([run[key] for run in restarts])) for key in cold},
+        "restarts": restarts,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main()
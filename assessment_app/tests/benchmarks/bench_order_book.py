@@ -0,0 +1,76 @@
+"""
+Insert, cancel and match throughput of the in-memory order books, without the database.
+
+    python -m assessment_app.tests.benchmarks.bench_order_book [--orders 50000] [--portfolios 100] [--days 250]
+
+Orders are spread over every portfolio and symbol with prices around a random walk, a third of them is
+cancelled, and the rest is matched against one bar per symbol and trading day of every portfolio.
+"""
+import argparse
+import json
+import time
+from datetime import date, datetime, timedelta
+
+import numpy as np
+
+from assessment_app.models.constants import OrderType, StockSymbols, TradeType
+from assessment_app.service.order_book import OrderBooks
+
+SYMBOLS = [symbol.value for symbol in StockSymbols]
+PLACED_AT = datetime(2023, 1, 1)
+
+
+def rate(count: int, seconds: float) -> dict:
+    return {"count": count, "seconds": round(seconds, 4), "per_sec": round(count / seconds) if seconds else None}
+
+
+def run(orders: int, portfolios: int, days: int, seed: int = 0) -> dict:
+    rng = np.random.default_rng(seed)
+    books = OrderBooks()
+    portfolio_ids = [f"p{i}" for i in range(portfolios)]
+    sides = rng.choice([TradeType.BUY, TradeType.SELL], orders)
+    kinds = rng.choice([OrderType.LIMIT, OrderType.STOP], orders)
+    prices = 100 * np.exp(rng.normal(0, 0.05, orders))
+    owners = rng.integers(0, portfolios, orders)
+    symbols = rng.integers(0, len(SYMBOLS), orders)
+
+    # 1. Insert
+    started = time.perf_counter()
+    placed = [books.place(portfolio_ids[owners[i]], SYMBOLS[symbols[i]], sides[i], kinds[i], float(prices[i]), 1, PLACED_AT)
+              for i in range(orders)]
+    inserted = rate(orders, time.perf_counter() - started)
+
+    # 2. Cancel a third
+    cancelled_orders = placed[::3]
+    started = time.perf_counter()
+    for order in cancelled_orders:
+        books.cancel(order.id, order.portfolio_id)
+    cancelled = rate(len(cancelled_orders), time.perf_counter() - started)
+
+    # 3. Match daily bars of a random walk until every order filled or the days run out
+    closes = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (days, len(SYMBOLS))), axis=0))
+    fills, bars = 0, 0
+    started = time.perf_counter()
+    for day_index in range(days):
+        day = date(2023, 1, 2) + timedelta(days=day_index)
+        for j, symbol in enumerate(SYMBOLS):
+            close = closes[day_index, j]
+            for portfolio_id in portfolio_ids:
+                fills += len(books.match(portfolio_id, symbol, day, close, close * 1.01, close * 0.99))
+                bars += 1
+    seconds = time.perf_counter() - started
+    matched = {**rate(fills, seconds), "bars": bars, "open_orders_left": len(books)}
+    return {"orders": orders, "portfolios": portfolios, "insert": inserted, "cancel": cancelled, "match": matched}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--orders", type=int, default=50000)
+    parser.add_argument("--portfolios", type=int, default=100)
+    parser.add_argument("--days", type=int, default=250)
+    args = parser.parse_args()
+    print(json.dumps(run(args.orders, args.portfolios, args.days), indent=2))
+
+
+if __name__ == "__main__":
+    main()
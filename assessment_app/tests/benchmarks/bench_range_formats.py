@@ -0,0 +1,98 @@
+"""
+Peak RSS and latency of /market/data/range for every response format, over a multi-year synthetic history.
+
+    python -m assessment_app.tests.benchmarks.bench_range_formats [--years 30] [--requests 40] [--concurrency 8]
+
+Every format runs in its own subprocess, so the reported peak RSS growth belongs to that format alone. Every
+request starts one trading day later than the previous one, so none is answered from the response cache.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from assessment_app.models.constants import RangeFormat
+from assessment_app.tests.benchmarks.harness import call_asgi, latency_summary, peak_rss_mb
+
+SYMBOL = "SYNTHETIC"
+
+
+def synthetic_prices(years: int):
+    from assessment_app.repository.price_store import SymbolPrices
+
+    dates = np.arange(np.datetime64("1990-01-01"), np.datetime64("1990-01-01") + int(years * 365.25), dtype="datetime64[D]")
+    dates = dates[np.is_busday(dates)]
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(0).normal(0, 0.01, len(dates))))
+    open = np.roll(close, 1)
+    return SymbolPrices(SYMBOL, dates, open, np.maximum(open, close), np.minimum(open, close), close, close,
+                        np.full(len(dates), 1000))
+
+
+async def run_format(response_format: RangeFormat, years: int, requests: int, concurrency: int) -> dict:
+    from assessment_app.main import app
+    from assessment_app.repository.price_store import get_price_store
+    from assessment_app.service.auth_service import get_current_user
+
+    prices = synthetic_prices(years)
+    get_price_store().put(prices)
+    app.dependency_overrides[get_current_user] = lambda: "benchmark@example.com"
+
+    def params(i: int) -> dict:
+        return {"stock_symbol": SYMBOL, "from_ts": f"{prices.dates[i]}T00:00:00", "to_ts": "2100-01-01T00:00:00",
+                "format": response_format.value}
+
+    await call_asgi(app, "POST", "/market/data/range", params(0))
+    rss_before = peak_rss_mb()
+    latencies, sizes = [], []
+    started = time.perf_counter()
+    for first in range(1, requests + 1, concurrency):
+        results = await asyncio.gather(*(call_asgi(app, "POST", "/market/data/range", params(i))
+                                         for i in range(first, first + concurrency)))
+        for status, size, seconds in results:
+            assert status == 200, status
+            latencies.append(seconds)
+            sizes.append(size)
+    elapsed = time.perf_counter() - started
+
+    return {
+        "format": response_format.value,
+        "rows": len(prices),
+        "response_bytes": max(sizes),
+        "requests": len(latencies),
+        "concurrency": concurrency,
+        "throughput_rps": len(latencies) / elapsed,
+        **latency_summary(latencies),
+        "peak_rss_growth_mb": peak_rss_mb() - rss_before,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--years", type=int, default=30)
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--format", type=RangeFormat, help="Run a single format in this process")
+    args = parser.parse_args()
+
+    if args.format:
+        print(json.dumps(asyncio.run(run_format(args.format, args.years, args.requests, args.concurrency))))
+        return
+
+    results = []
+    for response_format in RangeFormat:
+        command = [sys.executable, "-m", __spec__.name, "--format", response_format.value, "--years", str(args.years),
+                   "--requests", str(args.requests), "--concurrency", str(args.concurrency)]
+        completed = subprocess.run(command, capture_output=True, text=True)
+        if completed.returncode != 0:
+            results.append({"format": response_format.value, "error": completed.stderr.strip().splitlines()[-1]})
+            continue
+        results.append(json.loads(completed.stdout.strip().splitlines()[-1]))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,94 @@
+"""
+Small helpers shared by the benchmark scripts of this folder.
+"""
+import asyncio
+import resource
+import time
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlencode
+
+import numpy as np
+
+
+async def call_asgi(app, method: str, path: str, params: Optional[dict] = None, headers: Optional[Dict[str, str]] = None,
+                    body: bytes = b"", response_headers: Optional[Dict[str, str]] = None) -> Tuple[int, int, float]:
+    """
+    Send one request straight to an ASGI app and discard the response body as it is produced, so only the
+    server side is measured. Returns (status code, body bytes, seconds to the last byte).
+    The response headers are copied into `response_headers` when given.
+    """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": urlencode(params or {}).encode(),
+        "root_path": "",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in (headers or {}).items()],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    request_sent = False
+    response_complete = asyncio.Event()
+    status, size = 0, 0
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        # Streaming responses listen for a disconnect, the client stays connected until the last byte
+        await response_complete.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        nonlocal status, size
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            if response_headers is not None:
+                response_headers.update((key.decode(), value.decode()) for key, value in message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            size += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                response_complete.set()
+
+    started = time.perf_counter()
+    await app(scope, receive, send)
+    return status, size, time.perf_counter() - started
+
+
+def latency_summary(latencies: List[float]) -> Dict[str, float]:
+    """
+    p50/p95/p99/max of latencies given in seconds, reported in milliseconds.
+    """
+    values = np.asarray(latencies) * 1000
+    return {
+        "p50_ms": float(np.percentile(values, 50)),
+        "p95_ms": float(np.percentile(values, 95)),
+        "p99_ms": float(np.percentile(values, 99)),
+        "max_ms": float(values.max()),
+    }
+
+
+def peak_rss_mb() -> float:
+    """
+    Peak resident set size of the current process (ru_maxrss is in kilobytes on Linux).
+    """
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def use_fakeredis():
+    """
+    Point every Redis client of the app at one in-memory fakeredis server, like the test suite does.
+    """
+    import fakeredis
+
+    from assessment_app.repository import redis_client
+
+    server = fakeredis.FakeServer()
+    redis_client._create_client = lambda: fakeredis.FakeRedis(server=server)
+    redis_client._create_async_client = lambda: fakeredis.FakeAsyncRedis(server=server)
+    redis_client.reset_clients()
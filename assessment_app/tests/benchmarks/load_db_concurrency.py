@@ -0,0 +1,88 @@
+"""
+Throughput of database-bound endpoints as the number of concurrent clients grows.
+
+    python -m assessment_app.tests.benchmarks.load_db_concurrency [--levels 1,2,4,8,16,32] [--requests 200]
+                                                                  [--db-latency-ms 0]
+
+Runs against the database configured for the app. `--db-latency-ms` adds a sleep to every statement to stand
+in for the network round trip of a remote database: with the handlers on the worker threadpool, throughput
+keeps scaling with concurrency instead of staying flat as it does when queries run on the event loop.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from datetime import datetime
+
+from sqlalchemy import event
+
+from assessment_app.tests.benchmarks.harness import call_asgi, latency_summary
+
+USER_ID = "load-test@example.com"
+
+
+def create_portfolio(session_factory) -> str:
+    from assessment_app.repository.database import HoldingDB, PortfolioDB
+
+    db = session_factory()
+    try:
+        portfolio_id = str(uuid.uuid4())
+        db.add(PortfolioDB(id=portfolio_id, user_id=USER_ID, cash_remaining=1000000.0, current_ts=datetime(2024, 1, 2)))
+        for symbol in ("HDFCBANK", "ICICIBANK", "RELIANCE", "TATAMOTORS"):
+            db.add(HoldingDB(id=str(uuid.uuid4()), portfolio_id=portfolio_id, symbol=symbol, price=100.0, quantity=10))
+        db.commit()
+        return portfolio_id
+    finally:
+        db.close()
+
+
+async def run_level(app, portfolio_id: str, concurrency: int, requests: int) -> dict:
+    queue = asyncio.Queue()
+    for i in range(requests):
+        queue.put_nowait(i)
+    latencies = []
+
+    async def client():
+        while not queue.empty():
+            i = queue.get_nowait()
+            if i % 2:
+                response = await call_asgi(app, "GET", "/portfolio-net-worth", {"portfolio_id": portfolio_id})
+            else:
+                response = await call_asgi(app, "GET", f"/portfolio/{portfolio_id}", {"current_ts": "2024-01-02T00:00:00"})
+            assert response[0] == 200, response
+            latencies.append(response[2])
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"concurrency": concurrency, "requests": requests, "throughput_rps": requests / elapsed,
+            **latency_summary(latencies)}
+
+
+async def main_async(levels, requests: int, db_latency_ms: float):
+    from assessment_app.main import app
+    from assessment_app.repository.database import SessionLocal, get_engine
+    from assessment_app.service.auth_service import get_current_user
+
+    if db_latency_ms:
+        event.listen(get_engine(), "before_cursor_execute", lambda *args: time.sleep(db_latency_ms / 1000))
+    app.dependency_overrides[get_current_user] = lambda: USER_ID
+
+    async with app.router.lifespan_context(app):
+        portfolio_id = create_portfolio(SessionLocal)
+        return [await run_level(app, portfolio_id, concurrency, requests) for concurrency in levels]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--levels", default="1,2,4,8,16,32")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--db-latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    levels = [int(level) for level in args.levels.split(",")]
+    print(json.dumps(asyncio.run(main_async(levels, args.requests, args.db_latency_ms)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
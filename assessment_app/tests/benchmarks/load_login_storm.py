@@ -0,0 +1,101 @@
+"""
+Latency of unrelated endpoints while a storm of logins is being verified.
+
+    python -m assessment_app.tests.benchmarks.load_login_storm [--logins 64] [--login-concurrency 16]
+                                                               [--probes 200]
+
+Registers one user, then runs `--login-concurrency` clients logging in `--logins` times in total next to a
+client probing `GET /` and a market data tick one request at a time, and reports the probe latency with
+and without the storm. Runs against the Redis configured for the app; BCRYPT_ROUNDS sets the cost factor.
+With bcrypt on the event loop every probe waits for the logins ahead of it; with the hashing pool the
+probe p99 stays close to the idle one.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from urllib.parse import urlencode
+
+from assessment_app.tests.benchmarks.harness import call_asgi, latency_summary
+
+PROBES = [
+    ("GET", "/", {}),
+    ("POST", "/market/data/tick", {"stock_symbol": "HDFCBANK", "current_ts": "2024-01-02T00:00:00"}),
+]
+
+
+async def probe(app, count: int, stop: asyncio.Event = None) -> list:
+    latencies = []
+    for i in range(count):
+        if stop is not None and stop.is_set():
+            break
+        method, path, params = PROBES[i % len(PROBES)]
+        status, _, seconds = await call_asgi(app, method, path, params)
+        assert status == 200, (path, status)
+        latencies.append(seconds)
+    return latencies
+
+
+async def login_storm(app, email: str, password: str, logins: int, concurrency: int) -> list:
+    queue = asyncio.Queue()
+    for i in range(logins):
+        queue.put_nowait(i)
+    body = urlencode({"username": email, "password": password}).encode()
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    latencies = []
+
+    async def client():
+        while not queue.empty():
+            queue.get_nowait()
+            status, _, seconds = await call_asgi(app, "POST", "/login", headers=headers, body=body)
+            assert status == 200, status
+            latencies.append(seconds)
+
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return latencies
+
+
+async def main_async(logins: int, login_concurrency: int, probes: int) -> dict:
+    from assessment_app.main import app
+    from assessment_app.service.auth_service import get_current_user
+    from assessment_app.service.password_hasher import password_hasher
+
+    app.dependency_overrides[get_current_user] = lambda: "load-test@example.com"
+    email, password = f"storm-{uuid.uuid4().hex[:8]}@example.com", "correct horse battery staple"
+    async with app.router.lifespan_context(app):
+        user = {"email": email, "first_name": "Storm", "last_name": "Test", "password": password}
+        status, _, _ = await call_asgi(app, "POST", "/register", headers={"Content-Type": "application/json"},
+                                       body=json.dumps(user).encode())
+        assert status == 200, status
+
+        idle = await probe(app, probes)
+
+        stop = asyncio.Event()
+        started = time.perf_counter()
+        storm = asyncio.ensure_future(login_storm(app, email, password, logins, login_concurrency))
+        storm.add_done_callback(lambda _: stop.set())
+        busy = await probe(app, probes * 100, stop)
+        login_latencies = await storm
+        elapsed = time.perf_counter() - started
+
+    return {
+        "bcrypt": password_hasher.snapshot(),
+        "logins": {"count": logins, "concurrency": login_concurrency, "throughput_rps": logins / elapsed,
+                   **latency_summary(login_latencies)},
+        "probe_idle": {"count": len(idle), **latency_summary(idle)},
+        "probe_during_logins": {"count": len(busy), **latency_summary(busy)},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=64)
+    parser.add_argument("--login-concurrency", type=int, default=16)
+    parser.add_argument("--probes", type=int, default=200)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(main_async(args.logins, args.login_concurrency, args.probes)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Throughput and latency of the main endpoints against local stand-ins: a throwaway SQLite database and fakeredis.
+
+    python -m assessment_app.tests.benchmarks.suite [--concurrency 8] [--requests 400] [--auth-requests 40]
+                                                    [--output results.json] [--baseline PATH] [--threshold 1.5]
+                                                    [--write-baseline]
+
+Every endpoint runs on its own: `--concurrency` clients send `--requests` requests in total (`--auth-requests`
+for register and login, which are bound by bcrypt), straight to the ASGI app with the lifespan running, after
+a few warm-up requests. Results are printed as JSON. Range requests each ask for another window, so they
+measure uncached answers.
+
+With `--baseline`, the suite exits with status 1 when an endpoint's p95 latency grew, or its throughput fell,
+by more than `--threshold` times the baseline (p95 changes under `--min-delta-ms` are noise). The baseline
+committed next to this file was recorded with the default options; re-record it with `--write-baseline` after
+an intended change or on other hardware.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import tempfile
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, Dict, List, NamedTuple, Optional
+from urllib.parse import urlencode
+
+from assessment_app.tests.benchmarks.harness import call_asgi, latency_summary, use_fakeredis
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+PASSWORD = "correct horse battery staple"
+SYMBOLS = ("HDFCBANK", "ICICIBANK", "RELIANCE", "TATAMOTORS")
+# Trades buy one share on the portfolio's current day at that day's average price, so they always pass validation
+TRADE_DAY = datetime(2023, 7, 18)
+TRADE_PRICE = (69.099998 + 70.709999) / 2
+JSON = {"Content-Type": "application/json"}
+FORM = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+class Request(NamedTuple):
+    method: str
+    path: str
+    params: Optional[dict] = None
+    headers: Optional[Dict[str, str]] = None
+    body: bytes = b""
+
+
+class Endpoint(NamedTuple):
+    name: str
+    # Request number -> request
+    request: Callable[[int], Request]
+    auth: bool = False
+
+
+def endpoints(run_id: str, email: str, cookie: Dict[str, str], portfolio_id: str) -> List[Endpoint]:
+    from assessment_app.repository.price_store import get_price_store
+
+    def register(i: int) -> Request:
+        user = {"email": f"bench-{run_id}-{i}@example.com", "first_name": "Bench", "last_name": "User", "password": PASSWORD}
+        return Request("POST", "/register", headers=JSON, body=json.dumps(user).encode())
+
+    def login(i: int) -> Request:
+        return Request("POST", "/login", headers=FORM, body=urlencode({"username": email, "password": PASSWORD}).encode())
+
+    def tick(i: int) -> Request:
+        day = f"2023-{8 + i % 5:02d}-{1 + i % 28:02d}T00:00:00"
+        return Request("POST", "/market/data/tick", {"stock_symbol": SYMBOLS[i % len(SYMBOLS)], "current_ts": day}, cookie)
+
+    def market_range(i: int) -> Request:
+        # Every request starts on another trading day, up to the end of the data: the response cache would
+        # otherwise answer all but the first request per symbol
+        symbol = SYMBOLS[i % len(SYMBOLS)]
+        dates = get_price_store().get(symbol).dates
+        from_day = dates[i // len(SYMBOLS) % len(dates)]
+        params = {"stock_symbol": symbol, "from_ts": f"{from_day}T00:00:00", "to_ts": "2024-07-18T00:00:00"}
+        return Request("POST", "/market/data/range", params, cookie)
+
+    def trade(i: int) -> Request:
+        body = {"symbol": "HDFCBANK", "price": TRADE_PRICE, "quantity": 1, "type": "BUY", "execution_ts": TRADE_DAY.isoformat()}
+        return Request("POST", "/market/trade", headers={**cookie, **JSON}, body=json.dumps(body).encode())
+
+    def net_worth(i: int) -> Request:
+        return Request("GET", "/portfolio-net-worth", {"portfolio_id": portfolio_id}, cookie)
+
+    return [
+        Endpoint("register", register, auth=True),
+        Endpoint("login", login, auth=True),
+        Endpoint("market_data_tick", tick),
+        Endpoint("market_data_range", market_range),
+        Endpoint("trade", trade),
+        Endpoint("portfolio_net_worth", net_worth),
+    ]
+
+
+async def run_endpoint(app, endpoint: Endpoint, requests: int, concurrency: int, warmup: int) -> dict:
+    counter = itertools.count()
+    latencies, errors = [], 0
+
+    async def client(count: int, record: bool):
+        nonlocal errors
+        while (i := next(counter)) < count:
+            request = endpoint.request(i)
+            status, _, seconds = await call_asgi(app, request.method, request.path, request.params, request.headers, request.body)
+            if record:
+                latencies.append(seconds)
+                errors += status != 200
+
+    await asyncio.gather(*(client(warmup, False) for _ in range(min(concurrency, warmup))))
+    counter = itertools.count(warmup)
+    started = time.perf_counter()
+    await asyncio.gather(*(client(warmup + requests, True) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {"requests": requests, "concurrency": concurrency, "errors": errors, "throughput_rps": requests / elapsed,
+            **latency_summary(latencies)}
+
+
+def create_portfolio(session_factory, user_id: str) -> str:
+    from assessment_app.repository.database import PortfolioDB
+
+    db = session_factory()
+    try:
+        portfolio_id = str(uuid.uuid4())
+        db.add(PortfolioDB(id=portfolio_id, user_id=user_id, cash_remaining=1e12, current_ts=TRADE_DAY))
+        db.commit()
+        return portfolio_id
+    finally:
+        db.close()
+
+
+async def run_suite(requests: int, auth_requests: int, concurrency: int) -> dict:
+    from assessment_app.main import app
+    from assessment_app.repository.database import SessionLocal
+    from assessment_app.service.password_hasher import password_hasher
+
+    run_id = uuid.uuid4().hex[:8]
+    email = f"bench-{run_id}@example.com"
+    async with app.router.lifespan_context(app):
+        # 1. A user, its session cookie and a portfolio to trade in
+        user = {"email": email, "first_name": "Bench", "last_name": "User", "password": PASSWORD}
+        status, _, _ = await call_asgi(app, "POST", "/register", headers=JSON, body=json.dumps(user).encode())
+        assert status == 200, status
+        headers: Dict[str, str] = {}
+        body = urlencode({"username": email, "password": PASSWORD}).encode()
+        status, _, _ = await call_asgi(app, "POST", "/login", headers=FORM, body=body, response_headers=headers)
+        assert status == 200, status
+        cookie = {"Cookie": headers["set-cookie"].split(";", 1)[0]}
+        portfolio_id = create_portfolio(SessionLocal, email)
+
+        # 2. Every endpoint on its own
+        results = {}
+        for endpoint in endpoints(run_id, email, cookie, portfolio_id):
+            count = auth_requests if endpoint.auth else requests
+            results[endpoint.name] = await run_endpoint(app, endpoint, count, concurrency, max(1, min(count // 10, 20)))
+
+    return {
+        "config": {"requests": requests, "auth_requests": auth_requests, "concurrency": concurrency,
+                   "bcrypt_rounds": password_hasher.rounds, "database": "sqlite", "redis": "fakeredis"},
+        "endpoints": results,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> List[str]:
+    """
+    Endpoints of `results` that regressed against `baseline`, as human readable lines.
+    """
+    regressions = []
+    for name, base in baseline["endpoints"].items():
+        current = results["endpoints"].get(name)
+        if current is None:
+            continue
+        if current["errors"]:
+            regressions.append(f"{name}: {current['errors']} failed requests")
+        if current["p95_ms"] > base["p95_ms"] * threshold and current["p95_ms"] - base["p95_ms"] > min_delta_ms:
+            regressions.append(f"{name}: p95 {current['p95_ms']:.2f} ms vs baseline {base['p95_ms']:.2f} ms")
+        if current["throughput_rps"] * threshold < base["throughput_rps"]:
+            regressions.append(f"{name}: {current['throughput_rps']:.0f} req/s vs baseline {base['throughput_rps']:.0f} req/s")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--auth-requests", type=int, default=40)
+    parser.add_argument("--bcrypt-rounds", type=int, default=4, help="bcrypt cost factor of the app under test")
+    parser.add_argument("--output", help="Also write the results to this file")
+    parser.add_argument("--baseline", help=f"Fail on regressions against this file, e.g. {BASELINE_PATH}")
+    parser.add_argument("--threshold", type=float, default=1.5)
+    parser.add_argument("--min-delta-ms", type=float, default=2.0)
+    parser.add_argument("--write-baseline", action="store_true", help=f"Store the results as {BASELINE_PATH}")
+    args = parser.parse_args()
+
+    # The stand-ins are configured before the app is imported
+    os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["BCRYPT_ROUNDS"] = str(args.bcrypt_rounds)
+    use_fakeredis()
+
+    results = asyncio.run(run_suite(args.requests, args.auth_requests, args.concurrency))
+    output = json.dumps(results, indent=2)
+    print(output)
+    for path in filter(None, [args.output, BASELINE_PATH if args.write_baseline else None]):
+        with open(path, "w") as file:
+            file.write(output + "\n")
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.threshold, args.min_delta_ms)
+        for regression in regressions:
+            print(f"REGRESSION {regression}", file=sys.stderr)
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
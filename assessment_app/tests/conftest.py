@@ -0,0 +1,35 @@
+import os
+import tempfile
+
+import fakeredis
+import pytest
+
+# Tests run against a throwaway SQLite database unless DATABASE_URL points elsewhere
+os.environ.setdefault("DATABASE_URL", "sqlite:///" + os.path.join(tempfile.mkdtemp(), "test.db"))
+
+
+@pytest.fixture(autouse=True, scope="session")
+def fake_redis():
+    """
+    Every Redis client of the app talks to one in-memory fakeredis server.
+    """
+    from assessment_app.repository import redis_client
+
+    server = fakeredis.FakeServer()
+    create_client, create_async_client = redis_client._create_client, redis_client._create_async_client
+    redis_client._create_client = lambda: fakeredis.FakeRedis(server=server)
+    redis_client._create_async_client = lambda: fakeredis.FakeAsyncRedis(server=server)
+    redis_client.reset_clients()
+    yield server
+    redis_client._create_client, redis_client._create_async_client = create_client, create_async_client
+    redis_client.reset_clients()
+
+
+@pytest.fixture(autouse=True, scope="session")
+def database():
+    """
+    The app creates its tables on startup; tests that skip the lifespan need them too.
+    """
+    from assessment_app.repository.database import init_db
+
+    init_db()
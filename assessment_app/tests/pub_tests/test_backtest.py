@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from assessment_app.models.constants import SweepRankBy
+from assessment_app.repository.price_store import DATA_DIR, PriceStore
+from assessment_app.service.backtest_service import run_backtest
+from assessment_app.service.sweep_service import expand_grid, run_sweep, sweep_pool
+from assessment_app.utils.utils import compute_cagr, rolling_mean
+
+SYMBOLS = ["HDFCBANK", "ICICIBANK", "RELIANCE", "TATAMOTORS"]
+START, END = datetime(2023, 7, 18), datetime(2024, 7, 18)
+
+
+@pytest.fixture(scope="module")
+def store():
+    price_store = PriceStore()
+    price_store.load_from_csv(DATA_DIR)
+    return price_store
+
+
+def test_compute_cagr():
+    assert compute_cagr(100.0, 112.0, datetime(2023, 1, 1), datetime(2023, 1, 1) + (END - START)) == pytest.approx(12.0, rel=1e-2)
+    with pytest.raises(ValueError):
+        compute_cagr(100.0, 112.0, END, START)
+
+
+def test_rolling_mean():
+    values = np.array([[1.0], [2.0], [3.0], [4.0]])
+    assert np.allclose(rolling_mean(values, 2)[1:, 0], [1.5, 2.5, 3.5])
+    assert np.isnan(rolling_mean(values, 2)[0, 0])
+
+
+def test_buy_and_hold_matches_manual_computation(store):
+    result = run_backtest(store, "0", SYMBOLS, START, END, 1000000.0)
+    trades = result.trades()
+    assert [trade.type for trade in trades] == ["BUY"] * 4
+
+    final_capital = result.cash[-1]
+    for trade in trades:
+        prices = store.get(trade.symbol)
+        final_capital += trade.quantity * prices.avg_price[prices.range_slice(START.date(), END.date())][-1]
+    assert result.final_capital == pytest.approx(final_capital)
+    assert result.profit_loss == pytest.approx(result.final_capital - 1000000.0)
+    assert result.annualized_return == pytest.approx(compute_cagr(1000000.0, result.final_capital, START, END))
+
+
+def test_sma_crossover_never_overspends(store):
+    result = run_backtest(store, "1", SYMBOLS, START, END, 1000000.0, {"fast": 5, "slow": 20})
+    assert len(result.trades()) > 4
+    assert (result.cash >= 0).all()
+    assert (result.positions >= 0).all()
+
+
+def test_invalid_requests(store):
+    with pytest.raises(KeyError):
+        run_backtest(store, "unknown", SYMBOLS, START, END, 1000000.0)
+    with pytest.raises(ValueError):
+        run_backtest(store, "1", SYMBOLS, START, END, 1000000.0, {"lookback": 3})
+    with pytest.raises(ValueError):
+        run_backtest(store, "0", SYMBOLS, END, START, 1000000.0)
+
+
+def test_expand_grid():
+    assert expand_grid({"slow": [20, 30], "fast": [5]}) == [{"fast": 5, "slow": 20}, {"fast": 5, "slow": 30}]
+    assert expand_grid({}) == [{}]
+
+
+def test_sweep_matches_single_backtests_and_is_ranked(store):
+    grid = {"fast": [5, 10], "slow": [20, 50]}
+    results = run_sweep(store, "1", grid, SYMBOLS, [(START, END)], 1000000.0, SweepRankBy.PROFIT_LOSS)
+
+    assert len(results) == 4
+    profits = [result.profit_loss for result in results]
+    assert profits == sorted(profits, reverse=True)
+    for result in results:
+        single = run_backtest(store, "1", SYMBOLS, START, END, 1000000.0, result.parameters)
+        assert result.final_capital == pytest.approx(single.final_capital)
+
+
+def test_sweeps_share_one_pool_and_are_validated_up_front(store, monkeypatch):
+    executor = sweep_pool.executor()
+    results = run_sweep(store, "1", {"fast": [5], "slow": [20]}, SYMBOLS, [(START, END)], 1000000.0)
+    assert len(results) == 1 and sweep_pool.executor() is executor
+
+    with pytest.raises(ValueError, match="Invalid parameter combination"):
+        run_sweep(store, "1", {"fast": [5, 30], "slow": [20]}, SYMBOLS, [(START, END)], 1000000.0)
+    monkeypatch.setattr(sweep_pool, "max_tasks", 3)
+    with pytest.raises(ValueError, match="4 backtests"):
+        run_sweep(store, "1", {"fast": [5, 10], "slow": [20, 50]}, SYMBOLS, [(START, END)], 1000000.0)
@@ -0,0 +1,13 @@
+from assessment_app.tests.benchmarks.suite import compare
+
+
+def result(p95_ms, throughput_rps, errors=0):
+    return {"p95_ms": p95_ms, "throughput_rps": throughput_rps, "errors": errors}
+
+
+def test_compare_flags_latency_throughput_and_error_regressions():
+    baseline = {"endpoints": {"tick": result(10.0, 1000.0), "trade": result(1.0, 100.0), "range": result(20.0, 300.0)}}
+    results = {"endpoints": {"tick": result(16.0, 600.0), "trade": result(2.5, 100.0, errors=2), "range": result(25.0, 250.0)}}
+    regressions = compare(results, baseline, threshold=1.5, min_delta_ms=2.0)
+    assert [line.split(":")[0] for line in regressions] == ["tick", "tick", "trade"]
+    assert compare(baseline, baseline, threshold=1.5, min_delta_ms=2.0) == []
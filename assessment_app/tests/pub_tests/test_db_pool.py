@@ -0,0 +1,30 @@
+import pytest
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.pool import QueuePool
+
+from assessment_app.repository.database import PoolMetrics
+
+
+def test_pool_metrics_count_checkouts_and_timeouts(tmp_path):
+    metrics = PoolMetrics()
+    engine = create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=QueuePool, pool_size=1, max_overflow=1,
+                           pool_timeout=0.01)
+    event.listen(engine, "connect", metrics.on_connect)
+    metrics.instrument(engine.pool)
+    try:
+        first, second = engine.connect(), engine.connect()
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+        snapshot = metrics.snapshot(engine.pool)
+        assert snapshot["connections_created"] == 2 and snapshot["checkouts"] == 2
+        assert snapshot["checkout_timeouts"] == 1
+        assert snapshot["checked_out"] == 2 and snapshot["saturation"] == 1.0
+        assert snapshot["checkout_wait_seconds_avg"] == snapshot["checkout_wait_seconds_total"] / 2
+        first.close()
+        second.close()
+        # Returned connections are reused, not created again
+        engine.connect().close()
+        snapshot = metrics.snapshot(engine.pool)
+        assert snapshot["connections_created"] == 2 and snapshot["checkouts"] == 3 and snapshot["checked_out"] == 0
+    finally:
+        engine.dispose()
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from assessment_app.models.constants import IndicatorType
+from assessment_app.repository.price_store import DATA_DIR, PriceStore, SymbolPrices
+from assessment_app.service.indicators import INDICATORS, IndicatorCache, exponential_average
+
+
+@pytest.fixture(scope="module")
+def prices():
+    store = PriceStore()
+    store.load_from_csv(DATA_DIR)
+    return store.get("HDFCBANK")
+
+
+def head(prices, n):
+    return SymbolPrices(prices.symbol, prices.dates[:n], prices.open[:n], prices.high[:n], prices.low[:n],
+                        prices.close[:n], prices.adj_close[:n], prices.volume[:n])
+
+
+def test_exponential_average_matches_recurrence():
+    values = np.random.default_rng(7).normal(100, 5, 3000)
+    expected, previous = [], 50.0
+    for value in values:
+        previous += 0.6 * (value - previous)
+        expected.append(previous)
+    assert np.allclose(exponential_average(values, 0.6, 50.0), expected)
+
+
+def test_vectorized_history_matches_reference(prices):
+    avg = prices.avg_price
+    sma = INDICATORS[IndicatorType.SMA](5).compute(avg)
+    assert np.isnan(sma[:4]).all()
+    assert sma[10] == pytest.approx(avg[6:11].mean())
+    std = INDICATORS[IndicatorType.STD](5).compute(avg)
+    assert std[10] == pytest.approx(avg[6:11].std(ddof=1))
+    drawdown = INDICATORS[IndicatorType.MAX_DRAWDOWN]().compute(avg)
+    assert drawdown[-1] == pytest.approx(min(avg[i] / avg[:i + 1].max() - 1 for i in range(len(avg))))
+    rsi = INDICATORS[IndicatorType.RSI](14).compute(avg)
+    assert np.isnan(rsi[:14]).all() and ((rsi[14:] >= 0) & (rsi[14:] <= 100)).all()
+
+
+@pytest.mark.parametrize("indicator", list(IndicatorType))
+def test_online_updates_match_full_recompute(prices, indicator):
+    window = None if indicator == IndicatorType.MAX_DRAWDOWN else 10
+    store, cache = PriceStore(), IndicatorCache()
+    store.put(head(prices, 5))
+    series = cache.get(prices.symbol, indicator, window, store)
+
+    for n in (30, 31, len(prices)):
+        store.put(head(prices, n))
+        assert cache.get(prices.symbol, indicator, window, store) is series
+    expected = INDICATORS[indicator](window).compute(prices.avg_price)
+    assert np.allclose(series.values, expected, equal_nan=True)
+
+    snapshot = cache.snapshot(prices.symbol, indicator, window, store)
+    assert snapshot.prices is store.get(prices.symbol) and np.allclose(snapshot.values, expected, equal_nan=True)
+
+
+def test_invalid_windows(prices):
+    cache = IndicatorCache()
+    with pytest.raises(ValueError):
+        cache.get(prices.symbol, IndicatorType.SMA, 1)
+    with pytest.raises(ValueError):
+        cache.get(prices.symbol, IndicatorType.MAX_DRAWDOWN, 5)
@@ -0,0 +1,108 @@
+import os
+import shutil
+
+import pytest
+from sqlalchemy import create_engine, delete, func, select
+from sqlalchemy.orm import sessionmaker
+
+from assessment_app.repository import ingestion
+from assessment_app.repository.database import Base, IngestedFileDB, StockDataDB
+from assessment_app.repository.ingestion import ingest_csv, ingest_data_dir
+from assessment_app.repository.price_store import DATA_DIR, PriceStore, read_symbol_csv
+from assessment_app.service.response_cache import ResponseCache
+
+HDFCBANK_CSV = os.path.join(DATA_DIR, "HDFCBANK.csv")
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = sessionmaker(bind=engine)()
+    yield session
+    session.close()
+
+
+@pytest.fixture(autouse=True)
+def store(monkeypatch):
+    store = PriceStore()
+    monkeypatch.setattr(ingestion, "price_store", store)
+    return store
+
+
+checksum = ingestion.file_checksum
+
+
+def count_rows(db, stock_symbol):
+    return db.scalar(select(func.count()).select_from(StockDataDB).where(StockDataDB.stock_symbol == stock_symbol))
+
+
+def test_ingest_csv_loads_all_rows(db):
+    result = ingest_csv(db, HDFCBANK_CSV)
+    assert not result.skipped
+    assert result.rows_read == result.rows_inserted == 253
+    assert count_rows(db, "HDFCBANK") == 253
+
+
+def test_unchanged_file_is_skipped(db):
+    ingest_csv(db, HDFCBANK_CSV)
+    result = ingest_csv(db, HDFCBANK_CSV)
+    assert result.skipped
+    assert result.rows_read == 0
+
+
+def test_only_files_whose_stat_changed_are_hashed(db, tmp_path, monkeypatch):
+    file_path = shutil.copy(HDFCBANK_CSV, tmp_path / "HDFCBANK.csv")
+    ingest_csv(db, file_path)
+    hashed = []
+    monkeypatch.setattr(ingestion, "file_checksum", lambda path: hashed.append(path) or checksum(path))
+    assert ingest_csv(db, file_path).skipped and hashed == []
+
+    # Touched, same contents: hashed once, then known by its new stat
+    os.utime(file_path, ns=(0, 10 ** 9))
+    assert ingest_csv(db, file_path).skipped and len(hashed) == 1
+    assert ingest_csv(db, file_path).skipped and len(hashed) == 1
+
+    # Changed contents are ingested again
+    with open(file_path, "a") as file:
+        file.write("\n2024-12-31,1,1,1,1,1,1")
+    result = ingest_csv(db, file_path)
+    assert not result.skipped and result.rows_inserted == 1
+
+
+def test_partly_loaded_file_is_completed(db):
+    # Rows loaded without their file being recorded, the way an interrupted run or another loader leaves them
+    ingest_csv(db, HDFCBANK_CSV)
+    db.execute(delete(StockDataDB).where(StockDataDB.date >= "2024-01-01"))
+    db.execute(delete(IngestedFileDB))
+    db.commit()
+
+    result = ingest_csv(db, HDFCBANK_CSV)
+    assert 0 < result.rows_inserted < result.rows_read
+    assert count_rows(db, "HDFCBANK") == 253
+
+
+def test_ingest_data_dir(db):
+    results = ingest_data_dir(db)
+    assert [result.stock_symbol for result in results] == ["HDFCBANK", "ICICIBANK", "RELIANCE", "TATAMOTORS"]
+    assert all(result.rows_per_sec > 0 for result in results)
+
+
+def test_inserted_rows_are_reloaded_into_the_price_store(db, store):
+    # Not loaded yet: startup loads the store after ingesting
+    ingest_csv(db, HDFCBANK_CSV)
+    assert not store.is_loaded
+
+    store.load_from_db(db)
+    db.execute(delete(StockDataDB).where(StockDataDB.date >= "2024-01-01"))
+    db.commit()
+    store.load_from_db(db)
+    stale = store.get("HDFCBANK")
+    cache = ResponseCache(max_bytes=1 << 20)
+    cache.put("range", stale, b"[]", "application/json")
+
+    ingest_csv(db, HDFCBANK_CSV, force=True)
+    prices = store.get("HDFCBANK")
+    assert len(stale) < len(prices) == 253
+    assert prices.close.tolist() == read_symbol_csv(HDFCBANK_CSV, "HDFCBANK").close.tolist()
+    assert cache.get("range", prices) is None
@@ -0,0 +1,70 @@
+from fastapi.testclient import TestClient
+
+from assessment_app.main import app
+from assessment_app.models.constants import PROFILING_ENABLED
+from assessment_app.repository.redis_client import get_redis
+from assessment_app.service.auth_service import get_current_user
+from assessment_app.utils import instrumentation
+from assessment_app.utils.instrumentation import Histogram, RequestStats
+
+client = TestClient(app)
+
+
+def metric(text, line_prefix):
+    return [float(line.rsplit(" ", 1)[1]) for line in text.splitlines() if line.startswith(line_prefix)]
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+    assert list(histogram.cumulative()) == [("1", 2), ("5", 3), ("+Inf", 4)]
+    assert histogram.sum == 14.5 and histogram.count == 4
+
+
+def test_requests_are_measured_per_route_with_their_queries():
+    app.dependency_overrides[get_current_user] = lambda: "metrics@example.com"
+    try:
+        assert client.get("/").status_code == 200
+        # No portfolio: the lookup query runs, then the request fails
+        assert client.get("/market/orders").status_code == 404
+    finally:
+        app.dependency_overrides.clear()
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert metric(text, 'http_request_duration_seconds_count{method="GET",route="/"}')[0] >= 1
+    assert metric(text, 'http_requests_total{method="GET",route="/market/orders",status="404"}')[0] >= 1
+    assert metric(text, 'db_queries_total{route="/market/orders"}')[0] >= 1
+    assert metric(text, 'http_request_db_queries_bucket{method="GET",route="/",le="0"}') == \
+        metric(text, 'http_request_db_queries_count{method="GET",route="/"}')
+    assert "trade_ledger_pending" in text and "password_hashing_rounds" in text
+
+
+def test_redis_round_trips_are_counted_for_the_current_request():
+    stats = RequestStats()
+    token = instrumentation._current.set(stats)
+    try:
+        get_redis().ping()
+        pipeline = get_redis().pipeline()
+        pipeline.get("a").get("b")
+        pipeline.execute()
+    finally:
+        instrumentation._current.reset(token)
+    assert stats.redis_calls == 2
+
+
+def test_profile_header_returns_folded_stacks(monkeypatch):
+    # Ignored unless profiling is enabled
+    assert client.get("/", headers={"X-Profile": "1"}).json() == {"message": "Welcome to the Stock Simulator"}
+
+    monkeypatch.setenv(PROFILING_ENABLED, "true")
+    response = client.get("/", headers={"X-Profile": "1"})
+    assert response.status_code == 200
+    assert response.headers["x-profile-status"] == "200"
+    assert int(response.headers["x-profile-samples"]) >= 1
+    for line in response.text.splitlines():
+        stack, count = line.rsplit(" ", 1)
+        assert stack.split(";")[0] in ("event loop", instrumentation.WORKER_THREAD_NAME) and int(count) >= 1
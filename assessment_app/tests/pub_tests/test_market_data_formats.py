@@ -0,0 +1,34 @@
+import io
+import json
+
+import numpy as np
+
+from assessment_app.models.constants import RangeFormat
+from assessment_app.models.models import TickData
+from assessment_app.service.market_data_formats import columnar_json, ndjson_lines, negotiate_format, npy_bytes
+
+DATES = np.array(["2023-07-18", "2023-07-19"], dtype="datetime64[D]")
+PRICES = np.array([69.9049985, 70.545002])
+
+
+def test_negotiate_format():
+    assert negotiate_format(None, None) == RangeFormat.JSON
+    assert negotiate_format(None, "text/html, application/x-ndjson;q=0.9") == RangeFormat.NDJSON
+    assert negotiate_format(RangeFormat.COLUMNAR, "application/x-npy") == RangeFormat.COLUMNAR
+
+
+def test_ndjson_lines_are_tick_data():
+    lines = b"".join(ndjson_lines("HDFCBANK", DATES, PRICES)).decode().splitlines()
+    ticks = [TickData(**json.loads(line)) for line in lines]
+    assert [tick.price for tick in ticks] == PRICES.tolist()
+    assert ticks[0].timestamp.isoformat() == "2023-07-18T00:00:00"
+
+
+def test_columnar_and_npy_round_trip():
+    columns = json.loads(columnar_json("HDFCBANK", DATES, PRICES))
+    assert columns["timestamps"] == ["2023-07-18T00:00:00", "2023-07-19T00:00:00"]
+    assert columns["prices"] == PRICES.tolist()
+
+    records = np.load(io.BytesIO(npy_bytes("HDFCBANK", DATES, PRICES)))
+    assert (records["timestamp"] == DATES).all()
+    assert (records["price"] == PRICES).all()
@@ -0,0 +1,69 @@
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from assessment_app.main import app
+from assessment_app.repository.price_store import PriceStore, SymbolPrices
+from assessment_app.routers import market_integration
+from assessment_app.service.auth_service import get_current_user
+
+client = TestClient(app)
+
+
+def symbol_prices(symbol, days, base):
+    dates = np.array([f"2024-01-{day:02d}" for day in days], dtype="datetime64[D]")
+    open = base + np.arange(len(days), dtype=np.float64)
+    close = open + 1
+    return SymbolPrices(symbol, dates, open, close + 1, open - 1, close, close, np.ones(len(days), dtype=np.int64))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    # ICICIBANK skips the 2nd and the 4th
+    store = PriceStore()
+    store.put(symbol_prices("HDFCBANK", [1, 2, 3, 4], 10.0))
+    store.put(symbol_prices("ICICIBANK", [1, 3], 100.0))
+    monkeypatch.setattr(market_integration, "get_price_store", lambda: store)
+    app.dependency_overrides[get_current_user] = lambda: "snapshot@example.com"
+    yield store
+    app.dependency_overrides.clear()
+
+
+def test_aligned_bars_last_bar():
+    store = PriceStore()
+    store.put(symbol_prices("HDFCBANK", [2, 3], 10.0))
+    store.put(symbol_prices("ICICIBANK", [1, 3], 100.0))
+    bars = store.aligned_bars(["HDFCBANK", "ICICIBANK"])
+    assert bars.last_bar.tolist() == [[-1, 0], [1, 0], [2, 2]]
+    rows = bars.bar_rows(slice(0, 3), forward_fill=False)
+    assert rows.tolist() == [[-1, 0], [1, -1], [2, 2]]
+    assert np.isnan(bars.take("open", rows)[0, 0]) and bars.take("open", rows)[2].tolist() == [11.0, 101.0]
+
+
+def test_snapshot_forward_fills_other_calendars(store):
+    response = client.get("/market/data/snapshot", params={"current_ts": "2024-01-04T12:00:00"})
+    assert response.status_code == 200
+    hdfc, icici = response.json()["bars"]
+    assert hdfc == {"stock_symbol": "HDFCBANK", "timestamp": "2024-01-04T00:00:00", "open": 13.0, "high": 15.0,
+                    "low": 12.0, "close": 14.0, "price": 13.5}
+    assert icici["timestamp"] == "2024-01-03T00:00:00" and icici["price"] == 101.5
+
+    params = {"current_ts": "2024-01-04T00:00:00", "forward_fill": False, "symbols": ["ICICIBANK"]}
+    assert client.get("/market/data/snapshot", params=params).json()["bars"] == [{
+        "stock_symbol": "ICICIBANK", "timestamp": None, "open": None, "high": None, "low": None, "close": None,
+        "price": None}]
+    # Before the first bar of every symbol, like /market/data/tick
+    assert client.get("/market/data/snapshot", params={"current_ts": "2023-12-31T00:00:00"}).status_code == 404
+
+
+def test_snapshot_range(store):
+    params = {"from_ts": "2024-01-02T00:00:00", "to_ts": "2024-01-31T00:00:00"}
+    data = client.get("/market/data/snapshot/range", params=params).json()
+    assert data["symbols"] == ["HDFCBANK", "ICICIBANK"]
+    assert data["timestamps"] == [f"2024-01-0{day}T00:00:00" for day in (2, 3, 4)]
+    assert data["price"] == [[11.5, 100.5], [12.5, 101.5], [13.5, 101.5]]
+
+    data = client.get("/market/data/snapshot/range", params={**params, "forward_fill": False}).json()
+    assert data["close"] == [[12.0, None], [13.0, 102.0], [14.0, None]]
+    assert client.get("/market/data/snapshot/range", params={**params, "to_ts": "2023-12-31T00:00:00"}).status_code == 404
+    assert client.get("/market/data/snapshot/range", params={**params, "symbols": ["RELIANCE"]}).status_code == 404
@@ -0,0 +1,123 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from assessment_app.main import app
+from assessment_app.models.constants import OrderStatus, OrderType, TradeType
+from assessment_app.repository.database import HoldingDB, PortfolioDB, SessionLocal
+from assessment_app.repository.price_store import get_price_store
+from assessment_app.routers import orders
+from assessment_app.service.auth_service import get_current_user
+from assessment_app.service.order_book import MIN_COMPACT_SIZE, OrderBooks
+
+USER_ID = "orders@example.com"
+PLACED_AT = datetime(2023, 7, 18)
+client = TestClient(app)
+
+
+def place(books, type, order_type, price, quantity=1):
+    return books.place("p1", "HDFCBANK", type, order_type, price, quantity, PLACED_AT)
+
+
+def test_limit_orders_fill_in_price_time_priority():
+    books = OrderBooks()
+    first = place(books, TradeType.BUY, OrderType.LIMIT, 70.0)
+    best = place(books, TradeType.BUY, OrderType.LIMIT, 71.0)
+    second = place(books, TradeType.BUY, OrderType.LIMIT, 70.0)
+    place(books, TradeType.BUY, OrderType.LIMIT, 60.0)
+    sell = place(books, TradeType.SELL, OrderType.LIMIT, 72.0)
+
+    fills = books.match("p1", "HDFCBANK", datetime(2023, 7, 19).date(), 71.5, 72.5, 69.5)
+    assert [order for order, _ in fills] == [sell, best, first, second]
+    # A bar opening beyond the limit fills at the open
+    assert [price for _, price in fills] == [72.0, 71.0, 70.0, 70.0]
+    assert len(books) == 1
+
+
+def test_stop_orders_trigger_on_the_bar_range():
+    books = OrderBooks()
+    buy_stop = place(books, TradeType.BUY, OrderType.STOP, 71.0)
+    sell_stop = place(books, TradeType.SELL, OrderType.STOP, 69.0)
+    assert books.match("p1", "HDFCBANK", datetime(2023, 7, 19).date(), 70.0, 70.5, 69.5) == []
+    fills = books.match("p1", "HDFCBANK", datetime(2023, 7, 20).date(), 68.0, 72.0, 67.0)
+    assert fills == [(sell_stop, 68.0), (buy_stop, 71.0)]
+
+
+def test_cancelled_orders_are_skipped_and_compacted():
+    books = OrderBooks()
+    orders = [place(books, TradeType.BUY, OrderType.LIMIT, 50.0 + i / 100) for i in range(2 * MIN_COMPACT_SIZE)]
+    for order in orders[:-1]:
+        assert books.cancel(order.id, "p1") is order
+    assert books.cancel(orders[0].id, "p1") is None
+    assert books.cancel(orders[-1].id, "other") is None
+    book = books._books["p1"]["HDFCBANK"]
+    assert len(book.buy_limits) < MIN_COMPACT_SIZE
+    assert books.match("p1", "HDFCBANK", datetime(2023, 7, 19).date(), 60.0, 60.0, 40.0) == [(orders[-1], 50.0 + 127 / 100)]
+    assert orders[0].status == OrderStatus.CANCELLED
+
+
+@pytest.fixture
+def portfolio_id():
+    app.dependency_overrides[get_current_user] = lambda: USER_ID
+    db = SessionLocal()
+    db.query(HoldingDB).delete()
+    db.query(PortfolioDB).delete()
+    portfolio = PortfolioDB(id=str(uuid.uuid4()), user_id=USER_ID, cash_remaining=100000.0, current_ts=PLACED_AT)
+    db.add(portfolio)
+    db.commit()
+    yield portfolio.id
+    db.close()
+    app.dependency_overrides.clear()
+
+
+def test_match_advances_the_clock_and_executes_fills(portfolio_id):
+    order = {"symbol": "HDFCBANK", "type": "BUY", "order_type": "LIMIT", "price": 70.0, "quantity": 10}
+    assert client.post("/market/orders", json=order).status_code == 200
+    stop = client.post("/market/orders", json={**order, "order_type": "STOP", "price": 71.1, "quantity": 5}).json()
+    resting = client.post("/market/orders", json={**order, "price": 60.0}).json()
+    client.post("/market/orders", json={**order, "type": "SELL", "order_type": "STOP", "price": 60.0, "quantity": 100})
+
+    response = client.post("/market/orders/match", params={"to_ts": "2023-07-21T00:00:00"})
+    assert response.status_code == 200
+    body = response.json()
+    # 2023-07-19 (high 71.16) triggers the stop, 2023-07-20 (low 69.94) the limit
+    assert [(o["id"] == stop["id"], o["filled_at"][:10], o["filled_price"]) for o in body["orders"]] == \
+        [(True, "2023-07-19", 71.1), (False, "2023-07-20", 70.0)]
+    assert body["cash_remaining"] == pytest.approx(100000.0 - 5 * 71.1 - 10 * 70.0)
+    assert body["current_ts"].startswith("2023-07-21")
+
+    assert [o["id"] for o in client.get("/market/orders").json()][0] == resting["id"]
+    assert client.delete(f"/market/orders/{resting['id']}").json()["status"] == "CANCELLED"
+    assert client.delete(f"/market/orders/{resting['id']}").status_code == 404
+    assert client.post("/market/orders/match", params={"to_ts": "2023-07-20T00:00:00"}).status_code == 400
+
+
+def test_failed_match_reopens_the_triggered_orders(portfolio_id, monkeypatch):
+    order = {"symbol": "HDFCBANK", "type": "BUY", "order_type": "LIMIT", "price": 70.0, "quantity": 10}
+    placed = client.post("/market/orders", json=order).json()
+
+    def fail(*args):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(orders.portfolio_service, "revalue", fail)
+    with pytest.raises(RuntimeError):
+        client.post("/market/orders/match", params={"to_ts": "2023-07-21T00:00:00"})
+    assert [(o["id"], o["status"], o["filled_at"]) for o in client.get("/market/orders").json()] == [(placed["id"], "OPEN", None)]
+
+    monkeypatch.undo()
+    assert client.post("/market/orders/match", params={"to_ts": "2023-07-21T00:00:00"}).json()["orders"][0]["status"] == "FILLED"
+
+
+def test_trades_cannot_skip_bars_of_open_orders(portfolio_id):
+    order = {"symbol": "HDFCBANK", "type": "BUY", "order_type": "LIMIT", "price": 60.0, "quantity": 1}
+    client.post("/market/orders", json=order)
+    prices = get_price_store().get("HDFCBANK")
+    price = float(prices.avg_price[prices.index_of(datetime(2023, 7, 20).date())])
+    trade = {"symbol": "HDFCBANK", "price": price, "quantity": 1, "type": "BUY", "execution_ts": "2023-07-20T00:00:00"}
+    response = client.post("/market/trade", json=trade)
+    assert response.status_code == 400 and "open orders" in response.json()["detail"]
+
+    assert client.post("/market/orders/match", params={"to_ts": "2023-07-20T00:00:00"}).status_code == 200
+    assert client.post("/market/trade", json=trade).status_code == 200
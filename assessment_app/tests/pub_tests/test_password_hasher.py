@@ -0,0 +1,62 @@
+import asyncio
+import threading
+
+import pytest
+
+from assessment_app.service.password_hasher import PasswordHasher, PasswordHasherBusy
+
+
+def test_hash_and_verify_on_the_pool():
+    hasher = PasswordHasher(rounds=4, workers=2, max_pending=8)
+
+    async def scenario():
+        hashed = await hasher.hash("secret")
+        return hashed, await asyncio.gather(hasher.verify("secret", hashed), hasher.verify("wrong", hashed))
+
+    hashed, results = asyncio.run(scenario())
+    assert hashed.startswith("$2b$04$")
+    assert results == [True, False]
+    snapshot = hasher.snapshot()
+    assert snapshot["completed"] == 3 and snapshot["queued"] == snapshot["running"] == 0
+    hasher.shutdown()
+
+
+def test_full_queue_rejects_immediately():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=0)
+    with pytest.raises(PasswordHasherBusy):
+        asyncio.run(hasher.hash("secret"))
+    assert hasher.snapshot()["rejected"] == 1
+    hasher.shutdown()
+
+
+def test_cancelled_caller_keeps_its_slot_until_the_hash_ends():
+    hasher = PasswordHasher(rounds=4, workers=1, max_pending=1)
+    started, release = asyncio.Event(), threading.Event()
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+
+        def slow_hash():
+            loop.call_soon_threadsafe(started.set)
+            release.wait(10)
+
+        task = asyncio.ensure_future(hasher._submit(slow_hash))
+        await started.wait()
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        # The hash is still running: its slot is still taken
+        with pytest.raises(PasswordHasherBusy):
+            await hasher.hash("secret")
+        assert hasher.snapshot()["queued"] == 0
+        release.set()
+        while True:
+            try:
+                return await hasher.hash("secret")
+            except PasswordHasherBusy:
+                await asyncio.sleep(0.01)
+
+    assert asyncio.run(scenario()).startswith("$2b$04$")
+    snapshot = hasher.snapshot()
+    assert snapshot["running"] == snapshot["queued"] == 0
+    hasher.shutdown()
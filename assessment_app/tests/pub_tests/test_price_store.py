@@ -0,0 +1,44 @@
+from datetime import date
+
+import pytest
+
+from assessment_app.repository.price_store import DATA_DIR, PriceStore
+
+
+@pytest.fixture
+def store():
+    price_store = PriceStore()
+    price_store.load_from_csv(DATA_DIR)
+    return price_store
+
+
+def test_load_from_csv(store):
+    assert store.symbols() == ["HDFCBANK", "ICICIBANK", "RELIANCE", "TATAMOTORS"]
+    assert len(store.get("HDFCBANK")) == 253
+    assert len(store.get("ICICIBANK")) == 244
+
+
+def test_index_of_and_average_price(store):
+    prices = store.get("HDFCBANK")
+    i = prices.index_of(date(2023, 7, 18))
+    assert i == 0
+    assert prices.avg_price[i] == pytest.approx((69.099998 + 70.709999) / 2)
+    assert prices.index_of(date(2023, 7, 22)) is None
+
+
+def test_range_slice(store):
+    prices = store.get("ICICIBANK")
+    rows = prices.range_slice(date(2023, 7, 1), date(2023, 7, 20))
+    assert [ts.date() for ts in prices.to_datetimes(rows)] == [date(2023, 7, 19), date(2023, 7, 20)]
+    empty = prices.range_slice(date(2020, 1, 1), date(2020, 12, 31))
+    assert empty.start == empty.stop
+
+
+def test_asof_index_uses_previous_trading_day(store):
+    prices = store.get("HDFCBANK")
+    friday = prices.index_of(date(2023, 7, 21))
+    assert prices.asof_index(date(2023, 7, 22)) == friday
+    assert prices.asof_index(date(2023, 7, 23)) == friday
+    assert prices.asof_index(date(2023, 7, 22), strict=True) is None
+    assert prices.asof_index(date(2023, 7, 17)) is None
+    assert prices.asof_index(date(2030, 1, 1)) == len(prices) - 1
@@ -0,0 +1,119 @@
+import asyncio
+import json
+from datetime import date
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from assessment_app.main import app
+from assessment_app.models.constants import ReplayPolicy, ReplayStatus
+from assessment_app.repository.price_store import DATA_DIR, PriceStore
+from assessment_app.service.auth_service import get_current_user
+from assessment_app.service.replay_service import ReplayManager, ReplaySubscriber, replay_manager
+
+
+@pytest.fixture
+def store():
+    price_store = PriceStore()
+    price_store.load_from_csv(DATA_DIR)
+    return price_store
+
+
+async def drain(subscriber):
+    events = []
+    while (event := await subscriber.get()) is not None:
+        events.append(event)
+    return events
+
+
+def test_drop_policy_keeps_the_newest_events():
+    subscriber = ReplaySubscriber(max_queue=2, policy=ReplayPolicy.DROP)
+    for i in range(5):
+        subscriber.offer("HDFCBANK", str(i))
+    subscriber.close()
+    assert asyncio.run(drain(subscriber)) == ["3", "4"]
+    assert subscriber.dropped == 3
+
+
+def test_coalesce_policy_replaces_the_pending_event_of_the_symbol():
+    subscriber = ReplaySubscriber(max_queue=2, policy=ReplayPolicy.COALESCE)
+    subscriber.offer("HDFCBANK", "h1")
+    subscriber.offer("RELIANCE", "r1")
+    subscriber.offer("HDFCBANK", "h2")
+    subscriber.offer("TATAMOTORS", "t1")
+    subscriber.close()
+    assert asyncio.run(drain(subscriber)) == ["h2", "t1"]
+    assert subscriber.coalesced == 1 and subscriber.dropped == 1
+
+
+def test_every_subscriber_receives_every_bar_in_order(store):
+    manager = ReplayManager(max_sessions=1, pending_ttl_seconds=60)
+    session = manager.create("user", ["HDFCBANK", "ICICIBANK"], date(2023, 7, 18), date(2023, 9, 30),
+                             ms_per_day=0, max_queue=10000, policy=ReplayPolicy.DROP, store=store)
+
+    async def scenario():
+        subscribers = [session.subscribe(), session.subscribe()]
+        return await asyncio.gather(*(drain(subscriber) for subscriber in subscribers))
+
+    first, second = asyncio.run(scenario())
+    assert session.status == ReplayStatus.FINISHED
+    assert first == second
+    assert len(first) == int(np.count_nonzero(session.has_bar)) == session.events_published
+    timestamps = [json.loads(event)["timestamp"] for event in first]
+    assert timestamps == sorted(timestamps)
+
+    with pytest.raises(ValueError):
+        manager.create("user", ["HDFCBANK"], date(2023, 7, 18), date(2023, 9, 30), 0, 10, ReplayPolicy.DROP, store)
+    manager.stop_all()
+
+
+def test_replay_stops_when_its_last_subscriber_leaves(store):
+    manager = ReplayManager(max_sessions=1, pending_ttl_seconds=60)
+    session = manager.create("user", ["HDFCBANK"], date(2023, 7, 18), date(2023, 9, 30), ms_per_day=1000,
+                             max_queue=10, policy=ReplayPolicy.DROP, store=store)
+
+    async def scenario():
+        first, second = session.subscribe(), session.subscribe()
+        session.unsubscribe(first)
+        assert session.status == ReplayStatus.RUNNING
+        session.unsubscribe(second)
+        await asyncio.sleep(0)
+
+    asyncio.run(scenario())
+    assert session.status == ReplayStatus.STOPPED and session.days_replayed < session.trading_days
+    assert manager.get(session.id) is None
+
+
+def test_sessions_are_capped_per_owner_and_pending_ones_expire(store):
+    manager = ReplayManager(max_sessions=1, pending_ttl_seconds=60)
+    args = (date(2023, 7, 18), date(2023, 9, 30), 0, 10, ReplayPolicy.DROP, store)
+    first = manager.create("alice", ["HDFCBANK"], *args)
+    manager.create("bob", ["HDFCBANK"], *args)
+    with pytest.raises(ValueError):
+        manager.create("alice", ["HDFCBANK"], *args)
+    assert [session.id for session in manager.sessions("alice")] == [first.id]
+
+    manager.pending_ttl_seconds = 0
+    assert manager.get(first.id) is None and first.status == ReplayStatus.STOPPED
+    manager.create("alice", ["HDFCBANK"], *args)
+    manager.stop_all()
+
+
+def test_only_the_owner_can_see_a_session():
+    client = TestClient(app)
+    app.dependency_overrides[get_current_user] = lambda: "alice@example.com"
+    try:
+        replay_id = client.post("/market/replay", json={"from_ts": "2023-07-18T00:00:00", "to_ts": "2023-09-30T00:00:00"}).json()["id"]
+        assert [session["id"] for session in client.get("/market/replay").json()] == [replay_id]
+
+        app.dependency_overrides[get_current_user] = lambda: "bob@example.com"
+        assert client.get("/market/replay").json() == []
+        assert client.get(f"/market/replay/{replay_id}").status_code == 403
+        assert client.get(f"/market/replay/{replay_id}/events").status_code == 403
+        assert client.delete(f"/market/replay/{replay_id}").status_code == 403
+        assert client.post("/market/replay", json={"from_ts": "2023-07-18T00:00:00", "to_ts": "2023-09-30T00:00:00",
+                                                   "ms_per_day": 10 ** 9}).status_code == 400
+    finally:
+        app.dependency_overrides.clear()
+        replay_manager.stop_all()
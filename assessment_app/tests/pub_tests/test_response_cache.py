@@ -0,0 +1,99 @@
+import gc
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from assessment_app.main import app
+from assessment_app.repository.price_store import PriceStore, SymbolPrices
+from assessment_app.routers import market_integration
+from assessment_app.service.auth_service import get_current_user
+from assessment_app.service.response_cache import ENTRY_OVERHEAD_BYTES, ResponseCache, etag_matches
+
+SYMBOL = "CACHETEST"
+RANGE = {"stock_symbol": SYMBOL, "from_ts": "2024-01-01T00:00:00", "to_ts": "2024-01-31T00:00:00"}
+client = TestClient(app)
+
+
+def symbol_prices(close: float) -> SymbolPrices:
+    dates = np.arange(np.datetime64("2024-01-01"), np.datetime64("2024-02-01"))
+    prices = np.full(len(dates), close)
+    return SymbolPrices(SYMBOL, dates, prices, prices, prices, prices, prices, np.ones(len(dates), dtype=np.int64))
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = PriceStore()
+    store.put(symbol_prices(10.0))
+    monkeypatch.setattr(market_integration, "get_price_store", lambda: store)
+    app.dependency_overrides[get_current_user] = lambda: "cache@example.com"
+    yield store
+    app.dependency_overrides.clear()
+
+
+def test_lru_is_bounded_by_bytes_and_tied_to_the_prices():
+    entry = 40 + ENTRY_OVERHEAD_BYTES
+    cache = ResponseCache(max_bytes=8 * entry)
+    prices = symbol_prices(10.0)
+    for key in "abcdefgh":
+        cache.put(key, prices, b"x" * 40, "text/plain")
+    assert cache.get("a", prices) is not None
+    cache.put("i", prices, b"x" * 40, "text/plain")
+    # "b" was the least recently used
+    assert cache.get("b", prices) is None and cache.get("a", prices) is not None
+    assert cache.snapshot()["bytes"] == 8 * entry
+    # Too large for a single entry: served, not kept
+    assert cache.put("j", prices, b"x" * 41, "text/plain").etag
+    assert cache.get("j", prices) is None
+    # Reloaded prices invalidate what was built from the old ones
+    assert cache.get("a", symbol_prices(10.0)) is None
+    assert cache.snapshot()["invalidations"] == 1 and cache.snapshot()["evictions"] == 1
+
+
+def test_entries_do_not_keep_replaced_prices_alive():
+    cache = ResponseCache(max_bytes=1 << 20)
+    old, new = symbol_prices(10.0), symbol_prices(11.0)
+    cache.put("a", old, b"old", "text/plain")
+    cache.put("b", old, b"old", "text/plain")
+    del old
+    gc.collect()
+    # Purged on the next write
+    cache.put("c", new, b"new", "text/plain")
+    assert len(cache) == 1 and cache.snapshot()["bytes"] == 3 + ENTRY_OVERHEAD_BYTES
+
+
+def test_etag_matching():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"a"')
+    assert not etag_matches('"a"', '"b"') and not etag_matches(None, '"a"')
+
+
+def test_repeat_requests_are_revalidated(store):
+    first = client.post("/market/data/range", params=RANGE)
+    assert first.status_code == 200
+    assert first.json()["data"][0] == {"stock_symbol": SYMBOL, "timestamp": "2024-01-01T00:00:00", "price": 10.0}
+    etag = first.headers["etag"]
+    assert first.headers["cache-control"].startswith("private, max-age=")
+
+    # Same rows, other bounds, GET: same body and ETag
+    second = client.get("/market/data/range", params={**RANGE, "from_ts": "2023-12-25T00:00:00"})
+    assert second.content == first.content and second.headers["etag"] == etag
+    not_modified = client.get("/market/data/range", params=RANGE, headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.content == b""
+
+    # Formats are cached apart
+    columnar = client.get("/market/data/range", params={**RANGE, "format": "columnar"})
+    assert columnar.json()["prices"][0] == 10.0 and columnar.headers["etag"] != etag
+
+    # New prices for the symbol: new body and ETag
+    store.put(symbol_prices(11.0))
+    changed = client.get("/market/data/range", params=RANGE, headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.json()["data"][0]["price"] == 11.0
+
+
+def test_tick_is_revalidated(store):
+    params = {"stock_symbol": SYMBOL, "current_ts": "2024-01-05T00:00:00"}
+    first = client.post("/market/data/tick", params=params)
+    assert first.json() == {"stock_symbol": SYMBOL, "timestamp": "2024-01-05T00:00:00", "price": 10.0}
+    assert client.get("/market/data/tick", params=params, headers={"If-None-Match": first.headers["etag"]}).status_code == 304
+    assert client.get("/market/data/tick", params={**params, "current_ts": "2023-01-05T00:00:00"}).status_code == 404
@@ -0,0 +1,78 @@
+import uuid
+from datetime import datetime, timedelta
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+
+from assessment_app.main import app
+from assessment_app.repository.database import HoldingDB, PortfolioDB, SessionLocal
+from assessment_app.repository.price_store import DATA_DIR, PriceStore
+from assessment_app.service.returns_index import ReturnsIndex, cagr_matrix, get_returns_index
+from assessment_app.service.auth_service import get_current_user
+from assessment_app.utils.utils import compute_cagr
+
+SYMBOLS = ["HDFCBANK", "ICICIBANK", "RELIANCE", "TATAMOTORS"]
+client = TestClient(app)
+
+
+@pytest.fixture(scope="module")
+def store():
+    price_store = PriceStore()
+    price_store.load_from_csv(DATA_DIR)
+    return price_store
+
+
+def brute_force_cagr(prices, start_ts, end_ts):
+    start_row, end_row = prices.asof_index(start_ts.date()), prices.asof_index(end_ts.date())
+    return compute_cagr(prices.avg_price[start_row], prices.avg_price[end_row], start_ts, end_ts)
+
+
+def test_cagr_matches_brute_force_including_non_trading_days(store):
+    index = get_returns_index("HDFCBANK", store)
+    prices = store.get("HDFCBANK")
+    start = datetime.combine(prices.dates[0].astype(object), datetime.min.time())
+    for offset, length in [(0, 30), (5, 100), (40, 200), (1, 1), (13, 600)]:
+        start_ts, end_ts = start + timedelta(days=offset), start + timedelta(days=offset + length)
+        assert index.cagr(start_ts, end_ts) == pytest.approx(brute_force_cagr(prices, start_ts, end_ts))
+
+
+def test_no_bar_before_first_day(store):
+    index = ReturnsIndex(store.get("RELIANCE"))
+    assert index.cagr(datetime(2000, 1, 1), datetime(2024, 1, 1)) is None
+
+
+def test_cagr_matrix_matches_single_lookups(store):
+    windows = [(datetime(2023, 8, 5), datetime(2024, 2, 1)), (datetime(1990, 1, 1), datetime(2024, 1, 1))]
+    matrix = cagr_matrix(SYMBOLS, windows, store)
+    assert matrix.shape == (4, 2)
+    for i, symbol in enumerate(SYMBOLS):
+        assert matrix[i, 0] == pytest.approx(get_returns_index(symbol, store).cagr(*windows[0]))
+    assert np.isnan(matrix[:, 1]).all()
+    with pytest.raises(ValueError):
+        cagr_matrix(SYMBOLS, [(windows[0][1], windows[0][0])], store)
+
+
+def test_portfolio_returns(store):
+    user_id = "returns@example.com"
+    app.dependency_overrides[get_current_user] = lambda: user_id
+    db = SessionLocal()
+    try:
+        portfolio = PortfolioDB(id=str(uuid.uuid4()), user_id=user_id, cash_remaining=1000.0, current_ts=datetime(2023, 7, 18))
+        db.add(portfolio)
+        db.commit()
+        params = {"start_ts": "2023-08-01T00:00:00", "end_ts": "2024-02-01T00:00:00"}
+        # No holdings, no returns
+        assert client.get("/analysis/estimate_returns/portfolio", params=params).json() == 1.0
+
+        db.add(HoldingDB(id=str(uuid.uuid4()), portfolio_id=portfolio.id, symbol="HDFCBANK", price=1.0, quantity=3))
+        db.commit()
+        expected = get_returns_index("HDFCBANK", store).cagr(datetime(2023, 8, 1), datetime(2024, 2, 1))
+        assert client.get("/analysis/estimate_returns/portfolio", params=params).json() == pytest.approx(1 + expected / 100)
+        assert client.get("/analysis/estimate_returns/portfolio", params={**params, "end_ts": params["start_ts"]}).status_code == 400
+    finally:
+        db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio.id).delete()
+        db.query(PortfolioDB).filter(PortfolioDB.user_id == user_id).delete()
+        db.commit()
+        db.close()
+        app.dependency_overrides.clear()
@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from assessment_app.repository.price_store import DATA_DIR, PriceStore
+from assessment_app.utils.tick_synthesizer import bridge_paths, synthesize_ticks, write_npy
+
+
+@pytest.fixture
+def store():
+    price_store = PriceStore()
+    price_store.load_from_csv(DATA_DIR)
+    return price_store
+
+
+def test_paths_respect_open_high_low_close():
+    rng = np.random.default_rng(7)
+    open, high, low, close = np.array([100.0, 50.0]), np.array([104.0, 50.0]), np.array([97.0, 48.0]), np.array([98.0, 49.0])
+    paths = bridge_paths(open, high, low, close, 20, rng)
+    assert paths.shape == (2, 20)
+    np.testing.assert_array_equal(paths[:, 0], open)
+    np.testing.assert_array_equal(paths[:, -1], close)
+    np.testing.assert_array_equal(paths.max(axis=1), high)
+    np.testing.assert_array_equal(paths.min(axis=1), low)
+    with pytest.raises(ValueError):
+        bridge_paths(open, high, low, close, 3, rng)
+
+
+def test_ticks_are_ordered_reproducible_and_keep_daily_bars(store):
+    chunks = list(synthesize_ticks(store, ["HDFCBANK", "RELIANCE"], ticks_per_bar=10, seed=1, chunk_days=30))
+    again = list(synthesize_ticks(store, ["HDFCBANK", "RELIANCE"], ticks_per_bar=10, seed=1, chunk_days=30))
+    assert all(np.array_equal(a.price, b.price) for a, b in zip(chunks, again))
+
+    timestamps = np.concatenate([chunk.timestamp for chunk in chunks])
+    assert np.all(np.diff(timestamps.astype(np.int64)) >= 0)
+    assert len(timestamps) == 10 * (len(store.get("HDFCBANK")) + len(store.get("RELIANCE")))
+
+    prices = store.get("RELIANCE")
+    chunk = chunks[1]
+    day = chunk.timestamp.astype('datetime64[D]')
+    i = prices.index_of(day[0].astype(object))
+    mask = (chunk.symbol == "RELIANCE") & (day == prices.dates[i])
+    assert chunk.price[mask][0] == prices.open[i] and chunk.price[mask][-1] == prices.close[i]
+    assert chunk.price[mask].max() == prices.high[i] and chunk.price[mask].min() == prices.low[i]
+    assert chunk.volume[mask].sum() == prices.volume[i]
+
+
+def test_write_npy_writes_one_file_per_chunk(store, tmp_path):
+    paths = write_npy(synthesize_ticks(store, ["ICICIBANK"], ticks_per_bar=5, seed=0, chunk_days=100), str(tmp_path))
+    assert len(paths) == 3
+    records = np.load(paths[0])
+    assert records.dtype.names == ('symbol', 'timestamp', 'price', 'volume')
+    assert len(records) == 500 and set(records['symbol']) == {"ICICIBANK"}
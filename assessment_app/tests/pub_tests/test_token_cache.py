@@ -0,0 +1,38 @@
+import time
+
+from assessment_app.service.token_cache import TokenCache, hash_token
+
+
+def test_tokens_expire_with_exp_and_max_ttl():
+    cache = TokenCache(max_entries=10, max_ttl=60)
+    cache.put("expired", "a@b.c", time.time() - 1)
+    cache.put("valid", "a@b.c", time.time() + 600)
+    assert cache.get("expired") is None
+    assert cache.get("valid") == "a@b.c"
+
+    short_lived = TokenCache(max_entries=10, max_ttl=0)
+    short_lived.put("valid", "a@b.c", time.time() + 600)
+    assert short_lived.get("valid") is None
+
+
+def test_least_recently_used_token_is_evicted():
+    cache = TokenCache(max_entries=2, max_ttl=60)
+    cache.put("t1", "a@b.c", None)
+    cache.put("t2", "d@e.f", None)
+    cache.get("t1")
+    cache.put("t3", "g@h.i", None)
+    assert len(cache) == 2
+    assert cache.get("t2") is None
+    assert cache.get("t1") == "a@b.c"
+
+
+def test_invalidation_messages():
+    cache = TokenCache(max_entries=10, max_ttl=60)
+    token_hash = hash_token("jwt")
+    cache.put(token_hash, "a@b.c", None)
+    cache.put("other", "a@b.c", None)
+
+    cache.handle_message(f"token:{token_hash}".encode())
+    assert cache.get(token_hash) is None and cache.get("other") == "a@b.c"
+    cache.handle_message(b"unknown:other")
+    assert cache.get("other") == "a@b.c"
@@ -0,0 +1,116 @@
+import threading
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from assessment_app.models.models import Trade
+from assessment_app.repository.database import Base, TradeDB
+from assessment_app.service.trade_ledger import TradeLedger, is_transient, list_trades
+
+
+@pytest.fixture
+def session_factory():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    return sessionmaker(bind=engine)
+
+
+def trades(count):
+    start = datetime(2024, 1, 1)
+    return [Trade(symbol="HDFCBANK", price=70.0, quantity=i + 1, execution_ts=start + timedelta(days=i // 2))
+            for i in range(count)]
+
+
+def test_rows_are_written_in_batches_and_drained_on_stop(session_factory):
+    ledger = TradeLedger(session_factory, batch_size=10, flush_interval=60.0)
+    ledger.record("p1", trades(25))
+    ledger.stop(timeout=10)
+
+    db = session_factory()
+    assert db.scalar(select(func.count()).select_from(TradeDB)) == 25
+    snapshot = ledger.snapshot()
+    assert snapshot["committed"] == 25 and snapshot["pending"] == 0 and snapshot["batches"] == 3
+
+
+def test_flush_writes_a_partial_batch(session_factory):
+    ledger = TradeLedger(session_factory, batch_size=100, flush_interval=60.0)
+    ledger.record("p1", trades(3))
+    assert ledger.flush(timeout=10)
+    assert session_factory().scalar(select(func.count()).select_from(TradeDB)) == 3
+    ledger.stop(timeout=10)
+
+
+def count_trades(session_factory):
+    return session_factory().scalar(select(func.count()).select_from(TradeDB))
+
+
+def test_rejected_rows_are_dead_lettered(session_factory, caplog):
+    ledger = TradeLedger(session_factory, batch_size=10, flush_interval=60.0)
+    ledger.record("p1", trades(3))
+    # No portfolio: the NOT NULL constraint rejects the row
+    ledger.record(None, trades(1))
+    ledger.record("p1", trades(2))
+    ledger.stop(timeout=10)
+
+    assert count_trades(session_factory) == 5
+    snapshot = ledger.snapshot()
+    assert snapshot["committed"] == 5 and snapshot["dead_lettered"] == 1 and snapshot["pending"] == 0
+    assert [record.name for record in caplog.records if record.levelname == "ERROR"] == [
+        "assessment_app.trade_ledger.dead_letter"]
+    assert is_transient(OperationalError("SELECT 1", {}, Exception()))
+    assert not is_transient(IntegrityError("INSERT", {}, Exception()))
+
+
+def test_record_waits_for_room_a_bounded_time(session_factory):
+    ledger = TradeLedger(session_factory, batch_size=10, flush_interval=60.0, max_pending=2, record_timeout=0.05)
+    ledger.record("p1", trades(3))
+    assert ledger.is_full()
+    assert ledger.snapshot()["dead_lettered"] == 1
+    assert ledger.flush(timeout=10) and not ledger.is_full()
+    ledger.stop(timeout=10)
+    assert count_trades(session_factory) == 2
+
+
+def test_stop_keeps_a_writer_that_is_still_draining(session_factory):
+    release = threading.Event()
+
+    def slow_session_factory():
+        release.wait(10)
+        return session_factory()
+
+    def writers():
+        return [thread.name for thread in threading.enumerate()].count("trade-ledger-writer")
+
+    ledger = TradeLedger(slow_session_factory, batch_size=10, flush_interval=0.0)
+    running = writers()
+    ledger.record("p1", trades(1))
+    ledger.stop(timeout=0.05)
+    ledger.record("p1", trades(1))
+    assert writers() == running + 1
+    release.set()
+    ledger.stop(timeout=10)
+    assert count_trades(session_factory) == 2 and ledger.snapshot()["pending"] == 0
+
+
+def test_keyset_pages_cover_every_trade_once(session_factory):
+    ledger = TradeLedger(session_factory, batch_size=7, flush_interval=0.01)
+    ledger.record("p1", trades(23))
+    ledger.record("p2", trades(2))
+    ledger.stop(timeout=10)
+
+    db = session_factory()
+    seen, cursor = [], None
+    while True:
+        page, cursor = list_trades(db, "p1", 5, cursor)
+        seen.extend(page)
+        if cursor is None:
+            break
+    assert len({trade.id for trade in seen}) == len(seen) == 23
+    keys = [(trade.execution_ts, trade.id) for trade in seen]
+    assert keys == sorted(keys, reverse=True)
+    with pytest.raises(ValueError):
+        list_trades(db, "p1", 5, "not-a-cursor")
@@ -0,0 +1,119 @@
+import uuid
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+from assessment_app.main import app
+from assessment_app.repository.database import HoldingDB, PortfolioDB, SessionLocal
+from assessment_app.service import portfolio_service
+from assessment_app.service.auth_service import get_current_user
+
+USER_ID = "trader@example.com"
+client = TestClient(app)
+
+
+@pytest.fixture
+def portfolio_id():
+    app.dependency_overrides[get_current_user] = lambda: USER_ID
+    db = SessionLocal()
+    db.query(HoldingDB).delete()
+    db.query(PortfolioDB).delete()
+    portfolio = PortfolioDB(id=str(uuid.uuid4()), user_id=USER_ID, cash_remaining=100000.0, current_ts=datetime(2023, 7, 18))
+    db.add(portfolio)
+    db.commit()
+    yield portfolio.id
+    db.close()
+    app.dependency_overrides.clear()
+
+
+def holdings(portfolio_id):
+    db = SessionLocal()
+    try:
+        return {holding.symbol: holding.quantity for holding in db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio_id)}
+    finally:
+        db.close()
+
+
+def trade(symbol, price, quantity, day, type="BUY"):
+    return {"symbol": symbol, "price": price, "quantity": quantity, "type": type, "execution_ts": f"{day}T00:00:00"}
+
+
+def test_trade_stock_buys_new_holding(portfolio_id):
+    response = client.post("/market/trade", json=trade("HDFCBANK", 70.0, 10, "2023-07-18"))
+    assert response.status_code == 200
+    assert holdings(portfolio_id) == {"HDFCBANK": 10}
+
+
+def test_trade_stock_rejects_price_outside_open_close(portfolio_id):
+    response = client.post("/market/trade", json=trade("HDFCBANK", 80.0, 10, "2023-07-18"))
+    assert response.status_code == 400
+
+
+def test_batch_applies_valid_trades_in_execution_order(portfolio_id):
+    trades = [
+        trade("HDFCBANK", 70.545, 4, "2023-07-19", type="SELL"),
+        trade("HDFCBANK", 70.0, 10, "2023-07-18"),
+        trade("RELIANCE", 1.0, 5, "2023-07-18"),
+    ]
+    response = client.post("/market/trade/batch", json={"portfolio_id": portfolio_id, "trades": trades})
+    assert response.status_code == 200
+    data = response.json()
+
+    assert [result["status"] for result in data["results"]] == ["FILLED", "FILLED", "REJECTED"]
+    assert holdings(portfolio_id) == {"HDFCBANK": 6}
+    assert data["cash_remaining"] == pytest.approx(100000.0 - 10 * 70.0 + 4 * 70.545)
+    assert data["current_ts"] == "2023-07-19T00:00:00"
+
+
+def test_batch_rejects_oversold_trade(portfolio_id):
+    trades = [trade("HDFCBANK", 70.0, 1, "2023-07-18"), trade("HDFCBANK", 70.545, 2, "2023-07-19", type="SELL")]
+    data = client.post("/market/trade/batch", json={"portfolio_id": portfolio_id, "trades": trades}).json()
+    assert [result["status"] for result in data["results"]] == ["FILLED", "REJECTED"]
+    assert data["results"][1]["detail"] == "Insufficient stock quantity for sale."
+
+
+def test_materialized_net_worth_matches_recompute(portfolio_id):
+    trades = [
+        trade("HDFCBANK", 70.0, 10, "2023-07-18"),
+        trade("HDFCBANK", 70.545, 4, "2023-07-19", type="SELL"),
+        trade("ICICIBANK", 975.0, 3, "2023-07-19"),
+        trade("HDFCBANK", 70.545, 2, "2023-07-19"),
+    ]
+    for item in trades:
+        assert client.post("/market/trade", json=item).status_code == 200
+    params = {"portfolio_id": portfolio_id}
+    net_worth = client.get("/portfolio-net-worth", params=params).json()
+    assert net_worth == pytest.approx(client.get("/portfolio-net-worth", params={**params, "recompute": True}).json())
+    assert net_worth != pytest.approx(100000.0)
+
+
+def test_nav_matches_daily_net_worth(portfolio_id):
+    assert client.post("/market/trade", json=trade("HDFCBANK", 70.0, 10, "2023-07-18")).status_code == 200
+    response = client.get(f"/portfolio/{portfolio_id}/nav",
+                          params={"from_ts": "2023-07-18T00:00:00", "to_ts": "2023-07-31T00:00:00"})
+    assert response.status_code == 200
+    data = response.json()["data"]
+    assert data[0]["timestamp"] == "2023-07-18T00:00:00"
+    assert len(data) == 10
+
+    db = SessionLocal()
+    try:
+        holding = db.query(HoldingDB).filter(HoldingDB.portfolio_id == portfolio_id).one()
+        cash = db.query(PortfolioDB).filter(PortfolioDB.id == portfolio_id).one().cash_remaining
+        for point in data:
+            ts = datetime.fromisoformat(point["timestamp"])
+            assert point["net_worth"] == pytest.approx(cash + portfolio_service.holdings_value([holding], ts))
+    finally:
+        db.close()
+
+
+def test_trade_history_pages(portfolio_id):
+    for day in ("2023-07-18", "2023-07-19", "2023-07-19"):
+        assert client.post("/market/trade", json=trade("HDFCBANK", 70.545 if day.endswith("19") else 70.0, 1, day)).status_code == 200
+
+    first = client.get(f"/portfolio/{portfolio_id}/trades", params={"limit": 2, "flush": True}).json()
+    assert [item["execution_ts"] for item in first["trades"]] == ["2023-07-19T00:00:00"] * 2
+    second = client.get(f"/portfolio/{portfolio_id}/trades", params={"limit": 2, "cursor": first["next_cursor"]}).json()
+    assert [item["execution_ts"] for item in second["trades"]] == ["2023-07-18T00:00:00"]
+    assert second["next_cursor"] is None
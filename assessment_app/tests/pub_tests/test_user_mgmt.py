@@ -1,9 +1,16 @@
+import asyncio
+
 import pytest
 from fastapi.testclient import TestClient
 from assessment_app.main import app
+from assessment_app.service.auth_service import token_cache
+from assessment_app.service.password_hasher import password_hasher
 
 client = TestClient(app)
 
+USER = {"email": "auth@example.com", "first_name": "Auth", "last_name": "Test", "password": "secret"}
+
+
 @pytest.fixture
 def test_user():
     return {
@@ -21,3 +28,37 @@ def test_register_user(test_user):
     assert data["email"] == test_user["email"]
     assert data["first_name"] == test_user["first_name"]
     assert data["last_name"] == test_user["last_name"]
+
+
+def test_duplicate_registration_is_not_hashed():
+    user = {**USER, "email": "duplicate@example.com"}
+    assert client.post("/register", json=user).status_code == 200
+    hashed = password_hasher.snapshot()["completed"]
+    assert client.post("/register", json=user).status_code == 400
+    assert password_hasher.snapshot()["completed"] == hashed
+
+
+def test_concurrent_registrations_create_one_user():
+    async def register_twice():
+        from httpx import ASGITransport, AsyncClient
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            user = {**USER, "email": "race@example.com"}
+            return await asyncio.gather(client.post("/register", json=user), client.post("/register", json=user))
+
+    assert sorted(response.status_code for response in asyncio.run(register_twice())) == [200, 400]
+
+
+def test_login_cached_verification_and_logout():
+    with TestClient(app) as client:
+        assert client.post("/register", json=USER).status_code == 200
+        assert client.post("/login", data={"username": USER["email"], "password": "wrong"}).status_code == 400
+        assert client.post("/login", data={"username": USER["email"], "password": USER["password"]}).status_code == 200
+        token = client.cookies.get("jwt_token")
+
+        assert client.get("/strategies").status_code == 200
+        assert len(token_cache) == 1
+        assert client.get("/strategies").status_code == 200
+
+        assert client.post("/logout").status_code == 200
+        client.cookies.set("jwt_token", token)
+        assert client.get("/strategies").status_code == 403
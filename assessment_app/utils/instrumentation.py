@@ -0,0 +1,357 @@
+"""
+Request instrumentation: per-route latency histograms, database queries and Redis calls per request, rendered
+in the Prometheus text format by `/metrics`, plus an opt-in sampling profiler.
+
+`InstrumentationMiddleware` opens a `RequestStats` for every HTTP request in a context variable. Sync handlers
+and dependencies run on the worker threadpool with a copy of the request's context, so the SQLAlchemy cursor
+events (`instrument_engine`) and the Redis connection checkouts (`instrument_redis`) made on the request's
+behalf are added to its stats wherever they run. Work outside any request (ingestion, the trade ledger writer)
+is counted under the route "background".
+
+With PROFILING_ENABLED set, a request sent with the header `X-Profile: 1` is answered with the folded stacks
+sampled while it ran, one `frame;frame;... count` line per distinct stack, ready for flamegraph.pl or
+speedscope, instead of its own response. The sampler sees the event loop thread and every worker thread busy
+in the app, so requests running at the same time show up too: profile on an otherwise idle process.
+"""
+import bisect
+import inspect
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from assessment_app.models.constants import (DEFAULT_PROFILE_SAMPLE_INTERVAL_MS, PROFILE_SAMPLE_INTERVAL_MS,
+                                             PROFILING_ENABLED)
+
+PROFILE_HEADER = b"x-profile"
+BACKGROUND_ROUTE = "background"
+UNMATCHED_ROUTE = "unmatched"
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+APP_PACKAGE = __name__.split(".")[0] + "."
+WORKER_THREAD_NAME = "AnyIO worker thread"
+
+
+class RequestStats:
+    __slots__ = ('db_queries', 'db_seconds', 'redis_calls')
+
+    def __init__(self):
+        self.db_queries = 0
+        self.db_seconds = 0.0
+        self.redis_calls = 0
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+class Histogram:
+    """
+    Cumulative bucket counts, sum and count of observed values. Not thread safe, see `Metrics`.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets + (float("inf"),), self.counts):
+            total += count
+            yield ("+Inf" if bound == float("inf") else format_value(bound)), total
+
+
+class Metrics:
+    """
+    Per-route request, database and Redis metrics, thread safe.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (method, route) -> histograms
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.db_queries: Dict[Tuple[str, str], Histogram] = {}
+        self.redis_calls: Dict[Tuple[str, str], Histogram] = {}
+        # (method, route, status) -> requests
+        self.responses: Counter = Counter()
+        # route -> totals, background work included
+        self.db_queries_total: Counter = Counter()
+        self.db_seconds_total: Counter = Counter()
+        self.redis_calls_total: Counter = Counter()
+
+    def record_request(self, method: str, route: str, status: int, seconds: float, stats: RequestStats):
+        key = (method, route)
+        with self._lock:
+            self.latency.setdefault(key, Histogram(LATENCY_BUCKETS)).observe(seconds)
+            self.db_queries.setdefault(key, Histogram(COUNT_BUCKETS)).observe(stats.db_queries)
+            self.redis_calls.setdefault(key, Histogram(COUNT_BUCKETS)).observe(stats.redis_calls)
+            self.responses[(method, route, status)] += 1
+            self.db_queries_total[route] += stats.db_queries
+            self.db_seconds_total[route] += stats.db_seconds
+            self.redis_calls_total[route] += stats.redis_calls
+
+    def record_background(self, db_queries: int = 0, db_seconds: float = 0.0, redis_calls: int = 0):
+        with self._lock:
+            self.db_queries_total[BACKGROUND_ROUTE] += db_queries
+            self.db_seconds_total[BACKGROUND_ROUTE] += db_seconds
+            self.redis_calls_total[BACKGROUND_ROUTE] += redis_calls
+
+    def render(self) -> List[str]:
+        """
+        Prometheus text format lines of every metric.
+        """
+        lines = []
+        with self._lock:
+            lines += render_histograms("http_request_duration_seconds", "Request latency by route.", self.latency)
+            lines += render_histograms("http_request_db_queries", "Database queries per request by route.", self.db_queries)
+            lines += render_histograms("http_request_redis_calls", "Redis calls per request by route.", self.redis_calls)
+            lines += render_counter("http_requests_total", "Responses by route and status.",
+                                    {labels(method=method, route=route, status=status): count
+                                     for (method, route, status), count in self.responses.items()})
+            lines += render_counter("db_queries_total", "Database queries by route.",
+                                    {labels(route=route): count for route, count in self.db_queries_total.items()})
+            lines += render_counter("db_query_seconds_total", "Database query time by route.",
+                                    {labels(route=route): count for route, count in self.db_seconds_total.items()})
+            lines += render_counter("redis_calls_total", "Redis calls by route.",
+                                    {labels(route=route): count for route, count in self.redis_calls_total.items()})
+        return lines
+
+
+metrics = Metrics()
+
+
+def format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def labels(**values) -> str:
+    return "{" + ",".join(f'{name}="{escape(value)}"' for name, value in values.items()) + "}"
+
+
+def render_histograms(name: str, help: str, histograms: Dict[Tuple[str, str], Histogram]) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} histogram"]
+    for (method, route), histogram in sorted(histograms.items()):
+        for bound, count in histogram.cumulative():
+            lines.append(f"{name}_bucket{labels(method=method, route=route, le=bound)} {count}")
+        lines.append(f"{name}_sum{labels(method=method, route=route)} {format_value(histogram.sum)}")
+        lines.append(f"{name}_count{labels(method=method, route=route)} {histogram.count}")
+    return lines
+
+
+def render_counter(name: str, help: str, values: Dict[str, float]) -> List[str]:
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} counter"]
+    lines += [f"{name}{label} {format_value(value)}" for label, value in sorted(values.items())]
+    return lines
+
+
+def render_gauges(prefix: str, help: str, snapshot: dict) -> List[str]:
+    """
+    One gauge per numeric entry of a component's `snapshot()`.
+    """
+    lines = []
+    for key, value in snapshot.items():
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines += [f"# HELP {prefix}_{key} {help}", f"# TYPE {prefix}_{key} gauge", f"{prefix}_{key} {format_value(value)}"]
+    return lines
+
+
+def current_stats() -> Optional[RequestStats]:
+    return _current.get()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _record_query(conn)
+
+
+def _handle_error(context):
+    if context.connection is not None:
+        _record_query(context.connection)
+
+
+def _record_query(conn):
+    started = conn.info.get("query_started")
+    if not started:
+        return
+    seconds = time.perf_counter() - started.pop()
+    stats = _current.get()
+    if stats is None:
+        metrics.record_background(db_queries=1, db_seconds=seconds)
+    else:
+        stats.db_queries += 1
+        stats.db_seconds += seconds
+
+
+def instrument_engine(engine):
+    """
+    Count and time every statement the engine executes.
+    """
+    from sqlalchemy import event
+
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+def _record_redis_call():
+    stats = _current.get()
+    if stats is None:
+        metrics.record_background(redis_calls=1)
+    else:
+        stats.redis_calls += 1
+
+
+def instrument_redis(client):
+    """
+    Count the round trips of a sync or async Redis client: every command, and every pipeline, checks out a
+    connection from the client's pool once. Returns the client.
+    """
+    pool = client.connection_pool
+    get_connection = pool.get_connection
+    if inspect.iscoroutinefunction(get_connection):
+        async def counted(*args, **kwargs):
+            _record_redis_call()
+            return await get_connection(*args, **kwargs)
+    else:
+        def counted(*args, **kwargs):
+            _record_redis_call()
+            return get_connection(*args, **kwargs)
+    pool.get_connection = counted
+    return client
+
+
+def profiling_enabled() -> bool:
+    return os.environ.get(PROFILING_ENABLED, "false").lower() in ("1", "true", "yes")
+
+
+def frame_name(frame) -> str:
+    return f"{frame.f_globals.get('__name__', '?')}:{frame.f_code.co_qualname}"
+
+
+class StackSampler:
+    """
+    Samples the stacks of the event loop thread and the busy worker threads every `interval` seconds on a
+    background thread, until stopped. Stacks are folded root first, under their thread's name.
+    """
+
+    def __init__(self, loop_thread_id: int, interval: float):
+        self.loop_thread_id = loop_thread_id
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+
+    def start(self) -> "StackSampler":
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        names = {}
+        while not self._stop.is_set():
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self._thread.ident:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                name = names.get(thread_id, "")
+                if thread_id != self.loop_thread_id and not name.startswith(WORKER_THREAD_NAME):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_name(frame))
+                    frame = frame.f_back
+                # Idle workers wait for work outside the app's code
+                if thread_id != self.loop_thread_id and not any(entry.startswith(APP_PACKAGE) for entry in stack):
+                    continue
+                stack.append("event loop" if thread_id == self.loop_thread_id else name)
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            self._stop.wait(self.interval)
+
+
+def folded(stacks: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+class InstrumentationMiddleware:
+    """
+    ASGI middleware recording every HTTP request into `metrics`, and profiling it on request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        if dict(scope["headers"]).get(PROFILE_HEADER) == b"1" and profiling_enabled():
+            return await self.profile(scope, receive, send)
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            _current.reset(token)
+            route = getattr(scope.get("route"), "path", UNMATCHED_ROUTE)
+            metrics.record_request(scope["method"], route, status, time.perf_counter() - started, stats)
+
+    async def profile(self, scope, receive, send):
+        """
+        Run the request with the sampler on, drop its response and answer with the folded stacks.
+        """
+        status = 500
+
+        async def discard(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+
+        interval = float(os.environ.get(PROFILE_SAMPLE_INTERVAL_MS, DEFAULT_PROFILE_SAMPLE_INTERVAL_MS)) / 1000
+        sampler = StackSampler(threading.get_ident(), interval).start()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, discard)
+        finally:
+            seconds = time.perf_counter() - started
+            stacks = sampler.stop()
+        body = folded(stacks).encode()
+        await send({"type": "http.response.start", "status": 200, "headers": [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-profile-status", str(status).encode()),
+            (b"x-profile-samples", str(sampler.samples).encode()),
+            (b"x-profile-seconds", f"{seconds:.6f}".encode()),
+        ]})
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,224 @@
+"""
+Synthetic intraday ticks from the daily OHLC bars of the price store, for load tests at intraday volumes.
+
+Every bar becomes `ticks_per_bar` ticks spread evenly over the trading session. The price path is a Brownian
+bridge pinned to four anchors: the open at the first tick, the close at the last tick, and the high and the
+low at two random interior ticks, so every path hits the day's high and low exactly and stays within them.
+The daily volume is split across the ticks at random.
+
+Paths are generated a chunk of trading days at a time, all bars of the chunk in one set of array operations,
+so memory stays bounded by the chunk size. Output is reproducible for a given seed and chunk size.
+
+    python -m assessment_app.utils.tick_synthesizer --ticks-per-bar 390 --out ticks/ --format npy
+"""
+import argparse
+import os
+import time
+from datetime import date
+from typing import Iterator, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+from assessment_app.repository.price_store import DATA_DIR, PriceStore, date_range_slice
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:  # pragma: no cover - optional dependency
+    pyarrow = None
+
+MIN_TICKS_PER_BAR = 4
+DEFAULT_CHUNK_DAYS = 20
+# Exchange-local trading session the ticks are spread over (NSE, 09:15 - 15:30)
+SESSION_OPEN = np.timedelta64(9 * 60 + 15, 'm').astype('timedelta64[ms]')
+SESSION_CLOSE = np.timedelta64(15 * 60 + 30, 'm').astype('timedelta64[ms]')
+
+TICK_DTYPE = np.dtype([('symbol', 'U16'), ('timestamp', 'datetime64[ms]'), ('price', 'f8'), ('volume', 'i8')])
+
+
+class TickChunk(NamedTuple):
+    """
+    Ticks of a run of whole trading days, ordered by timestamp then symbol.
+    """
+    symbol: np.ndarray
+    timestamp: np.ndarray
+    price: np.ndarray
+    volume: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.price)
+
+    def to_records(self) -> np.ndarray:
+        records = np.empty(len(self), dtype=TICK_DTYPE)
+        for name in TICK_DTYPE.names:
+            records[name] = getattr(self, name)
+        return records
+
+
+def bridge_paths(open: np.ndarray, high: np.ndarray, low: np.ndarray, close: np.ndarray, ticks_per_bar: int,
+                 rng: np.random.Generator) -> np.ndarray:
+    """
+    Price paths of shape (bars, ticks_per_bar) starting at `open`, ending at `close`, whose maximum is `high`
+    and minimum is `low`.
+    """
+    bars, n = len(open), ticks_per_bar
+    if n < MIN_TICKS_PER_BAR:
+        raise ValueError(f"ticks_per_bar must be at least {MIN_TICKS_PER_BAR}")
+    ticks = np.arange(n)
+
+    # 1. Anchor ticks: open, high and low at two distinct random interior ticks (either order), close
+    first = rng.integers(1, n - 1, size=bars)
+    second = rng.integers(1, n - 2, size=bars)
+    second += second >= first
+    high_at, low_at = np.where(rng.random(bars) < 0.5, (first, second), (second, first))
+    positions = np.column_stack([np.zeros(bars, dtype=np.int64), high_at, low_at, np.full(bars, n - 1)])
+    values = np.column_stack([open, high, low, close])
+    order = np.argsort(positions, axis=1, kind='stable')
+    positions = np.take_along_axis(positions, order, axis=1)
+    values = np.take_along_axis(values, order, axis=1)
+
+    # 2. Segment [start, end) of every tick between consecutive anchors
+    segment = np.clip((ticks[None, :, None] >= positions[:, None, 1:3]).sum(axis=2), 0, 2)
+    start = np.take_along_axis(positions, segment, axis=1)
+    end = np.take_along_axis(positions, segment + 1, axis=1)
+    start_value = np.take_along_axis(values, segment, axis=1)
+    end_value = np.take_along_axis(values, segment + 1, axis=1)
+    fraction = (ticks[None, :] - start) / (end - start)
+
+    # 3. Brownian bridge of every segment: a random walk minus the straight line between its end points,
+    #    scaled to the day's range. Excursions past the high or the low are reflected back inside, which keeps
+    #    the path continuous where clipping would leave flat runs at the boundary.
+    walk = np.cumsum(rng.standard_normal((bars, n)), axis=1)
+    walk_start = np.take_along_axis(walk, start, axis=1)
+    walk_end = np.take_along_axis(walk, end, axis=1)
+    noise = (walk - walk_start) - fraction * (walk_end - walk_start)
+    scale = ((high - low) / (4 * np.sqrt(n)))[:, None]
+    paths = start_value + fraction * (end_value - start_value) + scale * noise
+    high, low = high[:, None], low[:, None]
+    paths = np.where(paths > high, 2 * high - paths, paths)
+    paths = np.where(paths < low, 2 * low - paths, paths)
+    return np.clip(paths, low, high)
+
+
+def split_volume(volume: np.ndarray, ticks_per_bar: int, rng: np.random.Generator) -> np.ndarray:
+    """
+    Random integer split of every bar's volume across its ticks, summing to the bar's volume.
+    """
+    weights = rng.gamma(1.0, size=(len(volume), ticks_per_bar))
+    weights /= weights.sum(axis=1, keepdims=True)
+    volumes = np.floor(weights * volume[:, None]).astype(np.int64)
+    volumes[:, -1] += volume - volumes.sum(axis=1)
+    return volumes
+
+
+def synthesize_ticks(store: PriceStore, symbols: Optional[Sequence[str]] = None, ticks_per_bar: int = 390,
+                     seed: Optional[int] = None, chunk_days: int = DEFAULT_CHUNK_DAYS,
+                     from_day: Optional[date] = None, to_day: Optional[date] = None) -> Iterator[TickChunk]:
+    """
+    Lazily yield the synthetic ticks of `symbols` (default all), `chunk_days` trading days per chunk.
+    """
+    symbols = list(symbols or store.symbols())
+    series = [store.get(symbol) for symbol in symbols]
+    dates = np.unique(np.concatenate([prices.dates for prices in series]))
+    dates = dates[date_range_slice(dates, from_day or dates[0], to_day or dates[-1])]
+    offsets = SESSION_OPEN + (SESSION_CLOSE - SESSION_OPEN) * np.arange(ticks_per_bar) // (ticks_per_bar - 1)
+    rng = np.random.default_rng(seed)
+
+    for chunk_start in range(0, len(dates), chunk_days):
+        chunk_dates = dates[chunk_start:chunk_start + chunk_days]
+        # 1. Bars of the chunk, all symbols together, ordered by (day, symbol)
+        day_index, symbol_index, bars = [], [], []
+        for j, prices in enumerate(series):
+            rows = date_range_slice(prices.dates, chunk_dates[0], chunk_dates[-1])
+            day_index.append(np.searchsorted(chunk_dates, prices.dates[rows]))
+            symbol_index.append(np.full(rows.stop - rows.start, j))
+            bars.append((prices, rows))
+        day_index, symbol_index = np.concatenate(day_index), np.concatenate(symbol_index)
+        open, high, low, close, volume = (np.concatenate([getattr(prices, column)[rows] for prices, rows in bars])
+                                          for column in ('open', 'high', 'low', 'close', 'volume'))
+
+        # 2. Paths and volumes of every bar
+        paths = bridge_paths(open, high, low, close, ticks_per_bar, rng)
+        volumes = split_volume(volume, ticks_per_bar, rng)
+
+        # 3. Flatten in (day, tick, symbol) order, i.e. by timestamp then symbol
+        order = np.lexsort((np.broadcast_to(symbol_index[:, None], paths.shape).ravel(),
+                            np.broadcast_to(np.arange(ticks_per_bar), paths.shape).ravel(),
+                            np.broadcast_to(day_index[:, None], paths.shape).ravel()))
+        bar_of_tick = order // ticks_per_bar
+        timestamps = chunk_dates[day_index].astype('datetime64[ms]')[:, None] + offsets[None, :]
+        yield TickChunk(
+            symbol=np.asarray(symbols)[symbol_index][bar_of_tick],
+            timestamp=timestamps.ravel()[order],
+            price=paths.ravel()[order],
+            volume=volumes.ravel()[order],
+        )
+
+
+def write_npy(chunks: Iterator[TickChunk], out_dir: str) -> List[str]:
+    """
+    One `ticks-<n>.npy` structured array file per chunk.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    paths = []
+    for i, chunk in enumerate(chunks):
+        path = os.path.join(out_dir, f"ticks-{i:05d}.npy")
+        np.save(path, chunk.to_records())
+        paths.append(path)
+    return paths
+
+
+def write_parquet(chunks: Iterator[TickChunk], out_dir: str) -> List[str]:
+    """
+    A single `ticks.parquet` file, one row group per chunk. Raises RuntimeError when pyarrow is not installed.
+    """
+    if pyarrow is None:
+        raise RuntimeError("Parquet output needs the optional 'pyarrow' package")
+    os.makedirs(out_dir, exist_ok=True)
+    path = os.path.join(out_dir, "ticks.parquet")
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pyarrow.table({name: getattr(chunk, name) for name in TICK_DTYPE.names})
+            if writer is None:
+                writer = pyarrow.parquet.ParquetWriter(path, table.schema)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+    return [path] if writer is not None else []
+
+
+WRITERS = {'npy': write_npy, 'parquet': write_parquet}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Write synthetic intraday ticks generated from the daily OHLC csv files.")
+    parser.add_argument('--data-dir', default=DATA_DIR, help="Folder containing <SYMBOL>.csv files")
+    parser.add_argument('--out', required=True, help="Output folder")
+    parser.add_argument('--format', choices=sorted(WRITERS), default='npy')
+    parser.add_argument('--symbols', nargs='*', help="Symbols to synthesize, default all")
+    parser.add_argument('--ticks-per-bar', type=int, default=390)
+    parser.add_argument('--chunk-days', type=int, default=DEFAULT_CHUNK_DAYS, help="Trading days generated per chunk")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    store = PriceStore()
+    store.load_from_csv(args.data_dir)
+    ticks = 0
+
+    def counted(chunks: Iterator[TickChunk]) -> Iterator[TickChunk]:
+        nonlocal ticks
+        for chunk in chunks:
+            ticks += len(chunk)
+            yield chunk
+
+    started = time.perf_counter()
+    chunks = synthesize_ticks(store, args.symbols, args.ticks_per_bar, args.seed, args.chunk_days)
+    paths = WRITERS[args.format](counted(chunks), args.out)
+    seconds = time.perf_counter() - started
+    print(f"{ticks} ticks in {len(paths)} file(s) under {args.out} in {seconds:.3f}s ({ticks / seconds if seconds else 0:.0f} ticks/sec)")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,9 @@
 import datetime
 
+import numpy as np
+
 from assessment_app.models.constants import DAYS_IN_YEAR
-from datetime import datetime
+from datetime import datetime, timezone
 
 
 def compute_cagr(beginning_value: float, ending_value: float, start_date: datetime, end_date: datetime) -> float:
@@ -22,7 +24,12 @@ def compute_cagr(beginning_value: float, ending_value: float, start_date: dateti
         200% CAGR would mean your returned value would be 200 for the duration
         5% CAGR would mean your returned value would be 5 for the duration
     """
-    pass
+    years = (end_date - start_date).total_seconds() / (DAYS_IN_YEAR * 24 * 60 * 60)
+    if beginning_value <= 0 or years <= 0:
+        raise ValueError("CAGR needs a positive beginning value and an end date after the start date")
+    if ending_value <= 0:
+        return -100.0
+    return ((ending_value / beginning_value) ** (1 / years) - 1) * 100
 
 
 def datetime_to_str(dt: datetime) -> str:
@@ -49,3 +56,34 @@ def str_to_datetime(date_str: str) -> datetime:
     datetime: The datetime object.
     """
     pass
+
+
+def to_naive_utc(dt: datetime) -> datetime:
+    """
+    Convert a timezone-aware datetime to naive UTC, naive datetimes are returned unchanged.
+
+    Parameters:
+    dt (datetime): The datetime object to convert.
+
+    Returns:
+    datetime: The naive datetime, as stored in the database.
+    """
+    if dt.tzinfo is None:
+        return dt
+    return dt.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def rolling_mean(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing mean over `window` rows along axis 0, NaN until `window` non-NaN values are available.
+    """
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums = np.vstack([np.zeros((1, values.shape[1])), sums])
+    counts = np.vstack([np.zeros((1, values.shape[1]), dtype=counts.dtype), counts])
+    window_sums = sums[window:] - sums[:-window]
+    window_counts = counts[window:] - counts[:-window]
+    means = np.full(values.shape, np.nan)
+    means[window - 1:] = np.where(window_counts == window, window_sums / window, np.nan)
+    return means
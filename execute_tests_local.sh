@@ -1,7 +1,7 @@
 #!/bin/bash
 rm -rf output/*
 source .venv_wsl/bin/activate
-pip install -r requirements.txt
+pip install -r requirements-test.txt
 
 # Run the tests
 pytest assessment_app/tests/pub_tests/ --html=output/pub-test-report.html --self-contained-html